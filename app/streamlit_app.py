@@ -1,4 +1,3 @@
-import io
 import json
 from typing import List, Dict, Any
 
@@ -6,8 +5,8 @@ import pandas as pd
 import streamlit as st
 import requests
 
-from utils.extract import extract_document
-from utils.segment import segment_clauses
+from utils.preprocess import preprocess_file
+from utils.segmenter import segment_pages_to_clauses
 from utils.classify import classify_clauses
 from utils.report import build_json_report, build_csv_report
 from utils.annotate import generate_annotated_pdf
@@ -75,11 +74,12 @@ if uploaded_file:
 			raise st.stop()
 
 	with st.spinner("Extracting text..."):
-		pages = extract_document(io.BytesIO(file_bytes), name=uploaded_file.name)
+		pre = preprocess_file(file_bytes, uploaded_file.name)
 		doc_name = uploaded_file.name
 
 	with st.spinner("Segmenting into clauses..."):
-		clauses = segment_clauses(pages, merge_short=join_short_sentences)
+		# Same segmentation as the API, so each clause carries its per-line bounding boxes
+		clauses = segment_pages_to_clauses(pre["pages"], merge_short=join_short_sentences)
 
 	with st.spinner("Classifying risks..."):
 		results = classify_clauses(clauses)
@@ -95,7 +95,7 @@ if uploaded_file:
 			"severity_score": item["severity_score"],
 			"severity": item["severity"],
 			"explanation": item.get("explanation", ""),
-			"bbox": None,
+			"bboxes": item.get("bounding_boxes") or [],
 		})
 	df = pd.DataFrame(rows)
 
@@ -120,7 +120,7 @@ if uploaded_file:
 			if r["category"] == "Safe":
 				continue
 			highlights.append({
-				"bbox": r.get("bbox"),
+				"bboxes": r.get("bboxes"),
 				"category": r["category"],
 				"intensity": max(0.2, min(0.9, float(r["confidence"]))),
 				"clause_id": r["clause_id"],
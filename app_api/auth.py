@@ -106,6 +106,12 @@ def set_doc_acl(job_id: str, workspace_id: str, owner_user_id: str):
 				 (job_id, workspace_id, owner_user_id))
 
 
+def doc_workspace(job_id: str) -> Optional[str]:
+	with sqlite3.connect(DB_PATH) as con:
+		row = con.execute("SELECT workspace_id FROM doc_acl WHERE job_id = ?", (job_id,)).fetchone()
+	return row[0] if row else None
+
+
 def enforce_doc_access(job_id: str, requester_payload: dict):
 	ws = requester_payload.get('ws')
 	role = requester_payload.get('role')
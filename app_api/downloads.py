@@ -5,17 +5,16 @@ import json
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse, JSONResponse
 from utils.report import build_json_report, build_csv_report, build_pdf_report
+from app_api.jobstore import JOB_STORE
 
 router = APIRouter()
 
 
 @router.get("/api/download/{job_id}")
 def download(job_id: str, format: str = "json", redact_pii: bool = False):
-	from app_api.serving import JOBS
-	state = JOBS.get(job_id)
-	if not state or not state.get("future") or not state["future"].done():
+	out = JOB_STORE.get_result(job_id)
+	if out is None:
 		raise HTTPException(404, detail="Results not ready")
-	out = state["future"].result()
 	results = out.get("clauses", [])
 	summary = out.get("summary", {})
 	doc_name = out.get("document_name", job_id)
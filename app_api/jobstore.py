@@ -0,0 +1,453 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+from abc import ABC, abstractmethod
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+
+JOB_STORE_URL = os.environ.get("JOB_STORE_URL", "sqlite:///storage/jobs.db")
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+
+class JobStore(ABC):
+	"""Interface for job state shared by the API processes and workers."""
+
+	@abstractmethod
+	def create(self, job_id: str, status: str = "queued", meta: Optional[Dict[str, Any]] = None) -> None:
+		...
+
+	@abstractmethod
+	def set_status(self, job_id: str, status: str) -> None:
+		...
+
+	# With ``worker_id``, a worker whose lease has passed to another worker is ignored (returns False)
+	@abstractmethod
+	def complete(self, job_id: str, result: Dict[str, Any], worker_id: Optional[str] = None) -> bool:
+		...
+
+	@abstractmethod
+	def fail(self, job_id: str, error: str, worker_id: Optional[str] = None) -> bool:
+		...
+
+	@abstractmethod
+	def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+		...
+
+	@abstractmethod
+	def get_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+		...
+
+	@abstractmethod
+	def events(self, job_id: str) -> List[Dict[str, Any]]:
+		...
+
+	@abstractmethod
+	def purge(self, older_than_seconds: float) -> int:
+		...
+
+	# Per-clause rows streamed by /api/stream while the job runs
+	@abstractmethod
+	def append_clauses(self, job_id: str, start_seq: int, rows: List[Dict[str, Any]]) -> None:
+		...
+
+	@abstractmethod
+	def clauses(self, job_id: str, after: int = -1, limit: int = 200) -> List[tuple]:
+		...
+
+	# Per-page fingerprints and analyses that a revised upload can reuse
+	@abstractmethod
+	def save_pages(self, job_id: str, pages: List[Dict[str, Any]]) -> None:
+		...
+
+	@abstractmethod
+	def pages(self, job_id: str) -> List[Dict[str, Any]]:
+		...
+
+	@abstractmethod
+	def page_count(self, job_id: str) -> int:
+		...
+
+	# Queue operations used by app_api/worker.py
+	@abstractmethod
+	def enqueue(self, job_id: str, meta: Optional[Dict[str, Any]] = None, queue: str = "default") -> None:
+		...
+
+	@abstractmethod
+	def claim(self, worker_id: str, lease_seconds: float, queue: str = "default", max_attempts: Optional[int] = None) -> Optional[Dict[str, Any]]:
+		...
+
+	@abstractmethod
+	def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+		...
+
+	@abstractmethod
+	def release(self, job_id: str, worker_id: str, max_attempts: Optional[int] = None) -> None:
+		...
+
+	@abstractmethod
+	def requeue_expired(self, max_attempts: int) -> int:
+		...
+
+	@abstractmethod
+	def queue_depth(self, queue: str = "default") -> int:
+		...
+
+
+class SQLiteJobStore(JobStore):
+	"""Job store on a WAL-mode SQLite file, readable by every process on the host/volume."""
+
+	def __init__(self, path: str | Path):
+		self.path = Path(path)
+		self.path.parent.mkdir(parents=True, exist_ok=True)
+		self._local = threading.local()
+		con = self._conn()
+		con.execute("PRAGMA journal_mode=WAL")
+		with con:
+			con.execute(
+				"""
+				CREATE TABLE IF NOT EXISTS jobs (
+					job_id TEXT PRIMARY KEY,
+					status TEXT NOT NULL,
+					meta TEXT,
+					error TEXT,
+					result BLOB,
+					created_at REAL NOT NULL,
+					updated_at REAL NOT NULL,
+					started_at REAL,
+					finished_at REAL,
+					queue TEXT,
+					lease_owner TEXT,
+					lease_expires REAL,
+					attempts INTEGER NOT NULL DEFAULT 0
+				)
+				"""
+			)
+			con.execute(
+				"""
+				CREATE TABLE IF NOT EXISTS job_events (
+					id INTEGER PRIMARY KEY AUTOINCREMENT,
+					job_id TEXT NOT NULL,
+					status TEXT NOT NULL,
+					at REAL NOT NULL
+				)
+				"""
+			)
+			con.execute("CREATE INDEX IF NOT EXISTS idx_job_events_job ON job_events (job_id, id)")
+			con.execute(
+				"""
+				CREATE TABLE IF NOT EXISTS job_clauses (
+					job_id TEXT NOT NULL,
+					seq INTEGER NOT NULL,
+					payload TEXT NOT NULL,
+					PRIMARY KEY (job_id, seq)
+				)
+				"""
+			)
+			con.execute(
+				"""
+				CREATE TABLE IF NOT EXISTS job_pages (
+					job_id TEXT NOT NULL,
+					page_number INTEGER NOT NULL,
+					fingerprint TEXT NOT NULL,
+					source_fp TEXT,
+					page BLOB,
+					analysis BLOB NOT NULL,
+					PRIMARY KEY (job_id, page_number)
+				)
+				"""
+			)
+			# Stores created before queue support lack the lease columns
+			have = {r[1] for r in con.execute("PRAGMA table_info(jobs)").fetchall()}
+			for col, ddl in (
+				("queue", "TEXT"),
+				("lease_owner", "TEXT"),
+				("lease_expires", "REAL"),
+				("attempts", "INTEGER NOT NULL DEFAULT 0"),
+			):
+				if col not in have:
+					con.execute(f"ALTER TABLE jobs ADD COLUMN {col} {ddl}")
+			con.execute("CREATE INDEX IF NOT EXISTS idx_jobs_queue ON jobs (queue, status, created_at)")
+
+	def _conn(self) -> sqlite3.Connection:
+		# One connection per thread and process; never reuse a handle inherited across fork
+		con = getattr(self._local, "con", None)
+		if con is None or self._local.pid != os.getpid():
+			con = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+			con.execute("PRAGMA synchronous=NORMAL")
+			con.execute("PRAGMA busy_timeout=30000")
+			self._local.con = con
+			self._local.pid = os.getpid()
+		return con
+
+	def create(self, job_id: str, status: str = "queued", meta: Optional[Dict[str, Any]] = None) -> None:
+		self._insert(job_id, status, meta, None)
+
+	def enqueue(self, job_id: str, meta: Optional[Dict[str, Any]] = None, queue: str = "default") -> None:
+		self._insert(job_id, "queued", meta, queue)
+
+	def _insert(self, job_id: str, status: str, meta: Optional[Dict[str, Any]], queue: Optional[str]):
+		now = time.time()
+		con = self._conn()
+		with con:
+			con.execute("DELETE FROM job_events WHERE job_id = ?", (job_id,))
+			con.execute("DELETE FROM job_clauses WHERE job_id = ?", (job_id,))
+			con.execute("DELETE FROM job_pages WHERE job_id = ?", (job_id,))
+			con.execute(
+				"""
+				INSERT OR REPLACE INTO jobs (job_id, status, meta, error, result, created_at, updated_at, started_at, finished_at, queue)
+				VALUES (?, ?, ?, NULL, NULL, ?, ?, NULL, NULL, ?)
+				""",
+				(job_id, status, json.dumps(meta or {}), now, now, queue),
+			)
+			con.execute("INSERT INTO job_events (job_id, status, at) VALUES (?, ?, ?)", (job_id, status, now))
+
+	def set_status(self, job_id: str, status: str) -> None:
+		now = time.time()
+		con = self._conn()
+		with con:
+			con.execute(
+				"UPDATE jobs SET status = ?, updated_at = ?, started_at = COALESCE(started_at, ?) WHERE job_id = ?",
+				(status, now, now, job_id),
+			)
+			con.execute("INSERT INTO job_events (job_id, status, at) VALUES (?, ?, ?)", (job_id, status, now))
+
+	def complete(self, job_id: str, result: Dict[str, Any], worker_id: Optional[str] = None) -> bool:
+		blob = zlib.compress(json.dumps(result, ensure_ascii=False).encode("utf-8"))
+		return self._finish(job_id, "completed", worker_id, result=blob)
+
+	def fail(self, job_id: str, error: str, worker_id: Optional[str] = None) -> bool:
+		return self._finish(job_id, "failed", worker_id, error=error)
+
+	def _finish(self, job_id: str, status: str, worker_id: Optional[str], result: Optional[bytes] = None, error: Optional[str] = None) -> bool:
+		now = time.time()
+		con = self._conn()
+		with con:
+			# A worker that finishes after its lease expired and the job was re-claimed must
+			# not overwrite the new owner's state
+			cur = con.execute(
+				"""
+				UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ?, finished_at = ?,
+					started_at = COALESCE(started_at, ?), lease_owner = NULL, lease_expires = NULL
+				WHERE job_id = ? AND (lease_owner IS NULL OR lease_owner = ?)
+				""",
+				(status, result, error, now, now, now, job_id, worker_id),
+			)
+			if not cur.rowcount:
+				print(f"Ignoring {status} for {job_id} from {worker_id}: the job is leased to another worker", flush=True)
+				return False
+			con.execute("INSERT INTO job_events (job_id, status, at) VALUES (?, ?, ?)", (job_id, status, now))
+		return True
+
+	def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+		row = self._conn().execute(
+			"""
+			SELECT status, meta, error, created_at, updated_at, started_at, finished_at, lease_owner, attempts
+			FROM jobs WHERE job_id = ?
+			""",
+			(job_id,),
+		).fetchone()
+		if not row:
+			return None
+		status, meta, error, created_at, updated_at, started_at, finished_at, lease_owner, attempts = row
+		return {
+			"job_id": job_id,
+			"status": status,
+			"meta": json.loads(meta) if meta else {},
+			"error": error,
+			"created_at": created_at,
+			"updated_at": updated_at,
+			"started_at": started_at,
+			"finished_at": finished_at,
+			"duration_s": (finished_at - created_at) if finished_at else None,
+			"worker": lease_owner,
+			"attempts": attempts,
+		}
+
+	def get_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+		row = self._conn().execute("SELECT result FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+		if not row or row[0] is None:
+			return None
+		return json.loads(zlib.decompress(row[0]).decode("utf-8"))
+
+	def events(self, job_id: str) -> List[Dict[str, Any]]:
+		rows = self._conn().execute(
+			"SELECT status, at FROM job_events WHERE job_id = ? ORDER BY id", (job_id,)
+		).fetchall()
+		out = []
+		for i, (status, at) in enumerate(rows):
+			nxt = rows[i + 1][1] if i + 1 < len(rows) else None
+			out.append({"status": status, "at": at, "seconds": (nxt - at) if nxt is not None else None})
+		return out
+
+	def append_clauses(self, job_id: str, start_seq: int, rows: List[Dict[str, Any]]) -> None:
+		con = self._conn()
+		with con:
+			con.executemany(
+				"INSERT OR REPLACE INTO job_clauses (job_id, seq, payload) VALUES (?, ?, ?)",
+				[(job_id, start_seq + i, json.dumps(r, ensure_ascii=False)) for i, r in enumerate(rows)],
+			)
+
+	def clauses(self, job_id: str, after: int = -1, limit: int = 200) -> List[tuple]:
+		"""Return up to ``limit`` ``(seq, row)`` pairs with ``seq > after``, in order."""
+		rows = self._conn().execute(
+			"SELECT seq, payload FROM job_clauses WHERE job_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+			(job_id, after, limit),
+		).fetchall()
+		return [(seq, json.loads(payload)) for seq, payload in rows]
+
+	def save_pages(self, job_id: str, pages: List[Dict[str, Any]]) -> None:
+		"""Store ``{page_number, fingerprint, source_fp, page, analysis}`` records; ``page``
+		is the serialized preprocessed page (kept for OCR'd pages and pages with a word
+		index) or None."""
+		con = self._conn()
+		with con:
+			con.execute("DELETE FROM job_pages WHERE job_id = ?", (job_id,))
+			con.executemany(
+				"INSERT INTO job_pages (job_id, page_number, fingerprint, source_fp, page, analysis) VALUES (?, ?, ?, ?, ?, ?)",
+				[
+					(job_id, p["page_number"], p["fingerprint"], p.get("source_fp"), p.get("page"),
+						zlib.compress(json.dumps(p["analysis"], ensure_ascii=False).encode("utf-8")))
+					for p in pages
+				],
+			)
+
+	def pages(self, job_id: str) -> List[Dict[str, Any]]:
+		rows = self._conn().execute(
+			"SELECT page_number, fingerprint, source_fp, page, analysis FROM job_pages WHERE job_id = ? ORDER BY page_number",
+			(job_id,),
+		).fetchall()
+		return [
+			{"page_number": n, "fingerprint": fp, "source_fp": sfp, "page": page,
+				"analysis": json.loads(zlib.decompress(analysis).decode("utf-8"))}
+			for n, fp, sfp, page, analysis in rows
+		]
+
+	def page_count(self, job_id: str) -> int:
+		return self._conn().execute("SELECT COUNT(*) FROM job_pages WHERE job_id = ?", (job_id,)).fetchone()[0]
+
+	def purge(self, older_than_seconds: float) -> int:
+		cutoff = time.time() - older_than_seconds
+		con = self._conn()
+		with con:
+			ids = [r[0] for r in con.execute("SELECT job_id FROM jobs WHERE updated_at < ?", (cutoff,)).fetchall()]
+			con.executemany("DELETE FROM job_events WHERE job_id = ?", [(i,) for i in ids])
+			con.executemany("DELETE FROM job_clauses WHERE job_id = ?", [(i,) for i in ids])
+			con.executemany("DELETE FROM job_pages WHERE job_id = ?", [(i,) for i in ids])
+			con.executemany("DELETE FROM jobs WHERE job_id = ?", [(i,) for i in ids])
+		return len(ids)
+
+	def claim(self, worker_id: str, lease_seconds: float, queue: str = "default", max_attempts: Optional[int] = None) -> Optional[Dict[str, Any]]:
+		"""Atomically lease the oldest queued job with attempts left to ``worker_id``."""
+		now = time.time()
+		con = self._conn()
+		with con:
+			row = con.execute(
+				"""
+				UPDATE jobs SET status = 'claimed', lease_owner = ?, lease_expires = ?, attempts = attempts + 1, updated_at = ?
+				WHERE job_id = (
+					SELECT job_id FROM jobs WHERE queue = ? AND status = 'queued' AND (? IS NULL OR attempts < ?)
+					ORDER BY created_at LIMIT 1
+				)
+				RETURNING job_id, meta, attempts
+				""",
+				(worker_id, now + lease_seconds, now, queue, max_attempts, max_attempts),
+			).fetchone()
+			if not row:
+				return None
+			con.execute("INSERT INTO job_events (job_id, status, at) VALUES (?, 'claimed', ?)", (row[0], now))
+		return {"job_id": row[0], "meta": json.loads(row[1]) if row[1] else {}, "attempts": row[2]}
+
+	def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+		now = time.time()
+		con = self._conn()
+		with con:
+			cur = con.execute(
+				"UPDATE jobs SET lease_expires = ? WHERE job_id = ? AND lease_owner = ?",
+				(now + lease_seconds, job_id, worker_id),
+			)
+		return cur.rowcount == 1
+
+	def release(self, job_id: str, worker_id: str, max_attempts: Optional[int] = None) -> None:
+		"""Hand a leased job back to the queue.
+
+		With ``max_attempts`` (its worker process died) the attempt counts and a job
+		that has used them all fails instead, so a document that keeps killing the pool
+		is not retried forever. Without it (worker shutdown, a pool that broke before
+		the job ran) the attempt is given back.
+		"""
+		now = time.time()
+		con = self._conn()
+		with con:
+			row = con.execute("SELECT attempts FROM jobs WHERE job_id = ? AND lease_owner = ?", (job_id, worker_id)).fetchone()
+			if not row:
+				return
+			attempts = row[0]
+			if max_attempts is not None and attempts >= max_attempts:
+				con.execute(
+					"""
+					UPDATE jobs SET status = 'failed', error = ?, lease_owner = NULL, lease_expires = NULL,
+						updated_at = ?, finished_at = ?
+					WHERE job_id = ?
+					""",
+					(f"Worker process died after {attempts} attempts", now, now, job_id),
+				)
+				con.execute("INSERT INTO job_events (job_id, status, at) VALUES (?, 'failed', ?)", (job_id, now))
+				return
+			con.execute(
+				"""
+				UPDATE jobs SET status = 'queued', lease_owner = NULL, lease_expires = NULL, updated_at = ?,
+					attempts = attempts - ?
+				WHERE job_id = ?
+				""",
+				(now, 0 if max_attempts is not None else 1, job_id),
+			)
+			con.execute("INSERT INTO job_events (job_id, status, at) VALUES (?, 'requeued', ?)", (job_id, now))
+
+	def requeue_expired(self, max_attempts: int) -> int:
+		"""Requeue jobs whose worker stopped heartbeating; fail those out of attempts."""
+		now = time.time()
+		con = self._conn()
+		with con:
+			expired = con.execute(
+				"SELECT job_id, attempts FROM jobs WHERE lease_expires IS NOT NULL AND lease_expires < ?",
+				(now,),
+			).fetchall()
+			for job_id, attempts in expired:
+				if attempts >= max_attempts:
+					con.execute(
+						"""
+						UPDATE jobs SET status = 'failed', error = ?, lease_owner = NULL, lease_expires = NULL,
+							updated_at = ?, finished_at = ?
+						WHERE job_id = ?
+						""",
+						(f"Worker lease expired after {attempts} attempts", now, now, job_id),
+					)
+					con.execute("INSERT INTO job_events (job_id, status, at) VALUES (?, 'failed', ?)", (job_id, now))
+				else:
+					con.execute(
+						"UPDATE jobs SET status = 'queued', lease_owner = NULL, lease_expires = NULL, updated_at = ? WHERE job_id = ?",
+						(now, job_id),
+					)
+					con.execute("INSERT INTO job_events (job_id, status, at) VALUES (?, 'requeued', ?)", (job_id, now))
+		return len(expired)
+
+	def queue_depth(self, queue: str = "default") -> int:
+		(n,) = self._conn().execute(
+			"SELECT COUNT(*) FROM jobs WHERE queue = ? AND status = 'queued'", (queue,)
+		).fetchone()
+		return n
+
+
+def get_job_store(url: str = JOB_STORE_URL) -> JobStore:
+	if url.startswith("sqlite:///"):
+		return SQLiteJobStore(url[len("sqlite:///"):])
+	raise ValueError(f"Unsupported job store: {url}")
+
+
+JOB_STORE = get_job_store()
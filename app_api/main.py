@@ -1,4 +1,4 @@
-import os, uuid, hashlib, tempfile, mimetypes
+import os, uuid, hashlib, mimetypes
 from datetime import datetime
 from pathlib import Path
 from typing import Any
@@ -16,14 +16,14 @@ import magic
 import sqlite3
 import boto3
 import clamd
-import io
 
-from app_api.serving import router as serving_router
+from app_api.serving import router as serving_router, warm_page_pool
 from app_api.downloads import router as download_router
 from app_api.feedback import router as feedback_router
 from app_api.auth import require_role, set_doc_acl, require_auth
 from app_api.metrics import router as metrics_router, MetricsMiddleware
 from app_api.security import HTTPSRedirectMiddleware
+from app_api.storage_crypto import DecryptingReader, EncryptingWriter, derive_key
 
 S3_BUCKET = os.environ.get("S3_BUCKET")
 AWS_REGION = os.environ.get("AWS_REGION", "us-east-1")
@@ -44,7 +44,9 @@ FERNET_KEY_PATH = Path("storage/fernet.key")
 
 if not FERNET_KEY_PATH.exists():
 	FERNET_KEY_PATH.write_bytes(Fernet.generate_key())
+# Legacy single-token uploads; new uploads use the chunked format keyed from the same secret
 FERNET = Fernet(FERNET_KEY_PATH.read_bytes())
+STORAGE_KEY = derive_key(FERNET_KEY_PATH.read_bytes())
 
 limiter = Limiter(key_func=get_remote_address)
 
@@ -115,29 +117,12 @@ def validate_mime_and_size(filename: str, sniffed_mime: str, size_bytes: int):
 			return
 		raise HTTPException(400, detail=f"Unsupported type: {sniffed_mime}")
 
-def compute_sha256(fp) -> str:
-	fp.seek(0)
-	h = hashlib.sha256()
-	for chunk in iter(lambda: fp.read(8192), b""):
-		h.update(chunk)
-	fp.seek(0)
-	return h.hexdigest()
-
-def encrypt_and_store(fp, job_id: str) -> Path:
-	fp.seek(0)
-	# Optional AV scan
+def av_scan(enc_path: Path):
+	# Optional AV scan, streamed from the encrypted file
 	if clam:
-		pos = fp.tell()
-		fp.seek(0)
-		data = fp.read()
-		resp = clam.instream(io.BytesIO(data))
-		fp.seek(pos)
+		resp = clam.instream(DecryptingReader(enc_path, STORAGE_KEY))
 		if resp and resp.get('stream', ['OK'])[0] != 'OK':
 			raise HTTPException(400, detail="Malware detected")
-	ciphertext = FERNET.encrypt(fp.read())
-	out_path = STORAGE_DIR / f"{job_id}.bin"
-	out_path.write_bytes(ciphertext)
-	return out_path
 
 @app.post("/api/upload/presign", response_model=PresignResponse, dependencies=[Depends(require_role(["Admin","Reviewer"]))])
 async def presign_upload(filename: str, payload=Depends(require_auth)):
@@ -153,30 +138,36 @@ async def presign_upload(filename: str, payload=Depends(require_auth)):
 
 @app.post("/api/upload", response_model=UploadResponse, dependencies=[Depends(require_role(["Admin","Reviewer"]))])
 @limiter.limit("10/minute")
-async def upload(file: UploadFile = File(...), payload=Depends(require_auth)):
-	spooled = tempfile.SpooledTemporaryFile(max_size=MAX_BYTES + 1)
-	total = 0
-	while True:
-		block = await file.read(1024 * 1024)
-		if not block:
-			break
-		total += len(block)
-		if total > MAX_BYTES:
-			spooled.close()
-			raise HTTPException(413, detail="File too large.")
-		spooled.write(block)
-
-	spooled.seek(0)
-	head = spooled.read(4096)
-	spooled.seek(0)
-	sniffed_mime = magic.from_buffer(head, mime=True) or mimetypes.guess_type(file.filename)[0] or "application/octet-stream"
-
-	validate_mime_and_size(file.filename, sniffed_mime, total)
-	sha256 = compute_sha256(spooled)
-
+async def upload(request: Request, file: UploadFile = File(...), payload=Depends(require_auth)):
 	job_id = "job_" + uuid.uuid4().hex
-	storage_path = encrypt_and_store(spooled, job_id)
-	spooled.close()
+	storage_path = STORAGE_DIR / f"{job_id}.bin"
+	# Encrypt while the upload streams in; plaintext is never held whole or written to disk
+	writer = EncryptingWriter(storage_path, STORAGE_KEY)
+	h = hashlib.sha256()
+	head = b""
+	total = 0
+	try:
+		while True:
+			block = await file.read(1024 * 1024)
+			if not block:
+				break
+			total += len(block)
+			if total > MAX_BYTES:
+				raise HTTPException(413, detail="File too large.")
+			if len(head) < 4096:
+				head += block[:4096 - len(head)]
+			h.update(block)
+			writer.write(block)
+
+		sniffed_mime = magic.from_buffer(head, mime=True) or mimetypes.guess_type(file.filename)[0] or "application/octet-stream"
+		validate_mime_and_size(file.filename, sniffed_mime, total)
+		writer.close()
+		av_scan(storage_path)
+	except BaseException:
+		writer.abort()
+		storage_path.unlink(missing_ok=True)
+		raise
+	sha256 = h.hexdigest()
 
 	meta = {
 		"job_id": job_id,
@@ -200,6 +191,10 @@ async def upload(file: UploadFile = File(...), payload=Depends(require_auth)):
 		sha256=sha256,
 	)
 
+@app.on_event("startup")
+def warm_pools():
+	warm_page_pool()
+
 app.include_router(serving_router, dependencies=[Depends(require_role(["Admin","Reviewer","Viewer"]))])
 app.include_router(download_router, dependencies=[Depends(require_role(["Admin","Reviewer","Viewer"]))])
 app.include_router(feedback_router, dependencies=[Depends(require_role(["Admin","Reviewer"]))])
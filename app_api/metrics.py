@@ -6,6 +6,9 @@ from fastapi import APIRouter, Request, Response
 from prometheus_client import Counter, Histogram, Gauge, generate_latest, CONTENT_TYPE_LATEST
 from starlette.middleware.base import BaseHTTPMiddleware
 
+from app_api.jobstore import JOB_STORE
+from utils.ocr_cache import get_ocr_cache
+
 router = APIRouter()
 
 REQUEST_LATENCY = Histogram('api_request_latency_seconds', 'API request latency', ['path', 'method'])
@@ -16,6 +19,20 @@ ERROR_COUNT = Counter('api_errors_total', 'API errors total', ['path'])
 MODEL_LABEL_DIST = Counter('model_pred_labels_total', 'Predicted labels count', ['label'])
 MODEL_CONFIDENCE = Histogram('model_confidence', 'Model probability scores')
 FEEDBACK_ACCEPT_RATE = Gauge('feedback_accept_rate', 'Share of accepted model suggestions')
+MODEL_LOAD_SECONDS = Histogram('model_load_seconds', 'Model artifact load time', ['version'])
+MODEL_RESIDENT_BYTES = Gauge('model_resident_bytes', 'Memory held by loaded model weights', ['version'])
+MODELS_LOADED = Gauge('models_loaded', 'Model instances resident in the registry')
+INFER_QUEUE_WAIT = Histogram('inference_queue_wait_seconds', 'Time a clause waits in the micro-batch queue',
+	buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+INFER_BATCH_FILL = Histogram('inference_batch_fill_ratio', 'Micro-batch size relative to the maximum',
+	buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0))
+INFER_BATCH_LATENCY = Histogram('inference_batch_latency_seconds', 'Forward pass latency per micro-batch')
+RESULT_CACHE_HITS = Counter('result_cache_hits_total', 'Analyses served from the result cache')
+RESULT_CACHE_MISSES = Counter('result_cache_misses_total', 'Analyses not found in the result cache')
+RESULT_CACHE_BYTES = Gauge('result_cache_bytes', 'Compressed size of the result cache')
+OCR_CACHE_HITS = Counter('ocr_cache_hits_total', 'OCR page attempts served from the OCR page cache')
+OCR_CACHE_MISSES = Counter('ocr_cache_misses_total', 'OCR page attempts that ran Tesseract')
+OCR_CACHE_BYTES = Gauge('ocr_cache_bytes', 'Compressed size of the OCR page cache')
 
 
 class MetricsMiddleware(BaseHTTPMiddleware):
@@ -37,4 +54,9 @@ class MetricsMiddleware(BaseHTTPMiddleware):
 
 @router.get('/metrics')
 def metrics():
+	# Workers may run elsewhere; report the shared queue from the API too
+	QUEUE_DEPTH.set(JOB_STORE.queue_depth())
+	ocr_cache = get_ocr_cache()
+	if ocr_cache:
+		OCR_CACHE_BYTES.set(ocr_cache.total_bytes())
 	return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+from typing import Callable, Dict, Tuple
+from dataclasses import dataclass
+import hashlib
+import os
+import threading
+import time
+
+from ml.export_onnx import PARITY_FILE
+from ml.infer import RiskClassifier, ONNX_BACKEND_FILES
+from app_api.metrics import MODEL_LOAD_SECONDS, MODEL_RESIDENT_BYTES, MODELS_LOADED
+
+MODEL_IDLE_TTL = float(os.environ.get("MODEL_IDLE_TTL", "1800"))
+MODEL_CHECK_INTERVAL = float(os.environ.get("MODEL_CHECK_INTERVAL", "5"))
+MAX_LOADED_MODELS = int(os.environ.get("MAX_LOADED_MODELS", "2"))
+
+# Files whose size/mtime identify a concrete artifact on disk
+ARTIFACT_FILES = (
+	"config.json", "labels.json", "model.safetensors", "pytorch_model.bin",
+	"tokenizer.json", "vocab.json", "merges.txt", PARITY_FILE,
+) + tuple(ONNX_BACKEND_FILES.values())
+
+
+def artifact_fingerprint(model_dir: str) -> str:
+	h = hashlib.sha1()
+	for name in ARTIFACT_FILES:
+		try:
+			st = os.stat(os.path.join(model_dir, name))
+		except OSError:
+			continue
+		h.update(f"{name}:{st.st_size}:{st.st_mtime_ns};".encode("utf-8"))
+	return h.hexdigest()
+
+
+def model_resident_bytes(model: RiskClassifier) -> int:
+	if model.use_fallback:
+		return 0
+	if model.session is not None:
+		return os.path.getsize(os.path.join(model.model_dir, ONNX_BACKEND_FILES[model.backend]))
+	tensors = list(model.model.parameters()) + list(model.model.buffers())
+	return int(sum(t.numel() * t.element_size() for t in tensors))
+
+
+@dataclass
+class LoadedModel:
+	model: RiskClassifier
+	version: str
+	backend: str
+	fingerprint: str
+	load_seconds: float
+	resident_bytes: int
+	last_used: float
+	checked_at: float
+
+	@property
+	def tag(self) -> str:
+		return f"{self.version}:{self.backend}:{self.fingerprint[:12]}"
+
+
+class ModelRegistry:
+	"""Process-wide cache of loaded classifiers keyed on (artifact dir, model version, backend).
+
+	Loads happen outside the registry lock and are swapped in atomically, so jobs
+	holding the previous instance finish on it while new jobs pick up the new one.
+	"""
+
+	def __init__(
+		self,
+		loader: Callable[[str, str], RiskClassifier] = RiskClassifier,
+		max_models: int = MAX_LOADED_MODELS,
+		idle_ttl: float = MODEL_IDLE_TTL,
+		check_interval: float = MODEL_CHECK_INTERVAL,
+	):
+		self._loader = loader
+		self.max_models = max_models
+		self.idle_ttl = idle_ttl
+		self.check_interval = check_interval
+		self._lock = threading.Lock()
+		self._entries: Dict[Tuple[str, str, str], LoadedModel] = {}
+		self._load_locks: Dict[Tuple[str, str, str], threading.Lock] = {}
+
+	def get(self, model_dir: str, version: str, backend: str = "torch") -> RiskClassifier:
+		return self.acquire(model_dir, version, backend).model
+
+	def acquire(self, model_dir: str, version: str, backend: str = "torch") -> LoadedModel:
+		key = (os.path.abspath(model_dir), version, backend)
+		now = time.monotonic()
+		with self._lock:
+			entry = self._entries.get(key)
+			if entry and now - entry.checked_at < self.check_interval:
+				entry.last_used = now
+				return entry
+			load_lock = self._load_locks.setdefault(key, threading.Lock())
+		# While another thread reloads a stale entry, keep serving the current one
+		if not load_lock.acquire(blocking=entry is None):
+			entry.last_used = now
+			return entry
+		try:
+			fingerprint = artifact_fingerprint(key[0])
+			with self._lock:
+				entry = self._entries.get(key)
+				if entry and entry.fingerprint == fingerprint:
+					entry.checked_at = entry.last_used = time.monotonic()
+					return entry
+			start = time.perf_counter()
+			model = self._loader(key[0], backend)
+			elapsed = time.perf_counter() - start
+			loaded = LoadedModel(
+				model=model,
+				version=version,
+				backend=model.backend,
+				fingerprint=fingerprint,
+				load_seconds=elapsed,
+				resident_bytes=model_resident_bytes(model),
+				last_used=time.monotonic(),
+				checked_at=time.monotonic(),
+			)
+			with self._lock:
+				self._entries[key] = loaded
+				self._evict_locked(keep=key)
+				self._publish_locked()
+			MODEL_LOAD_SECONDS.labels(version=version).observe(elapsed)
+			return loaded
+		finally:
+			load_lock.release()
+
+	def evict_idle(self) -> int:
+		with self._lock:
+			removed = self._evict_locked()
+			self._publish_locked()
+		return removed
+
+	def clear(self):
+		with self._lock:
+			self._entries.clear()
+			self._publish_locked()
+
+	def loaded(self) -> Dict[Tuple[str, str, str], LoadedModel]:
+		with self._lock:
+			return dict(self._entries)
+
+	def _evict_locked(self, keep: Tuple[str, str, str] | None = None) -> int:
+		now = time.monotonic()
+		removed = 0
+		for key, entry in list(self._entries.items()):
+			if key != keep and now - entry.last_used > self.idle_ttl:
+				del self._entries[key]
+				removed += 1
+		while len(self._entries) > max(1, self.max_models):
+			lru = min((k for k in self._entries if k != keep), key=lambda k: self._entries[k].last_used)
+			del self._entries[lru]
+			removed += 1
+		return removed
+
+	def _publish_locked(self):
+		MODEL_RESIDENT_BYTES.clear()
+		for entry in self._entries.values():
+			MODEL_RESIDENT_BYTES.labels(version=entry.version).inc(entry.resident_bytes)
+		MODELS_LOADED.set(len(self._entries))
+
+
+MODELS = ModelRegistry()
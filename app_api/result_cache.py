@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+from app_api.metrics import RESULT_CACHE_HITS, RESULT_CACHE_MISSES, RESULT_CACHE_BYTES
+
+DB_PATH = Path("storage/metadata.db")
+RESULT_CACHE_MAX_BYTES = int(os.environ.get("RESULT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Fields that describe the job rather than the document; rewritten on every hit
+JOB_FIELDS = ("job_id", "document_name", "created_at")
+
+
+def db_init():
+	DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+	with sqlite3.connect(DB_PATH) as con:
+		con.execute(
+			"""
+			CREATE TABLE IF NOT EXISTS result_cache (
+				sha256 TEXT NOT NULL,
+				model_version TEXT NOT NULL,
+				config_hash TEXT NOT NULL,
+				workspace_id TEXT NOT NULL,
+				payload BLOB NOT NULL,
+				size_bytes INTEGER NOT NULL,
+				created_at TEXT NOT NULL,
+				last_access REAL NOT NULL,
+				PRIMARY KEY (sha256, model_version, config_hash, workspace_id)
+			)
+			"""
+		)
+		con.execute("CREATE INDEX IF NOT EXISTS idx_result_cache_access ON result_cache (last_access)")
+
+db_init()
+
+
+def config_hash(config: Dict[str, Any]) -> str:
+	return hashlib.sha256(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def upload_sha256(job_id: str) -> Optional[str]:
+	with sqlite3.connect(DB_PATH) as con:
+		row = con.execute("SELECT sha256 FROM uploads WHERE job_id = ?", (job_id,)).fetchone()
+	return row[0] if row else None
+
+
+def cache_get(sha256: str, model_version: str, cfg_hash: str, workspace_id: str) -> Optional[Dict[str, Any]]:
+	"""Return a cached result for this document, scoped to the requesting workspace."""
+	key = (sha256, model_version, cfg_hash, workspace_id)
+	with sqlite3.connect(DB_PATH) as con:
+		row = con.execute(
+			"SELECT payload FROM result_cache WHERE sha256 = ? AND model_version = ? AND config_hash = ? AND workspace_id = ?",
+			key,
+		).fetchone()
+		if not row:
+			RESULT_CACHE_MISSES.inc()
+			return None
+		con.execute(
+			"UPDATE result_cache SET last_access = ? WHERE sha256 = ? AND model_version = ? AND config_hash = ? AND workspace_id = ?",
+			(time.time(),) + key,
+		)
+	RESULT_CACHE_HITS.inc()
+	return json.loads(zlib.decompress(row[0]).decode("utf-8"))
+
+
+def cache_put(sha256: str, model_version: str, cfg_hash: str, workspace_id: str, result: Dict[str, Any]):
+	doc_result = {k: v for k, v in result.items() if k not in JOB_FIELDS}
+	# Hits copy this job's page records so they can serve as base_job_id for a revision
+	doc_result["source_job_id"] = result.get("job_id")
+	payload = zlib.compress(json.dumps(doc_result, ensure_ascii=False).encode("utf-8"))
+	with sqlite3.connect(DB_PATH) as con:
+		con.execute(
+			"""
+			INSERT OR REPLACE INTO result_cache
+				(sha256, model_version, config_hash, workspace_id, payload, size_bytes, created_at, last_access)
+			VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+			""",
+			(sha256, model_version, cfg_hash, workspace_id, payload, len(payload),
+			 datetime.utcnow().isoformat() + "Z", time.time()),
+		)
+		_evict(con)
+
+
+def _evict(con: sqlite3.Connection):
+	(total,) = con.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM result_cache").fetchone()
+	if total > RESULT_CACHE_MAX_BYTES:
+		rows = con.execute("SELECT rowid, size_bytes FROM result_cache ORDER BY last_access ASC").fetchall()
+		for rowid, size in rows:
+			if total <= RESULT_CACHE_MAX_BYTES:
+				break
+			con.execute("DELETE FROM result_cache WHERE rowid = ?", (rowid,))
+			total -= size
+	RESULT_CACHE_BYTES.set(total)
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Deque, Dict, List
+from collections import deque
+from concurrent.futures import Future
+import os
+import threading
+import time
+
+from ml.infer import RiskClassifier
+from app_api.metrics import INFER_QUEUE_WAIT, INFER_BATCH_FILL, INFER_BATCH_LATENCY
+
+INFER_MAX_BATCH = int(os.environ.get("INFER_MAX_BATCH", "64"))
+INFER_MAX_WAIT_MS = float(os.environ.get("INFER_MAX_WAIT_MS", "10"))
+
+
+class _Request:
+	__slots__ = ("future", "results", "remaining")
+
+	def __init__(self, n: int):
+		self.future: Future = Future()
+		self.results: List[Any] = [None] * n
+		self.remaining = n
+
+
+class _Item:
+	__slots__ = ("request", "index", "text", "enqueued")
+
+	def __init__(self, request: _Request, index: int, text: str, enqueued: float):
+		self.request = request
+		self.index = index
+		self.text = text
+		self.enqueued = enqueued
+
+
+class InferenceScheduler:
+	"""Coalesces clause texts from concurrent jobs into shared forward passes.
+
+	A batch is flushed once it holds ``max_batch_size`` texts or its oldest text has
+	waited ``max_wait_ms``; each caller's future resolves with its own predictions
+	in submission order.
+	"""
+
+	def __init__(
+		self,
+		model_provider: Callable[[], RiskClassifier],
+		max_batch_size: int = INFER_MAX_BATCH,
+		max_wait_ms: float = INFER_MAX_WAIT_MS,
+	):
+		self._model_provider = model_provider
+		self.max_batch_size = max(1, max_batch_size)
+		self.max_wait = max(0.0, max_wait_ms) / 1000.0
+		self._cond = threading.Condition()
+		self._pending: Deque[_Item] = deque()
+		self._thread: threading.Thread | None = None
+
+	def submit(self, texts: List[str]) -> Future:
+		req = _Request(len(texts))
+		if not texts:
+			req.future.set_result([])
+			return req.future
+		now = time.monotonic()
+		with self._cond:
+			self._ensure_thread()
+			self._pending.extend(_Item(req, i, t, now) for i, t in enumerate(texts))
+			self._cond.notify()
+		return req.future
+
+	def predict(self, texts: List[str]) -> List[List[Dict[str, Any]]]:
+		return self.submit(texts).result()
+
+	def _ensure_thread(self):
+		if self._thread is None or not self._thread.is_alive():
+			self._thread = threading.Thread(target=self._loop, name="inference-scheduler", daemon=True)
+			self._thread.start()
+
+	def _next_batch(self) -> List[_Item]:
+		with self._cond:
+			while not self._pending:
+				self._cond.wait()
+			deadline = self._pending[0].enqueued + self.max_wait
+			while len(self._pending) < self.max_batch_size:
+				remaining = deadline - time.monotonic()
+				if remaining <= 0:
+					break
+				self._cond.wait(remaining)
+			n = min(self.max_batch_size, len(self._pending))
+			return [self._pending.popleft() for _ in range(n)]
+
+	def _loop(self):
+		while True:
+			batch = self._next_batch()
+			self._flush(batch)
+
+	def _flush(self, batch: List[_Item]):
+		start = time.monotonic()
+		for it in batch:
+			INFER_QUEUE_WAIT.observe(start - it.enqueued)
+		INFER_BATCH_FILL.observe(len(batch) / self.max_batch_size)
+		try:
+			preds = self._model_provider().predict_batch([it.text for it in batch])
+		except Exception as e:
+			for it in batch:
+				if not it.request.future.done():
+					it.request.future.set_exception(e)
+			return
+		finally:
+			INFER_BATCH_LATENCY.observe(time.monotonic() - start)
+		for it, p in zip(batch, preds):
+			req = it.request
+			if req.future.done():
+				continue
+			req.results[it.index] = p
+			req.remaining -= 1
+			if req.remaining == 0:
+				req.future.set_result(req.results)
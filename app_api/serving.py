@@ -3,29 +3,88 @@ from __future__ import annotations
 from typing import Dict, Any, List
 import json
 import os
+import time
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
+from utils.docmodel import ColumnarDocument
 from utils.preprocess import preprocess_file
-from utils.segmenter import segment_document
-from utils.features import extract_features_for_clause
-from ml.infer import RiskClassifier
-from app_api.metrics import MODEL_LABEL_DIST, MODEL_CONFIDENCE, JOB_DURATION
+from utils.pipeline import analysis_from_dict, analysis_to_dict, iter_analyzed_pages, page_fingerprint
+from utils.pools import per_job_workers, process_context
+from app_api.metrics import MODEL_LABEL_DIST, MODEL_CONFIDENCE, JOB_DURATION, OCR_CACHE_HITS, OCR_CACHE_MISSES
+from utils.ocr_cache import page_stats
 from utils.drift import detect_drift
-from app_api.auth import enforce_doc_access, require_auth
+from app_api.auth import enforce_doc_access, require_auth, doc_workspace
+from app_api.registry import MODELS, artifact_fingerprint
+from app_api.result_cache import cache_get, cache_put, config_hash, upload_sha256
+from app_api.scheduler import InferenceScheduler
+from ml.clause_cache import ClauseCache, merge_stats
+from app_api.jobstore import JOB_STORE, TERMINAL_STATUSES
+from app_api.storage_crypto import open_plaintext
 
 router = APIRouter()
 
 ARTIFACT_DIR = Path("artifacts/model_roberta")
 MODEL_VERSION = os.environ.get("MODEL_VERSION", "roberta-base@local")
+MODEL_BACKEND = os.environ.get("MODEL_BACKEND", "torch")  # torch | onnx | onnx-int8
+# inline: run in this process's EXECUTOR; worker: enqueue for app_api/worker.py
+PIPELINE_EXECUTION = os.environ.get("PIPELINE_EXECUTION", "inline")
+FLAG_THRESHOLD = 0.5
+HIGH_THRESHOLD = 0.75
 
-# Simple in-memory job store (MVP); replace with Redis/DB in production
-JOBS: Dict[str, Dict[str, Any]] = {}
 EXECUTOR = ThreadPoolExecutor(max_workers=2)
+# Per-page segmentation/featurization; 0 keeps it in the job thread
+PAGE_WORKERS = per_job_workers("PAGE_WORKERS")
+PAGE_PARALLEL_MIN_PAGES = int(os.environ.get("PAGE_PARALLEL_MIN_PAGES", "4"))
+# Hands each page's clauses to the cache/scheduler while later pages are still segmented
+INFER_DISPATCH = ThreadPoolExecutor(max_workers=4)
+_PAGE_POOL: ProcessPoolExecutor | None = None
+STREAM_POLL_SECONDS = float(os.environ.get("STREAM_POLL_SECONDS", "0.5"))
+STREAM_MAX_SECONDS = float(os.environ.get("STREAM_MAX_SECONDS", "3600"))
+STREAM_PAGE_SIZE = 200
+
+
+def _current_model():
+	return MODELS.get(str(ARTIFACT_DIR), MODEL_VERSION, MODEL_BACKEND)
+
+
+# One scheduler per process so concurrent jobs share forward passes
+SCHEDULER = InferenceScheduler(_current_model)
+CLAUSE_CACHE = ClauseCache()
+
+
+def _page_executor(page_count: int):
+	global _PAGE_POOL
+	if PAGE_WORKERS <= 1 or page_count < PAGE_PARALLEL_MIN_PAGES:
+		return None
+	if _PAGE_POOL is None:
+		_PAGE_POOL = ProcessPoolExecutor(max_workers=PAGE_WORKERS, mp_context=process_context())
+	return _PAGE_POOL
+
+
+def warm_page_pool() -> None:
+	"""Start the page pool's processes (and their spaCy import) before the first job."""
+	if PIPELINE_EXECUTION == "worker":
+		return
+	pool = _page_executor(PAGE_PARALLEL_MIN_PAGES)
+	if pool is not None:
+		# Children are started on demand; one trivial task per worker starts them all
+		list(pool.map(page_fingerprint, [{"blocks": []}] * PAGE_WORKERS))
+
+
+def pipeline_config() -> Dict[str, Any]:
+	# Everything besides the document bytes and MODEL_VERSION that changes the output
+	return {
+		"backend": MODEL_BACKEND,
+		"artifact": artifact_fingerprint(str(ARTIFACT_DIR)),
+		"flag_threshold": FLAG_THRESHOLD,
+		"high_threshold": HIGH_THRESHOLD,
+	}
 
 
 class AnalyzeResponse(BaseModel):
@@ -34,54 +93,136 @@ class AnalyzeResponse(BaseModel):
 	model_version: str
 
 
-def _run_pipeline(job_id: str, file_bytes: bytes, filename: str) -> Dict[str, Any]:
-	start = datetime.utcnow()
-	JOBS[job_id]["status"] = "preprocessing"
-	pre = preprocess_file(file_bytes, filename)
+def _clause_result(c: Dict[str, Any], preds: List[Dict[str, Any]], reused: bool = False) -> Dict[str, Any]:
+	for p in preds:
+		MODEL_LABEL_DIST.labels(label=p["label"]).inc()
+		MODEL_CONFIDENCE.observe(p["score"])
+	top = [p for p in preds if p["score"] >= FLAG_THRESHOLD]
+	return {
+		"clause_id": c.get("clause_id"),
+		"page": c.get("page"),
+		"text": c.get("original_text", c.get("text")),
+		"start_char": c.get("start_char"),
+		"end_char": c.get("end_char"),
+		# One box per line on text-layer pages (utils.docmodel.ColumnarPage.span_boxes)
+		"bounding_boxes": c.get("bounding_boxes") or [],
+		"predictions": top,
+		"severity_score": max((p["score"] for p in top), default=0.0),
+		"severity": ("High" if any(p["score"] >= HIGH_THRESHOLD for p in top) else ("Medium" if any(p["score"] >= FLAG_THRESHOLD for p in top) else "Low")),
+		"explanation": "Heuristic features: modals={}; negation={}".format(
+			c["features"].get("has_modals"), c["features"].get("has_negation")
+		),
+		"important_tokens": [],
+		"reused": reused,
+	}
+
+
+def _score_page(job_id: str, start_seq: int, page_clauses: List[Dict[str, Any]], model_tag: str, prior_preds=None):
+	"""Score one page's clauses; ``prior_preds`` (same model, unchanged page) skips inference."""
+	if prior_preds is not None:
+		preds, stats = prior_preds, merge_stats([])
+		rows = [_clause_result(c, p, reused=True) for c, p in zip(page_clauses, preds)]
+	else:
+		texts = [c["normalized_text"] for c in page_clauses]
+		# multi-label probs in input order; repeated boilerplate is served from the clause cache
+		preds, stats = CLAUSE_CACHE.predict(texts, model_tag, SCHEDULER.predict)
+		rows = [_clause_result(c, p) for c, p in zip(page_clauses, preds)]
+	# Visible to /api/stream as soon as the page is scored
+	JOB_STORE.append_clauses(job_id, start_seq, rows)
+	return rows, stats, preds
 
-	JOBS[job_id]["status"] = "segmenting"
-	clauses = segment_document(job_id, pre)
 
-	JOBS[job_id]["status"] = "featurizing"
-	aug = [extract_features_for_clause(c) for c in clauses]
+def _base_pages(base_job_id: str | None):
+	"""Prior version's page records keyed by fingerprint, and its OCR'd pages by source_fp."""
+	if not base_job_id:
+		return {}, {}
+	records = JOB_STORE.pages(base_job_id)
+	by_fp = {r["fingerprint"]: r for r in records}
+	ocr = {r["source_fp"]: ColumnarDocument.from_bytes(r["page"]).pages[0] for r in records if r["page"] and r["source_fp"]}
+	return by_fp, ocr
 
-	JOBS[job_id]["status"] = "loading_model"
-	model = RiskClassifier(str(ARTIFACT_DIR))
 
-	JOBS[job_id]["status"] = "inference"
+def _run_pipeline(job_id: str, source, filename: str, base_job_id: str | None = None) -> Dict[str, Any]:
+	"""Analyze one document given as bytes or a local plaintext path.
+
+	With ``base_job_id`` (a completed analysis of an earlier version) pages whose text
+	and layout are unchanged reuse that job's OCR, segmentation, features and, for the
+	same model, predictions; only the changed pages are recomputed.
+	"""
+	start = datetime.utcnow()
+	base_by_fp, base_ocr = _base_pages(base_job_id)
+	JOB_STORE.set_status(job_id, "preprocessing")
+	pre = preprocess_file(source, filename, reuse=base_ocr or None)
+	# OCR runs in pool processes; count its cache use here where the metrics live
+	ocr_stats = page_stats(pre.get("pages", []))
+	OCR_CACHE_HITS.inc(ocr_stats["hits"])
+	OCR_CACHE_MISSES.inc(ocr_stats["misses"])
+
+	JOB_STORE.set_status(job_id, "loading_model")
+	# Warm the registry so load time is not counted as queue wait
+	model_tag = MODELS.acquire(str(ARTIFACT_DIR), MODEL_VERSION, MODEL_BACKEND).tag
+
+	# Pages are segmented and featurized in parallel; each page is scored as soon as
+	# it is stitched, overlapping inference with the remaining pages
+	JOB_STORE.set_status(job_id, "segmenting")
+	pages = pre.get("pages", [])
+	fingerprints = [page_fingerprint(p) for p in pages]
+	prior = [base_by_fp.get(fp) for fp in fingerprints]
+	reuse = {i: analysis_from_dict(r["analysis"], int(pages[i].get("page_number", i + 1))) for i, r in enumerate(prior) if r}
+	aug = []
+	pending = []
+	analyses = []
+	for i, (seg, feats, page_clauses) in enumerate(iter_analyzed_pages(pages, _page_executor(len(pages) - len(reuse)), reuse)):
+		prior_preds = prior[i]["analysis"]["preds"] if prior[i] and prior[i]["analysis"]["model_tag"] == model_tag else None
+		pending.append(INFER_DISPATCH.submit(_score_page, job_id, len(aug), page_clauses, model_tag, prior_preds))
+		analyses.append(analysis_to_dict(seg, feats))
+		aug.extend(page_clauses)
+
+	JOB_STORE.set_status(job_id, "inference")
 	results = []
-	texts_for_drift = []
-	for c in aug:
-		preds = model.predict_clause(c["normalized_text"])  # multi-label probs
-		texts_for_drift.append(c["normalized_text"])
-		for p in preds:
-			MODEL_LABEL_DIST.labels(label=p["label"]).inc()
-			MODEL_CONFIDENCE.observe(p["score"])
-		top = [p for p in preds if p["score"] >= 0.5]
-		results.append({
-			"clause_id": c.get("clause_id"),
-			"page": c.get("page"),
-			"text": c.get("original_text", c.get("text")),
-			"predictions": top,
-			"severity_score": max((p["score"] for p in top), default=0.0),
-			"severity": ("High" if any(p["score"] >= 0.75 for p in top) else ("Medium" if any(p["score"] >= 0.5 for p in top) else "Low")),
-			"explanation": "Heuristic features: modals={}; negation={}".format(
-				c["features"].get("has_modals"), c["features"].get("has_negation")
-			),
-			"important_tokens": [],
+	score_stats = []
+	page_records = []
+	for i, fut in enumerate(pending):
+		rows, stats, preds = fut.result()
+		results.extend(rows)
+		score_stats.append(stats)
+		page = pages[i]
+		source_fp = page.get("source_fp")
+		page_records.append({
+			"page_number": int(page.get("page_number", i + 1)),
+			"fingerprint": fingerprints[i],
+			"source_fp": source_fp,
+			# OCR output is kept so the next version can skip OCR on this page; pages with
+			# a word index are kept so /api/explain can place tokens on the page
+			"page": ColumnarDocument(pre.get("type"), [page]).to_bytes() if source_fp or getattr(page, "words", None) is not None else None,
+			"analysis": {**analyses[i], "model_tag": model_tag, "preds": preds},
 		})
+	cache_stats = merge_stats(score_stats)
+	texts_for_drift = [c["normalized_text"] for c in aug]
 
-	JOBS[job_id]["status"] = "drift_check"
+	JOB_STORE.set_status(job_id, "drift_check")
 	drift = detect_drift(texts_for_drift)
 
-	JOBS[job_id]["status"] = "packaging"
+	JOB_STORE.set_status(job_id, "packaging")
+	JOB_STORE.save_pages(job_id, page_records)
 	flagged = sum(1 for r in results if r["predictions"])
 	summary = {
 		"total_clauses": len(results),
 		"flagged": flagged,
 		"by_category": {},
 		"drift": drift,
+		"clause_cache": cache_stats,
 	}
+	if base_job_id:
+		reused = sum(1 for r in results if r["reused"])
+		summary["incremental"] = {
+			"base_job_id": base_job_id,
+			"pages_reused": len(reuse),
+			"pages_recomputed": len(pages) - len(reuse),
+			"ocr_pages_reused": sum(1 for p in pages if p.get("ocr_reused")),
+			"clauses_reused": reused,
+			"clauses_recomputed": len(results) - reused,
+		}
 
 	out = {
 		"job_id": job_id,
@@ -95,46 +236,186 @@ def _run_pipeline(job_id: str, file_bytes: bytes, filename: str) -> Dict[str, An
 	return out
 
 
+def _execute_job(job_id: str, enc_path: Path, filename: str, cache_key=None, base_job_id: str | None = None, worker_id: str | None = None):
+	from app_api.main import FERNET, STORAGE_KEY
+	try:
+		# Decrypted only into a private temp file for the duration of the job
+		with open_plaintext(enc_path, STORAGE_KEY, FERNET, suffix=Path(filename).suffix) as plain_path:
+			out = _run_pipeline(job_id, plain_path, filename, base_job_id)
+	except Exception as e:
+		JOB_STORE.fail(job_id, str(e), worker_id)
+		return
+	if not JOB_STORE.complete(job_id, out, worker_id):
+		return
+	if cache_key:
+		cache_put(*cache_key, out)
+
+
 @router.post("/api/analyze/{job_id}", response_model=AnalyzeResponse)
-def analyze(job_id: str, payload = Depends(require_auth)):
+def analyze(job_id: str, base_job_id: str | None = None, payload = Depends(require_auth)):
+	"""Start analysis; ``base_job_id`` names a completed job on an earlier version of the
+	same contract whose unchanged pages are reused instead of recomputed."""
 	enforce_doc_access(job_id, payload)
-	from app_api.main import STORAGE_DIR, FERNET
+	from app_api.main import STORAGE_DIR
 	enc_path = STORAGE_DIR / f"{job_id}.bin"
 	if not enc_path.exists():
 		raise HTTPException(404, detail="Job not found or file missing")
-	file_bytes = FERNET.decrypt(enc_path.read_bytes())
 	filename = f"{job_id}.pdf"
+	if base_job_id:
+		enforce_doc_access(base_job_id, payload)
+		base = JOB_STORE.get(base_job_id)
+		if not base:
+			raise HTTPException(404, detail="Base job not found")
+		if base["status"] != "completed":
+			raise HTTPException(409, detail="Base job not completed")
+		if not JOB_STORE.page_count(base_job_id):
+			# e.g. purged page records; reusing nothing would silently recompute everything
+			raise HTTPException(409, detail="Base job has no page records to reuse")
+
+	# Identical bytes already analyzed in this workspace with the same model/config
+	sha256, workspace_id = upload_sha256(job_id), doc_workspace(job_id)
+	cache_key = (sha256, MODEL_VERSION, config_hash(pipeline_config()), workspace_id) if sha256 and workspace_id else None
+	cached = cache_get(*cache_key) if cache_key else None
+	if cached is not None:
+		source_job_id = cached.pop("source_job_id", None)
+		JOB_STORE.create(job_id, meta={"filename": filename, "cache_hit": True, "source_job_id": source_job_id})
+		if source_job_id:
+			# Same bytes, model and config: the source's page records apply to this job as is
+			JOB_STORE.save_pages(job_id, JOB_STORE.pages(source_job_id))
+		JOB_STORE.append_clauses(job_id, 0, cached.get("clauses", []))
+		# Reuse stats describe the source run, not this one
+		summary = {k: v for k, v in cached.get("summary", {}).items() if k != "incremental"}
+		JOB_STORE.complete(job_id, {
+			**cached,
+			"summary": summary,
+			"job_id": job_id,
+			"document_name": filename,
+			"created_at": datetime.utcnow().isoformat() + "Z",
+			"cache_hit": True,
+		})
+		return AnalyzeResponse(job_id=job_id, status="completed", model_version=MODEL_VERSION)
 
-	JOBS[job_id] = {"status": "queued"}
-	future = EXECUTOR.submit(_run_pipeline, job_id, file_bytes, filename)
-	JOBS[job_id]["future"] = future
+	if PIPELINE_EXECUTION == "worker":
+		JOB_STORE.enqueue(job_id, meta={"filename": filename, "cache_key": list(cache_key) if cache_key else None, "base_job_id": base_job_id})
+		return AnalyzeResponse(job_id=job_id, status="queued", model_version=MODEL_VERSION)
+
+	JOB_STORE.create(job_id, meta={"filename": filename, "base_job_id": base_job_id})
+	EXECUTOR.submit(_execute_job, job_id, enc_path, filename, cache_key, base_job_id)
 	return AnalyzeResponse(job_id=job_id, status="queued", model_version=MODEL_VERSION)
 
 
 @router.get("/api/status/{job_id}")
 def status(job_id: str, payload = Depends(require_auth)):
 	enforce_doc_access(job_id, payload)
-	state = JOBS.get(job_id)
+	state = JOB_STORE.get(job_id)
 	if not state:
 		return {"job_id": job_id, "status": "unknown"}
-	st = state.get("status", "queued")
-	done = state.get("future").done() if state.get("future") else False
-	return {"job_id": job_id, "status": ("completed" if done and st == "packaging" else st)}
+	return {
+		"job_id": job_id,
+		"status": state["status"],
+		"error": state["error"],
+		"duration_s": state["duration_s"],
+		"stages": JOB_STORE.events(job_id),
+	}
 
 
 @router.get("/api/results/{job_id}")
 def results(job_id: str, payload = Depends(require_auth)):
 	enforce_doc_access(job_id, payload)
-	state = JOBS.get(job_id)
+	state = JOB_STORE.get(job_id)
 	if not state:
 		raise HTTPException(404, detail="Job not found")
-	fut = state.get("future")
-	if not fut:
-		raise HTTPException(400, detail="Job not started")
-	if not fut.done():
+	if state["status"] == "failed":
+		raise HTTPException(500, detail=state["error"])
+	if state["status"] != "completed":
 		raise HTTPException(202, detail="Job not completed")
-	try:
-		out = fut.result()
-		return out
-	except Exception as e:
-		raise HTTPException(500, detail=str(e))
+	return JOB_STORE.get_result(job_id)
+
+
+def _page_record(job_id: str, page_number: int):
+	for r in JOB_STORE.pages(job_id):
+		if r["page_number"] == page_number and r["page"]:
+			return ColumnarDocument.from_bytes(r["page"]).pages[0]
+	return None
+
+
+@router.get("/api/explain/{job_id}/{clause_id}")
+def explain(job_id: str, clause_id: str, method: str = "ig", payload = Depends(require_auth)):
+	"""Token importances for one result clause, each token placed on its word's box."""
+	enforce_doc_access(job_id, payload)
+	state = JOB_STORE.get(job_id)
+	if not state or state["status"] != "completed":
+		raise HTTPException(404, detail="Job not found or not completed")
+	row = next((r for r in JOB_STORE.get_result(job_id)["clauses"] if r["clause_id"] == clause_id), None)
+	if row is None:
+		raise HTTPException(404, detail="Clause not found")
+	from ml.explain import explain_clause
+	page = _page_record(job_id, int(row["page"]))
+	start = row.get("start_char") or 0
+	if page is not None:
+		# The row text is the stripped clause; locate it so token offsets line up with the page
+		found = page.text.find(row["text"], start)
+		start = found if found >= 0 else start
+	words = page.words if page is not None else None
+	return explain_clause(str(ARTIFACT_DIR), row["text"], row.get("bounding_boxes") or [], start, words, method)
+
+
+def _stream_frame(event: str, data: Dict[str, Any], seq: int | None, sse: bool) -> str:
+	body = json.dumps(data, ensure_ascii=False)
+	if not sse:
+		return json.dumps({"event": event, "seq": seq, "data": data}, ensure_ascii=False) + "\n"
+	head = f"id: {seq}\n" if seq is not None else ""
+	return f"{head}event: {event}\ndata: {body}\n\n"
+
+
+def _stream_events(job_id: str, after: int, sse: bool):
+	"""Yield stage events and clause rows (``seq > after``) until the job finishes."""
+	sent_events = 0
+	deadline = time.monotonic() + STREAM_MAX_SECONDS
+	while True:
+		# Read the state first: once it is terminal every clause row has been written
+		state = JOB_STORE.get(job_id)
+		events = JOB_STORE.events(job_id)
+		for ev in events[sent_events:]:
+			yield _stream_frame("stage", {"status": ev["status"], "at": ev["at"]}, None, sse)
+		sent_events = len(events)
+		while True:
+			rows = JOB_STORE.clauses(job_id, after, STREAM_PAGE_SIZE)
+			sent = 0
+			for seq, row in rows:
+				# Pages are scored concurrently; only emit the contiguous prefix
+				if seq != after + 1:
+					break
+				yield _stream_frame("clause", row, seq, sse)
+				after = seq
+				sent += 1
+			if sent < STREAM_PAGE_SIZE:
+				break
+		if state is None or state["status"] in TERMINAL_STATUSES:
+			done = {"status": state["status"] if state else "unknown", "error": state["error"] if state else None, "clauses": after + 1}
+			yield _stream_frame("done", done, None, sse)
+			return
+		if time.monotonic() > deadline:
+			yield _stream_frame("timeout", {"status": state["status"], "clauses": after + 1}, None, sse)
+			return
+		time.sleep(STREAM_POLL_SECONDS)
+
+
+@router.get("/api/stream/{job_id}")
+def stream(job_id: str, request: Request, after: int = -1, format: str | None = None, payload = Depends(require_auth)):
+	"""Stream clause results as NDJSON (default) or Server-Sent Events.
+
+	Resume with ``?after=<seq>`` or the SSE ``Last-Event-ID`` header.
+	"""
+	enforce_doc_access(job_id, payload)
+	if not JOB_STORE.get(job_id):
+		raise HTTPException(404, detail="Job not found")
+	last_event_id = request.headers.get("last-event-id", "")
+	if last_event_id.isdigit():
+		after = max(after, int(last_event_id))
+	sse = format == "sse" or (format is None and "text/event-stream" in request.headers.get("accept", ""))
+	return StreamingResponse(
+		_stream_events(job_id, after, sse),
+		media_type="text/event-stream" if sse else "application/x-ndjson",
+		headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+	)
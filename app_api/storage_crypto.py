@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+from typing import BinaryIO, Iterator, Optional
+from contextlib import contextmanager
+import base64
+import io
+import os
+import shutil
+import struct
+import tempfile
+from pathlib import Path
+
+from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+# Chunked AES-256-GCM container for uploads at rest:
+#   header = MAGIC | chunk_size (u32) | nonce prefix (8 random bytes)
+#   chunk  = ciphertext length (u32) | AES-GCM(ciphertext + tag)
+# Each chunk's nonce is the prefix plus its counter, and its AAD binds the header,
+# the counter and a final-chunk flag, so chunks cannot be reordered, dropped or the
+# file truncated without failing authentication. Files without MAGIC are legacy
+# single-token Fernet blobs.
+MAGIC = b"CENC1\x00"
+HEADER = struct.Struct(">I8s")
+LENGTH = struct.Struct(">I")
+CHUNK_SIZE = int(os.environ.get("ENCRYPTION_CHUNK_SIZE", str(1024 * 1024)))
+TAG_BYTES = 16
+# Where decrypted working copies are written; defaults to the system temp dir
+PLAINTEXT_TMP_DIR = os.environ.get("PLAINTEXT_TMP_DIR") or None
+
+
+def derive_key(fernet_key: bytes) -> bytes:
+	"""AES-256 key for the chunked format, derived from the existing Fernet key."""
+	return HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=b"upload-chunked-aesgcm-v1").derive(
+		base64.urlsafe_b64decode(fernet_key)
+	)
+
+
+def _aad(header: bytes, counter: int, final: bool) -> bytes:
+	return header + struct.pack(">I?", counter, final)
+
+
+class EncryptingWriter:
+	"""Write plaintext incrementally; ciphertext goes to ``path`` via an atomic rename on close."""
+
+	def __init__(self, path: Path, key: bytes, chunk_size: int = CHUNK_SIZE):
+		self.path = Path(path)
+		self._aead = AESGCM(key)
+		self._chunk_size = chunk_size
+		self._prefix = os.urandom(8)
+		self._header = MAGIC + HEADER.pack(chunk_size, self._prefix)
+		self._tmp = self.path.with_name(self.path.name + ".part")
+		self._out: BinaryIO = open(self._tmp, "wb")
+		self._out.write(self._header)
+		self._buf = bytearray()
+		self._counter = 0
+		self.plaintext_bytes = 0
+
+	def write(self, data: bytes) -> int:
+		self._buf += data
+		self.plaintext_bytes += len(data)
+		# Keep the last chunk back so close() can mark it final
+		while len(self._buf) > self._chunk_size:
+			self._emit(bytes(self._buf[:self._chunk_size]), final=False)
+			del self._buf[:self._chunk_size]
+		return len(data)
+
+	def _emit(self, plain: bytes, final: bool):
+		nonce = self._prefix + struct.pack(">I", self._counter)
+		sealed = self._aead.encrypt(nonce, plain, _aad(self._header, self._counter, final))
+		self._out.write(LENGTH.pack(len(sealed)))
+		self._out.write(sealed)
+		self._counter += 1
+
+	def close(self) -> Path:
+		if self._out.closed:
+			return self.path
+		self._emit(bytes(self._buf), final=True)
+		self._buf.clear()
+		self._out.close()
+		os.replace(self._tmp, self.path)
+		return self.path
+
+	def abort(self):
+		if not self._out.closed:
+			self._out.close()
+		self._tmp.unlink(missing_ok=True)
+
+	def __enter__(self) -> "EncryptingWriter":
+		return self
+
+	def __exit__(self, exc_type, exc, tb):
+		if exc_type is None:
+			self.close()
+		else:
+			self.abort()
+
+
+def iter_decrypt(path: Path, key: bytes, fernet: Optional[Fernet] = None) -> Iterator[bytes]:
+	"""Yield plaintext chunks of an encrypted upload; legacy Fernet files need ``fernet``."""
+	with open(path, "rb") as f:
+		if f.read(len(MAGIC)) != MAGIC:
+			if fernet is None:
+				raise InvalidToken
+			f.seek(0)
+			yield fernet.decrypt(f.read())
+			return
+		raw = f.read(HEADER.size)
+		chunk_size, prefix = HEADER.unpack(raw)
+		header = MAGIC + raw
+		aead = AESGCM(key)
+		counter = 0
+		while True:
+			head = f.read(LENGTH.size)
+			if len(head) != LENGTH.size:
+				# Ran out before a chunk marked final: truncated
+				raise InvalidToken
+			(n,) = LENGTH.unpack(head)
+			if n > chunk_size + TAG_BYTES:
+				raise InvalidToken
+			sealed = f.read(n)
+			nonce = prefix + struct.pack(">I", counter)
+			final = not f.peek(1)
+			try:
+				plain = aead.decrypt(nonce, sealed, _aad(header, counter, final))
+			except Exception:
+				raise InvalidToken
+			yield plain
+			if final:
+				return
+			counter += 1
+
+
+class DecryptingReader(io.RawIOBase):
+	"""File-like plaintext view for consumers that read a stream (e.g. the AV scanner)."""
+
+	def __init__(self, path: Path, key: bytes, fernet: Optional[Fernet] = None):
+		self._chunks = iter_decrypt(path, key, fernet)
+		self._buf = b""
+
+	def readable(self) -> bool:
+		return True
+
+	def readinto(self, b) -> int:
+		while not self._buf:
+			try:
+				self._buf = next(self._chunks)
+			except StopIteration:
+				return 0
+		n = min(len(b), len(self._buf))
+		b[:n] = self._buf[:n]
+		self._buf = self._buf[n:]
+		return n
+
+
+@contextmanager
+def open_plaintext(path: Path, key: bytes, fernet: Optional[Fernet] = None, suffix: str = "") -> Iterator[Path]:
+	"""Decrypt into a private (0700 dir, 0600 file) temp file, removed on exit."""
+	tmpdir = tempfile.mkdtemp(prefix="plain-", dir=PLAINTEXT_TMP_DIR)
+	try:
+		out = Path(tmpdir) / f"document{suffix}"
+		fd = os.open(out, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+		with os.fdopen(fd, "wb") as f:
+			for chunk in iter_decrypt(path, key, fernet):
+				f.write(chunk)
+		yield out
+	finally:
+		shutil.rmtree(tmpdir, ignore_errors=True)
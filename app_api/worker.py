@@ -1,14 +1,136 @@
 from __future__ import annotations
 
+from typing import Any, Callable, Dict, Optional
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import os
+import socket
 import time
-from app_api.serving import JOBS
+
+from app_api.jobstore import JOB_STORE, JobStore
+from app_api.metrics import QUEUE_DEPTH
+from utils.pools import available_cpus, process_context
+
+WORKER_ID = os.environ.get("WORKER_ID") or f"{socket.gethostname()}:{os.getpid()}"
+WORKER_CONCURRENCY = int(os.environ.get("WORKER_CONCURRENCY") or available_cpus())
+WORKER_LEASE_SECONDS = float(os.environ.get("WORKER_LEASE_SECONDS", "60"))
+WORKER_POLL_SECONDS = float(os.environ.get("WORKER_POLL_SECONDS", "1"))
+WORKER_MAX_BACKOFF_SECONDS = float(os.environ.get("WORKER_MAX_BACKOFF_SECONDS", "30"))
+WORKER_MAX_ATTEMPTS = int(os.environ.get("WORKER_MAX_ATTEMPTS", "3"))
+WORKER_METRICS_PORT = int(os.environ.get("WORKER_METRICS_PORT", "0"))
+
+
+def run_job(job_id: str, meta: Dict[str, Any], worker_id: Optional[str] = None) -> None:
+	"""Executed inside a pool process; results and failures are written to the job store
+	unless ``worker_id``'s lease on the job has meanwhile passed to another worker."""
+	from app_api.main import STORAGE_DIR
+	from app_api.serving import _execute_job
+	enc_path = STORAGE_DIR / f"{job_id}.bin"
+	if not enc_path.exists():
+		JOB_STORE.fail(job_id, "Uploaded file missing", worker_id)
+		return
+	cache_key = tuple(meta["cache_key"]) if meta.get("cache_key") else None
+	_execute_job(job_id, enc_path, meta.get("filename") or f"{job_id}.pdf", cache_key, meta.get("base_job_id"), worker_id)
+
+
+class Worker:
+	"""Claims jobs from the persistent queue and runs them in a process pool.
+
+	The polling loop heartbeats every lease it holds, so a crashed worker's jobs
+	become claimable again once ``lease_seconds`` pass without a heartbeat.
+	"""
+
+	def __init__(
+		self,
+		store: JobStore = JOB_STORE,
+		worker_id: str = WORKER_ID,
+		concurrency: int = WORKER_CONCURRENCY,
+		lease_seconds: float = WORKER_LEASE_SECONDS,
+		max_attempts: int = WORKER_MAX_ATTEMPTS,
+		executor_factory: Callable[[int], Executor] = lambda n: ProcessPoolExecutor(max_workers=n, mp_context=process_context()),
+		runner: Callable[[str, Dict[str, Any], str], None] = run_job,
+	):
+		self.store = store
+		self.worker_id = worker_id
+		self.concurrency = max(1, concurrency)
+		self.lease_seconds = lease_seconds
+		self.max_attempts = max_attempts
+		self._executor_factory = executor_factory
+		self._runner = runner
+		self._executor = executor_factory(self.concurrency)
+		self.running: Dict[str, Future] = {}
+		self._backoff = 0.0
+
+	def tick(self) -> int:
+		"""One scheduling round; returns the number of jobs still running."""
+		self.store.requeue_expired(self.max_attempts)
+		broken = False
+		for job_id, fut in list(self.running.items()):
+			if not fut.done():
+				self.store.heartbeat(job_id, self.worker_id, self.lease_seconds)
+				continue
+			del self.running[job_id]
+			exc = fut.exception()
+			if isinstance(exc, BrokenProcessPool):
+				# Pool process died (e.g. OOM); retry the job unless it has used all its attempts
+				broken = True
+				self.store.release(job_id, self.worker_id, self.max_attempts)
+			elif exc is not None:
+				self.store.fail(job_id, str(exc), self.worker_id)
+		if broken:
+			self._rebuild_executor()
+		while len(self.running) < self.concurrency:
+			job = self.store.claim(self.worker_id, self.lease_seconds, max_attempts=self.max_attempts)
+			if not job:
+				break
+			try:
+				self.running[job["job_id"]] = self._executor.submit(self._runner, job["job_id"], job["meta"], self.worker_id)
+			except BrokenProcessPool:
+				# The pool broke between rounds; hand the job back and retry on a fresh pool
+				self.store.release(job["job_id"], self.worker_id)
+				self._rebuild_executor()
+				break
+		QUEUE_DEPTH.set(self.store.queue_depth())
+		return len(self.running)
+
+	def poll(self, poll_seconds: float = WORKER_POLL_SECONDS, max_backoff: float = WORKER_MAX_BACKOFF_SECONDS) -> float:
+		"""Run one tick and return how long to sleep before the next.
+
+		A failing tick (e.g. SQLite "database is locked" under write contention) is
+		logged and retried with exponential backoff instead of ending the worker.
+		"""
+		try:
+			self.tick()
+		except Exception as exc:
+			self._backoff = min(max_backoff, max(poll_seconds, 2 * self._backoff))
+			print(f"Worker {self.worker_id} tick failed: {exc!r}; retrying in {self._backoff:.1f}s", flush=True)
+			return self._backoff
+		self._backoff = 0.0
+		return poll_seconds
+
+	def _rebuild_executor(self):
+		self._executor.shutdown(wait=False, cancel_futures=True)
+		self._executor = self._executor_factory(self.concurrency)
+
+	def shutdown(self):
+		for job_id in list(self.running):
+			self.store.release(job_id, self.worker_id)
+		self._executor.shutdown(wait=False, cancel_futures=True)
 
 
 def main():
-	print("Worker placeholder started. Polling for jobs...")
-	while True:
-		# In real deployment, use Celery/RQ. Here just idle.
-		time.sleep(5)
+	if WORKER_METRICS_PORT:
+		from prometheus_client import start_http_server
+		start_http_server(WORKER_METRICS_PORT)
+	# Job processes size their page/OCR pools from this, so export the effective value
+	os.environ["WORKER_CONCURRENCY"] = str(WORKER_CONCURRENCY)
+	worker = Worker()
+	print(f"Worker {WORKER_ID} started with {worker.concurrency} processes. Polling for jobs...")
+	try:
+		while True:
+			time.sleep(worker.poll())
+	finally:
+		worker.shutdown()
 
 
 if __name__ == '__main__':
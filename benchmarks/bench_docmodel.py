@@ -0,0 +1,66 @@
+"""
+Usage:
+  python -m benchmarks.bench_docmodel [--pages 300] [--words 400]
+
+Builds OCR-shaped preprocess output (one block per word) and reports the Python heap
+it takes as nested dicts versus utils.docmodel.ColumnarDocument, plus the size of
+the binary encoding and the JSON it replaces.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import random
+import tracemalloc
+
+from utils.docmodel import ColumnarDocument, ColumnarPage
+
+WORDS = "the supplier shall indemnify customer against all losses arising from breach payment due within thirty days".split()
+
+
+def make_pages(pages: int, words: int, seed: int = 7):
+	rnd = random.Random(seed)
+	out = []
+	for n in range(1, pages + 1):
+		blocks, pos = [], 0
+		for i in range(words):
+			w = rnd.choice(WORDS)
+			blocks.append({
+				"text": w,
+				"bbox": {"x": 100 + (i % 12) * 150, "y": 200 + (i // 12) * 60, "w": 20 * len(w), "h": 40},
+				"char_start": pos,
+				"char_end": pos + len(w),
+				"ocr_conf": float(rnd.randint(60, 99)),
+			})
+			pos += len(w) + 1
+		out.append({"page_number": n, "blocks": blocks, "ocr_avg_conf": 80.0, "needs_review": False})
+	return out
+
+
+def heap(build):
+	gc.collect()
+	tracemalloc.start()
+	obj = build()
+	size, _ = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	return obj, size
+
+
+def main():
+	ap = argparse.ArgumentParser()
+	ap.add_argument("--pages", type=int, default=300)
+	ap.add_argument("--words", type=int, default=400)
+	args = ap.parse_args()
+
+	legacy, legacy_bytes = heap(lambda: make_pages(args.pages, args.words))
+	columnar, columnar_bytes = heap(lambda: ColumnarDocument("pdf_scanned", [ColumnarPage.from_dict(p) for p in legacy]))
+	blob = columnar.to_bytes()
+	print(f"pages={args.pages} words/page={args.words}")
+	print(f"dict heap      {legacy_bytes / 2**20:8.1f} MB")
+	print(f"columnar heap  {columnar_bytes / 2**20:8.1f} MB")
+	print(f"binary         {len(blob) / 2**20:8.1f} MB   json {len(json.dumps(legacy)) / 2**20:.1f} MB")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,74 @@
+"""
+Usage:
+  python -m benchmarks.bench_docx [--paragraphs 20000] [--rows 2000]
+
+Generates a large .docx (numbered clauses plus a pricing table) and compares the
+python-docx object model against utils.docx_stream: wall time and peak traced heap
+(lxml keeps its tree in C memory, so the python-docx figure is a lower bound).
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import io
+import time
+import tracemalloc
+
+from docx import Document
+
+from utils.docx_stream import iter_docx_blocks
+
+SENTENCE = "The Supplier shall indemnify the Customer against all losses arising from any breach of this Agreement."
+
+
+def make_docx(paragraphs: int, rows: int) -> bytes:
+	doc = Document()
+	doc.sections[0].header.paragraphs[0].text = "Master Services Agreement"
+	for i in range(paragraphs):
+		if i % 50 == 0:
+			doc.add_heading(f"{i // 50 + 1}. Section", level=1)
+		doc.add_paragraph(f"{i + 1}. {SENTENCE}")
+	table = doc.add_table(rows=rows, cols=3)
+	for r in range(rows):
+		cells = table.rows[r].cells
+		cells[0].text, cells[1].text, cells[2].text = f"Service {r}", f"USD {r * 10}", "per month"
+	buf = io.BytesIO()
+	doc.save(buf)
+	return buf.getvalue()
+
+
+def python_docx(data: bytes) -> int:
+	doc = Document(io.BytesIO(data))
+	return sum(1 for p in doc.paragraphs if p.text and p.style.name)
+
+
+def streaming(data: bytes) -> int:
+	return sum(1 for _ in iter_docx_blocks(data))
+
+
+def measure(fn, data: bytes):
+	gc.collect()
+	tracemalloc.start()
+	t0 = time.perf_counter()
+	n = fn(data)
+	elapsed = time.perf_counter() - t0
+	_, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	return n, elapsed, peak
+
+
+def main():
+	ap = argparse.ArgumentParser()
+	ap.add_argument("--paragraphs", type=int, default=20000)
+	ap.add_argument("--rows", type=int, default=2000)
+	args = ap.parse_args()
+
+	data = make_docx(args.paragraphs, args.rows)
+	print(f"paragraphs={args.paragraphs} table rows={args.rows} size={len(data) / 2**20:.1f} MB")
+	for name, fn in (("python-docx", python_docx), ("streaming", streaming)):
+		n, elapsed, peak = measure(fn, data)
+		print(f"{name:12s} blocks={n:7d}  {elapsed:7.2f}s  peak heap {peak / 2**20:8.1f} MB")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,68 @@
+"""
+Usage:
+  python -m benchmarks.bench_features [--pages 10,100] [--batch-size 64] [--n-process 1] [--repeat 3]
+                                      [--profiles minimal,full,debug]
+
+Featurizes the clauses of synthetic contracts (benchmarks.corpus) once with
+extract_features_for_clause per clause and once with extract_features_batch
+(nlp.pipe, unused components disabled), checks that both give the same dicts and
+prints clauses/s for each.
+
+Then, for every feature profile, reports batch time and the memory retained by the
+resulting clause dicts (tracemalloc), both per 1000 clauses.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+import tracemalloc
+
+from benchmarks.corpus import make_contract
+from utils.features import FEATURE_PROFILES, NLP, UNUSED_PIPES, extract_features_batch, extract_features_for_clause
+
+
+def _best(fn, repeat: int):
+	best, result = float("inf"), None
+	for _ in range(repeat):
+		t0 = time.perf_counter()
+		result = fn()
+		best = min(best, time.perf_counter() - t0)
+	return result, best
+
+
+def main():
+	ap = argparse.ArgumentParser()
+	ap.add_argument("--pages", default="10,100")
+	ap.add_argument("--batch-size", type=int, default=64)
+	ap.add_argument("--n-process", type=int, default=1)
+	ap.add_argument("--repeat", type=int, default=3)
+	ap.add_argument("--profiles", default=",".join(FEATURE_PROFILES))
+	args = ap.parse_args()
+
+	print(f"pipeline: {NLP.pipe_names if NLP else None}, disabled: {UNUSED_PIPES}")
+	print(f"{'pages':>6}{'clauses':>9}{'single/s':>11}{'batch/s':>10}{'speedup':>9}")
+	cases = {}
+	for pages in (int(p) for p in args.pages.split(",")):
+		clauses = cases[pages] = [{"clause_id": f"c_{i}", "text": text}
+			for i, (_, text) in enumerate(line for page in make_contract(pages) for line in page)]
+		single, t_single = _best(lambda: [extract_features_for_clause(c) for c in clauses], args.repeat)
+		batch, t_batch = _best(lambda: extract_features_batch(clauses, args.batch_size, args.n_process), args.repeat)
+		assert batch == single, "batched features differ from per-clause features"
+		n = len(clauses)
+		print(f"{pages:>6}{n:>9}{n / t_single:>11.0f}{n / t_batch:>10.0f}{t_single / t_batch:>8.2f}x")
+
+	print(f"\n{'pages':>6}{'profile':>9}{'ms/1k':>9}{'KB/1k':>9}")
+	for pages, clauses in cases.items():
+		for profile in args.profiles.split(","):
+			_, seconds = _best(lambda: extract_features_batch(clauses, args.batch_size, args.n_process, profile), args.repeat)
+			tracemalloc.start()
+			before = tracemalloc.get_traced_memory()[0]
+			kept = extract_features_batch(clauses, args.batch_size, args.n_process, profile)
+			retained = tracemalloc.get_traced_memory()[0] - before
+			tracemalloc.stop()
+			per_k = 1000 / len(kept)
+			print(f"{pages:>6}{profile:>9}{seconds * 1e3 * per_k:>9.1f}{retained / 1024 * per_k:>9.0f}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,59 @@
+"""
+Usage:
+  python -m benchmarks.bench_inference [model_dir] [--clauses 300] [--batch-sizes 1,4,8,16,32,64]
+                                      [--backends torch,onnx,onnx-int8]
+
+Scores a synthetic mix of short and long clauses with RiskClassifier.predict_batch
+on CPU and prints clauses/second for each backend and batch size.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+import torch
+
+from ml.infer import RiskClassifier
+
+SNIPPETS = [
+	"The Supplier shall indemnify the Customer against all losses arising from breach.",
+	"Payment of all undisputed fees is due within thirty (30) days of invoice.",
+	"Each party shall comply with applicable data protection regulation including GDPR.",
+	"This Agreement is governed by the laws of the State of New York.",
+	"The Service shall be available 99.9% of the time measured monthly, excluding maintenance windows.",
+]
+
+
+def make_clauses(n: int, seed: int = 7):
+	rnd = random.Random(seed)
+	return [" ".join(rnd.choice(SNIPPETS) for _ in range(rnd.randint(1, 6))) for _ in range(n)]
+
+
+def main():
+	ap = argparse.ArgumentParser()
+	ap.add_argument("model_dir", nargs="?", default="artifacts/model_roberta")
+	ap.add_argument("--clauses", type=int, default=300)
+	ap.add_argument("--batch-sizes", default="1,4,8,16,32,64")
+	ap.add_argument("--backends", default="torch")
+	ap.add_argument("--threads", type=int, default=0)
+	args = ap.parse_args()
+	if args.threads:
+		torch.set_num_threads(args.threads)
+
+	texts = make_clauses(args.clauses)
+	print(f"model_dir={args.model_dir} clauses={len(texts)} threads={torch.get_num_threads()}")
+	print(f"{'backend':>10} {'batch_size':>10} {'seconds':>9} {'clauses/s':>10}")
+	for backend in [b for b in args.backends.split(",") if b]:
+		model = RiskClassifier(args.model_dir, backend=backend)
+		model.predict_batch(texts[:8])  # warm-up
+		name = "fallback" if model.use_fallback else model.backend
+		for bs in [int(x) for x in args.batch_sizes.split(",") if x]:
+			start = time.perf_counter()
+			model.predict_batch(texts, batch_size=bs)
+			elapsed = time.perf_counter() - start
+			print(f"{name:>10} {bs:>10} {elapsed:>9.3f} {len(texts) / elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+	main()
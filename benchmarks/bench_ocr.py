@@ -0,0 +1,114 @@
+"""
+Usage:
+  python -m benchmarks.bench_ocr [--pages 40] [--workers 1,2,4] [--window 0]
+
+Builds a synthetic scanned (image-only) PDF and OCRs it with the old whole-document
+conversion (every page rasterized up front, recognized one by one), with
+utils.preprocess.ocr_scanned_pdf at a fixed 300 dpi / psm 6 for each worker
+count, and with the adaptive OCR_LADDER (all workers). Each run is a separate
+process; peak RSS is sampled over that process and its children from /proc.
+Needs poppler (pdftoppm) and tesseract on PATH. Linux only.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_inference import SNIPPETS
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def make_scanned_pdf(pages: int) -> bytes:
+	import fitz
+	doc = fitz.open()
+	for n in range(pages):
+		src = fitz.open()
+		page = src.new_page()
+		y = 72
+		for i, snippet in enumerate(SNIPPETS * 4):
+			page.insert_text((72, y), f"{n * 20 + i + 1}. {snippet[:80]}", fontsize=10)
+			y += 28
+		pix = page.get_pixmap(dpi=150, colorspace=fitz.csGRAY)
+		out = doc.new_page(width=page.rect.width, height=page.rect.height)
+		out.insert_image(out.rect, stream=pix.tobytes("png"))
+	return doc.tobytes()
+
+
+def tree_rss(root: int) -> int:
+	children = {}
+	for entry in os.listdir("/proc"):
+		if not entry.isdigit():
+			continue
+		try:
+			with open(f"/proc/{entry}/stat") as f:
+				ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+		except (OSError, IndexError, ValueError):
+			continue
+		children.setdefault(ppid, []).append(int(entry))
+	total, stack = 0, [root]
+	while stack:
+		pid = stack.pop()
+		try:
+			with open(f"/proc/{pid}/statm") as f:
+				total += int(f.read().split()[1]) * PAGE_SIZE
+		except OSError:
+			pass
+		stack.extend(children.get(pid, []))
+	return total
+
+
+def run_mode(mode: str, pdf_path: str, window: int) -> None:
+	from utils.preprocess import ocr_image, ocr_scanned_pdf
+	with open(pdf_path, "rb") as f:
+		pdf = f.read()
+	t0 = time.perf_counter()
+	if mode == "whole":
+		from pdf2image import convert_from_bytes
+		images = convert_from_bytes(pdf, fmt="png", dpi=300)
+		pages = [ocr_image(img, i, psm=6) for i, img in enumerate(images, start=1)]
+	elif mode == "adaptive":
+		pages = ocr_scanned_pdf(pdf, window=window or None)["pages"]
+	else:
+		pages = ocr_scanned_pdf(pdf, psm=6, workers=int(mode), window=window or None)["pages"]
+	print(f"{len(pages)} {time.perf_counter() - t0:.3f}")
+
+
+def main():
+	ap = argparse.ArgumentParser()
+	ap.add_argument("--pages", type=int, default=40)
+	ap.add_argument("--workers", default="1,2,4")
+	ap.add_argument("--window", type=int, default=0, help="pages in flight; 0 = OCR_WINDOW default")
+	ap.add_argument("--run", nargs=2, metavar=("MODE", "PDF"), help=argparse.SUPPRESS)
+	args = ap.parse_args()
+	if args.run:
+		run_mode(args.run[0], args.run[1], args.window)
+		return
+
+	with tempfile.TemporaryDirectory() as tmp:
+		pdf_path = os.path.join(tmp, "scan.pdf")
+		with open(pdf_path, "wb") as f:
+			f.write(make_scanned_pdf(args.pages))
+		print(f"{'mode':<12}{'pages/s':>10}{'seconds':>10}{'peak MB':>10}")
+		for mode in ["whole"] + args.workers.split(",") + ["adaptive"]:
+			cmd = [sys.executable, "-m", "benchmarks.bench_ocr", "--window", str(args.window), "--run", mode, pdf_path]
+			proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+			peak = 0
+			while proc.poll() is None:
+				peak = max(peak, tree_rss(proc.pid))
+				time.sleep(0.05)
+			out = proc.stdout.read().split()
+			if proc.returncode != 0 or len(out) != 2:
+				print(f"{mode:<12} failed (exit {proc.returncode})")
+				continue
+			pages, seconds = int(out[0]), float(out[1])
+			label = mode if not mode.isdigit() else f"workers={mode}"
+			print(f"{label:<12}{pages / seconds:>10.2f}{seconds:>10.2f}{peak / 2**20:>10.0f}")
+
+
+if __name__ == "__main__":
+	main()
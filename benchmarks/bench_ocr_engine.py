@@ -0,0 +1,55 @@
+"""
+Usage:
+  python -m benchmarks.bench_ocr_engine [--pages 20] [--dpi 300] [--psm 6] [--lang eng]
+
+Renders the synthetic scanned pages from benchmarks.bench_ocr once, then runs
+the same in-memory images through the pytesseract subprocess engine and the
+persistent tesserocr engine. Prints pages/second for each and how many pages
+produced the same words. Needs tesseract; tesserocr is skipped when missing.
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import time
+
+import fitz
+from PIL import Image
+
+from benchmarks.bench_ocr import make_scanned_pdf
+from utils import ocr_engine
+
+
+def main():
+	ap = argparse.ArgumentParser()
+	ap.add_argument("--pages", type=int, default=20)
+	ap.add_argument("--dpi", type=int, default=300)
+	ap.add_argument("--psm", type=int, default=6)
+	ap.add_argument("--lang", default="eng")
+	args = ap.parse_args()
+
+	doc = fitz.open(stream=make_scanned_pdf(args.pages), filetype="pdf")
+	images = [Image.open(io.BytesIO(p.get_pixmap(dpi=args.dpi).tobytes("png"))) for p in doc]
+	for img in images:
+		img.load()
+
+	engines = [ocr_engine.PytesseractEngine()]
+	if ocr_engine._tesserocr_ready():
+		engines.append(ocr_engine.TesserocrEngine())
+	else:
+		print("tesserocr not available; timing pytesseract only")
+
+	words = {}
+	for engine in engines:
+		t0 = time.perf_counter()
+		out = [engine.image_to_data(img, args.lang, args.psm) for img in images]
+		elapsed = time.perf_counter() - t0
+		words[engine.name] = [[t.strip() for t in d["text"] if t.strip()] for d in out]
+		print(f"{engine.name:<12}{len(images) / elapsed:>8.2f} pages/s{elapsed:>9.2f}s  ({engine.version})")
+	if len(words) == 2:
+		same = sum(a == b for a, b in zip(*words.values()))
+		print(f"identical words on {same}/{len(images)} pages")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,67 @@
+"""
+Usage:
+  python -m benchmarks.bench_scanner [--pages 100] [--pii-every 4] [--repeat 5]
+
+Compares the per-clause regex work of featurization and PII handling on synthetic
+contract clauses (benchmarks.corpus, with an email/phone/SSN line appended to every
+--pii-every'th clause). The "regex" column is the previous path: six feature
+searches, three placeholder substitutions, three PII finditers and three redaction
+substitutions. The "scanner" column runs utils.scanner.scan once per clause and
+derives the same flags, placeholder text, PII lists and redaction from its spans.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+from benchmarks.corpus import make_contract
+from utils.scanner import PATTERNS, scan
+
+FLAG_KINDS = ("money", "percent", "date", "duration", "email", "url")
+PII_LINE = " Contact jane.doe@example.com or +1 555 123 4567; SSN 123-45-6789."
+
+
+def regex_path(text: str):
+	flags = [bool(PATTERNS[k].search(text)) for k in FLAG_KINDS]
+	norm = text
+	for kind, repl in (("money", " [MONEY] "), ("date", " [DATE] "), ("number", " [NUM] ")):
+		norm = PATTERNS[kind].sub(repl, norm)
+	pii = [[m.group() for m in PATTERNS[k].finditer(text)] for k in ("email", "ssn", "phone")]
+	red = text
+	for kind, repl in (("email", "█" * 8), ("ssn", "█" * 11), ("phone", "█" * 8)):
+		red = PATTERNS[kind].sub(repl, red)
+	return flags, norm, pii, red
+
+
+def scanner_path(text: str):
+	spans = scan(text)
+	flags = [spans.has(k) for k in FLAG_KINDS]
+	norm = spans.replace((("money", " [MONEY] "), ("date", " [DATE] "), ("number", " [NUM] ")))
+	pii = [spans.texts(k) for k in ("email", "ssn", "phone")]
+	red = spans.replace((("email", "█" * 8), ("ssn", "█" * 11), ("phone", "█" * 8)))
+	return flags, norm, pii, red
+
+
+def main():
+	ap = argparse.ArgumentParser()
+	ap.add_argument("--pages", type=int, default=100)
+	ap.add_argument("--pii-every", type=int, default=4)
+	ap.add_argument("--repeat", type=int, default=5)
+	args = ap.parse_args()
+
+	texts = [text + (PII_LINE if i % args.pii_every == 0 else "")
+		for i, (_, text) in enumerate(line for page in make_contract(args.pages) for line in page)]
+	assert [regex_path(t) for t in texts] == [scanner_path(t) for t in texts], "scanner output differs from the regexes"
+	print(f"{'path':>8}{'clauses':>9}{'clauses/s':>11}{'us/clause':>11}")
+	for name, fn in (("regex", regex_path), ("scanner", scanner_path)):
+		best = float("inf")
+		for _ in range(args.repeat):
+			t0 = time.perf_counter()
+			for t in texts:
+				fn(t)
+			best = min(best, time.perf_counter() - t0)
+		print(f"{name:>8}{len(texts):>9}{len(texts) / best:>11.0f}{best / len(texts) * 1e6:>11.1f}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,188 @@
+"""
+Usage:
+  python -m benchmarks.corpus OUT_DIR [--kinds text_pdf,scanned_pdf,docx] [--pages 1,10,100]
+                              [--mix Safe=4,Financial=2,Liability=2,Compliance=1,Operational=1] [--seed 7]
+
+Deterministic synthetic contracts for benchmarks. A contract is a list of pages, each
+a list of ("heading" | "clause", text) lines drawn from per-category clause templates
+in the proportions of the clause mix; the same (pages, mix, seed) always yields the
+same document. Renders text-layer PDFs, scanned (image-only) PDFs and DOCX files.
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import random
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+KINDS = ("text_pdf", "scanned_pdf", "docx")
+EXTENSIONS = {"text_pdf": ".pdf", "scanned_pdf": ".pdf", "docx": ".docx"}
+
+# Each template is filled from FILLERS; categories match ml.infer.FALLBACK_KEYWORDS
+TEMPLATES: Dict[str, List[str]] = {
+	"Financial": [
+		"The {party} shall pay all undisputed fees within {days} days of receipt of a valid invoice.",
+		"Late payment shall accrue interest at {pct}% per month on the outstanding amount.",
+		"A penalty of {amount} applies for each month in which the minimum volume is not met.",
+	],
+	"Liability": [
+		"The {party} shall indemnify and hold harmless the {other} against all claims arising from its breach.",
+		"Neither party shall be liable for indirect or consequential damages, except for breach of confidentiality.",
+		"The aggregate liability of the {party} under this Agreement is limited to {amount}.",
+	],
+	"Compliance": [
+		"Each party shall comply with all applicable laws, including GDPR and any successor regulation.",
+		"The {party} shall process personal data only on documented instructions of the {other}.",
+		"The {party} shall maintain records sufficient to demonstrate compliance with HIPAA where applicable.",
+	],
+	"Operational": [
+		"The {party} shall provide support during business hours and meet the service level in Schedule {n}.",
+		"The Service shall achieve {pct}.9% monthly uptime, excluding scheduled maintenance windows.",
+		"Incidents of severity one shall receive a response within {n} hours.",
+	],
+	"Safe": [
+		"This Agreement is governed by the laws of the State of {state}.",
+		"Notices shall be in writing and delivered to the addresses set out above.",
+		"This Agreement may be executed in counterparts, each of which is an original.",
+		"Headings are for convenience only and do not affect interpretation.",
+	],
+}
+FILLERS = {
+	"party": ["Supplier", "Customer", "Licensee", "Provider"],
+	"other": ["Customer", "Supplier", "Licensor", "Client"],
+	"days": ["15", "30", "45", "60"],
+	"pct": ["1", "2", "5", "99"],
+	"amount": ["USD 10,000", "EUR 250,000", "the fees paid in the prior twelve months"],
+	"n": ["2", "4", "8", "24"],
+	"state": ["New York", "Delaware", "California"],
+}
+SECTION_TITLES = ["Definitions", "Services", "Fees and Payment", "Liability", "Data Protection",
+	"Service Levels", "Term and Termination", "General"]
+DEFAULT_MIX = {"Safe": 4.0, "Financial": 2.0, "Liability": 2.0, "Compliance": 1.0, "Operational": 1.0}
+
+Contract = List[List[Tuple[str, str]]]
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+	"""``"Safe=4,Financial=2"`` -> weights; unknown categories are rejected."""
+	mix: Dict[str, float] = {}
+	for part in spec.split(","):
+		if not part.strip():
+			continue
+		name, _, weight = part.partition("=")
+		name = name.strip()
+		if name not in TEMPLATES:
+			raise ValueError(f"Unknown clause category: {name}")
+		mix[name] = float(weight or 1)
+	return mix
+
+
+def make_contract(pages: int, mix: Optional[Dict[str, float]] = None, seed: int = 7,
+		clauses_per_page: int = 8, sentences: Tuple[int, int] = (1, 3)) -> Contract:
+	"""Numbered sections with numbered clauses of ``sentences`` template sentences each."""
+	mix = mix or DEFAULT_MIX
+	rnd = random.Random(seed)
+	names = list(mix)
+	weights = [mix[n] for n in names]
+	out: Contract = []
+	section = clause = 0
+	for p in range(pages):
+		lines: List[Tuple[str, str]] = []
+		for i in range(clauses_per_page):
+			if i % 4 == 0:
+				section += 1
+				clause = 0
+				lines.append(("heading", f"{section}. {SECTION_TITLES[section % len(SECTION_TITLES)]}"))
+			clause += 1
+			body = " ".join(
+				rnd.choice(TEMPLATES[rnd.choices(names, weights)[0]]).format(**{k: rnd.choice(v) for k, v in FILLERS.items()})
+				for _ in range(rnd.randint(*sentences))
+			)
+			lines.append(("clause", f"{section}.{clause} {body}"))
+		out.append(lines)
+	return out
+
+
+def _draw_page(page, lines: List[Tuple[str, str]]) -> None:
+	import fitz
+	y = 60.0
+	for kind, text in lines:
+		size = 12 if kind == "heading" else 10
+		rect = fitz.Rect(60, y, page.rect.width - 60, page.rect.height - 50)
+		# insert_textbox returns the unused height (negative when it did not fit)
+		left = page.insert_textbox(rect, text, fontsize=size, fontname="helv")
+		if left < 0:
+			break
+		y = rect.y1 - left + (8 if kind == "heading" else 6)
+
+
+def to_text_pdf(contract: Contract) -> bytes:
+	import fitz
+	doc = fitz.open()
+	for lines in contract:
+		_draw_page(doc.new_page(), lines)
+	return doc.tobytes()
+
+
+def to_scanned_pdf(contract: Contract, dpi: int = 150) -> bytes:
+	"""Each page rendered to a grayscale image and placed on an otherwise empty page."""
+	import fitz
+	doc = fitz.open()
+	for lines in contract:
+		src = fitz.open()
+		page = src.new_page()
+		_draw_page(page, lines)
+		pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+		out = doc.new_page(width=page.rect.width, height=page.rect.height)
+		out.insert_image(out.rect, stream=pix.tobytes("png"))
+	return doc.tobytes()
+
+
+def to_docx(contract: Contract) -> bytes:
+	from docx import Document
+	doc = Document()
+	for n, lines in enumerate(contract):
+		if n:
+			doc.add_page_break()
+		for kind, text in lines:
+			if kind == "heading":
+				doc.add_heading(text, level=1)
+			else:
+				doc.add_paragraph(text)
+	buf = io.BytesIO()
+	doc.save(buf)
+	return buf.getvalue()
+
+
+RENDERERS = {"text_pdf": to_text_pdf, "scanned_pdf": to_scanned_pdf, "docx": to_docx}
+
+
+def generate(kind: str, pages: int, mix: Optional[Dict[str, float]] = None, seed: int = 7) -> Tuple[bytes, str]:
+	"""Return (file bytes, filename) for one synthetic contract."""
+	if kind not in RENDERERS:
+		raise ValueError(f"Unknown document kind: {kind}")
+	return RENDERERS[kind](make_contract(pages, mix, seed)), f"{kind}_{pages}p{EXTENSIONS[kind]}"
+
+
+def main():
+	ap = argparse.ArgumentParser()
+	ap.add_argument("out_dir")
+	ap.add_argument("--kinds", default=",".join(KINDS))
+	ap.add_argument("--pages", default="1,10,100")
+	ap.add_argument("--mix", default="")
+	ap.add_argument("--seed", type=int, default=7)
+	args = ap.parse_args()
+
+	out = Path(args.out_dir)
+	out.mkdir(parents=True, exist_ok=True)
+	mix = parse_mix(args.mix) if args.mix else None
+	for kind in args.kinds.split(","):
+		for pages in (int(p) for p in args.pages.split(",")):
+			data, name = generate(kind, pages, mix, args.seed)
+			(out / name).write_bytes(data)
+			print(f"{out / name}  {len(data) / 2**20:.1f} MB")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,200 @@
+"""
+Usage:
+  python -m benchmarks.harness [--kinds text_pdf,docx,scanned_pdf] [--pages 1,10,100]
+                               [--mix Safe=4,Financial=2] [--model-dir artifacts/model_roberta]
+                               [--repeat 1] [--baseline benchmarks/baseline.json]
+                               [--update-baseline] [--threshold 0.25] [--json results.json]
+
+Times each pipeline stage on synthetic contracts from benchmarks.corpus:
+preprocess (preprocess_file), segment (segment_pages_to_clauses), features
+(extract_features_batch), classify (RiskClassifier.predict_batch; the keyword
+fallback when the model directory is missing) and report (JSON + PDF report).
+For every stage it prints seconds, pages/s, clauses/s and the peak RSS of this
+process and its children (OCR pools) sampled from /proc while the stage runs.
+
+With --baseline, results are compared against the stored file and any stage whose
+time or peak memory exceeds the baseline by more than --threshold is reported as
+a regression (exit status 1). --update-baseline writes the current results instead.
+Baselines are host-specific; record them on the machine that runs the comparison.
+CI does not use a committed file: the "bench" job in .github/workflows/ci.yaml
+records benchmarks/baseline.json on every push to main and keeps it in the Actions
+cache, and pull requests restore the newest one and report regressions without
+failing the build. A run without a baseline (first run, expired cache) writes one
+and passes.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.bench_ocr import tree_rss
+from benchmarks.corpus import KINDS, generate, parse_mix
+
+STAGES = ("preprocess", "segment", "features", "classify", "report")
+SAMPLE_SECONDS = 0.01
+
+
+class PeakRSS:
+	"""Samples the RSS of this process tree in a background thread."""
+
+	def __init__(self, interval: float = SAMPLE_SECONDS):
+		self.interval = interval
+		self.peak = 0
+		self._stop = threading.Event()
+		self._thread = threading.Thread(target=self._run, daemon=True)
+
+	def _run(self):
+		pid = os.getpid()
+		while True:
+			self.peak = max(self.peak, tree_rss(pid))
+			if self._stop.wait(self.interval):
+				return
+
+	def __enter__(self) -> "PeakRSS":
+		self._thread.start()
+		return self
+
+	def __exit__(self, *exc):
+		self._stop.set()
+		self._thread.join()
+		self.peak = max(self.peak, tree_rss(os.getpid()))
+
+
+def _measure(fn: Callable[[], Any], repeat: int):
+	"""(result, best seconds, peak RSS bytes) over ``repeat`` runs."""
+	best, peak, result = float("inf"), 0, None
+	for _ in range(repeat):
+		with PeakRSS() as rss:
+			t0 = time.perf_counter()
+			result = fn()
+			elapsed = time.perf_counter() - t0
+		best, peak = min(best, elapsed), max(peak, rss.peak)
+	return result, best, peak
+
+
+def _result_rows(clauses: List[Dict[str, Any]], preds: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+	rows = []
+	for c, p in zip(clauses, preds):
+		top = [x for x in p if x["score"] >= 0.5]
+		rows.append({
+			"clause_id": c["clause_id"],
+			"page": c["page"],
+			"text": c["original_text"],
+			"predictions": top,
+			"severity": "High" if any(x["score"] >= 0.75 for x in top) else ("Medium" if top else "Low"),
+		})
+	return rows
+
+
+def run_case(kind: str, pages: int, mix, model_dir: str, repeat: int, classifier=None) -> Dict[str, Dict[str, Any]]:
+	"""Time every stage on one generated document; returns {stage: metrics}."""
+	from utils.features import extract_features_batch
+	from utils.preprocess import preprocess_file
+	from utils.report import build_json_report, build_pdf_report
+	from utils.segmenter import segment_pages_to_clauses
+
+	data, filename = generate(kind, pages, mix)
+	if classifier is None:
+		from ml.infer import RiskClassifier
+		classifier = RiskClassifier(model_dir)
+	out: Dict[str, Dict[str, Any]] = {}
+
+	def record(stage: str, fn: Callable[[], Any], clauses: Optional[int] = None):
+		result, seconds, peak = _measure(fn, repeat)
+		out[stage] = {
+			"seconds": round(seconds, 4),
+			"pages_per_s": round(pages / seconds, 2) if seconds else None,
+			"clauses_per_s": round(clauses / seconds, 2) if clauses and seconds else None,
+			"peak_mb": round(peak / 2**20, 1),
+		}
+		return result
+
+	pre = record("preprocess", lambda: preprocess_file(data, filename))
+	clauses = record("segment", lambda: segment_pages_to_clauses(pre["pages"]))
+	n = len(clauses)
+	out["segment"]["clauses_per_s"] = round(n / out["segment"]["seconds"], 2) if n and out["segment"]["seconds"] else None
+	aug = record("features", lambda: extract_features_batch(clauses), n)
+	preds = record("classify", lambda: classifier.predict_batch([c["normalized_text"] for c in aug]), n)
+	rows = _result_rows(aug, preds)
+	summary = {"total_clauses": n, "flagged": sum(1 for r in rows if r["predictions"])}
+	record("report", lambda: (build_json_report(filename, rows, summary), build_pdf_report(filename, rows, summary)), n)
+	for metrics in out.values():
+		metrics["clauses"] = n
+	return out
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], threshold: float) -> List[str]:
+	"""Messages for every case/stage slower or larger than baseline * (1 + threshold)."""
+	regressions = []
+	for key, metrics in results.items():
+		base = baseline.get(key)
+		if not base or "error" in metrics or "error" in base:
+			continue
+		for field, label in (("seconds", "time"), ("peak_mb", "peak memory")):
+			if base.get(field) and metrics[field] > base[field] * (1 + threshold):
+				regressions.append(f"{key}: {label} {metrics[field]} vs baseline {base[field]} (+{metrics[field] / base[field] - 1:.0%})")
+	return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+	ap = argparse.ArgumentParser()
+	ap.add_argument("--kinds", default=",".join(KINDS))
+	ap.add_argument("--pages", default="1,10,100")
+	ap.add_argument("--mix", default="")
+	ap.add_argument("--model-dir", default="artifacts/model_roberta")
+	ap.add_argument("--repeat", type=int, default=1)
+	ap.add_argument("--baseline", default="")
+	ap.add_argument("--update-baseline", action="store_true")
+	ap.add_argument("--threshold", type=float, default=0.25)
+	ap.add_argument("--json", default="")
+	args = ap.parse_args(argv)
+
+	from ml.infer import RiskClassifier
+	classifier = RiskClassifier(args.model_dir)
+	mix = parse_mix(args.mix) if args.mix else None
+	results: Dict[str, Dict[str, Any]] = {}
+	print(f"{'case':<34}{'seconds':>10}{'pages/s':>10}{'clauses/s':>11}{'peak MB':>9}")
+	for kind in args.kinds.split(","):
+		for pages in (int(p) for p in args.pages.split(",")):
+			case = f"{kind}:{pages}"
+			try:
+				stages = run_case(kind, pages, mix, args.model_dir, args.repeat, classifier)
+			except Exception as e:
+				# e.g. scanned PDFs without tesseract/poppler installed
+				results[case] = {"error": f"{type(e).__name__}: {e}"}
+				print(f"{case:<34}skipped ({results[case]['error'][:60]})")
+				continue
+			for stage in STAGES:
+				m = stages[stage]
+				results[f"{case}:{stage}"] = m
+				print(f"{case + ':' + stage:<34}{m['seconds']:>10.3f}{m['pages_per_s'] or 0:>10.1f}{m['clauses_per_s'] or 0:>11.1f}{m['peak_mb']:>9.0f}")
+
+	report = {
+		"meta": {"python": sys.version.split()[0], "machine": platform.machine(), "cpus": os.cpu_count(), "at": time.strftime("%Y-%m-%dT%H:%M:%S")},
+		"results": results,
+	}
+	if args.json:
+		Path(args.json).write_text(json.dumps(report, indent=2))
+	if not args.baseline:
+		return 0
+	path = Path(args.baseline)
+	if args.update_baseline or not path.exists():
+		path.write_text(json.dumps(report, indent=2))
+		print(f"baseline written to {path}")
+		return 0
+	regressions = compare(results, json.loads(path.read_text())["results"], args.threshold)
+	for line in regressions:
+		print(f"REGRESSION {line}")
+	print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%} of {path}")
+	return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Tuple
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+CLAUSE_CACHE_DB = Path(os.environ.get("CLAUSE_CACHE_DB", "storage/clause_cache.db"))
+CLAUSE_CACHE_MEMORY_ITEMS = int(os.environ.get("CLAUSE_CACHE_MEMORY_ITEMS", "20000"))
+CLAUSE_CACHE_MAX_ROWS = int(os.environ.get("CLAUSE_CACHE_MAX_ROWS", "500000"))
+
+Predictions = List[Dict[str, Any]]
+
+
+def merge_stats(stats: List[Dict[str, Any]]) -> Dict[str, Any]:
+	hits = sum(s["hits"] for s in stats)
+	misses = sum(s["misses"] for s in stats)
+	return {
+		"hits": hits,
+		"misses": misses,
+		"computed": sum(s["computed"] for s in stats),
+		"hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+	}
+
+
+def clause_key(normalized_text: str, model_tag: str) -> str:
+	return hashlib.sha256(f"{model_tag}\u0000{normalized_text}".encode("utf-8")).hexdigest()
+
+
+class ClauseCache:
+	"""Two-tier memo of clause predictions: an in-process LRU over a SQLite table.
+
+	Keys combine the placeholderized clause text with the model tag, so a new
+	model version or artifact never reuses older scores.
+	"""
+
+	def __init__(self, db_path: Path = CLAUSE_CACHE_DB, memory_items: int = CLAUSE_CACHE_MEMORY_ITEMS,
+			max_rows: int = CLAUSE_CACHE_MAX_ROWS):
+		self.db_path = Path(db_path)
+		self.memory_items = memory_items
+		self.max_rows = max_rows
+		self._lock = threading.Lock()
+		self._memory: "OrderedDict[str, Predictions]" = OrderedDict()
+		self.db_path.parent.mkdir(parents=True, exist_ok=True)
+		with sqlite3.connect(self.db_path) as con:
+			con.execute("PRAGMA journal_mode=WAL")
+			con.execute(
+				"""
+				CREATE TABLE IF NOT EXISTS clause_predictions (
+					key TEXT PRIMARY KEY,
+					predictions TEXT NOT NULL,
+					last_access REAL NOT NULL
+				)
+				"""
+			)
+			con.execute("CREATE INDEX IF NOT EXISTS idx_clause_predictions_access ON clause_predictions (last_access)")
+
+	def get_many(self, keys: List[str]) -> Dict[str, Predictions]:
+		found: Dict[str, Predictions] = {}
+		with self._lock:
+			for k in keys:
+				if k in self._memory:
+					self._memory.move_to_end(k)
+					found[k] = self._memory[k]
+		missing = [k for k in dict.fromkeys(keys) if k not in found]
+		if not missing:
+			return found
+		now = time.time()
+		with sqlite3.connect(self.db_path) as con:
+			for i in range(0, len(missing), 500):
+				chunk = missing[i:i + 500]
+				marks = ",".join("?" * len(chunk))
+				rows = con.execute(f"SELECT key, predictions FROM clause_predictions WHERE key IN ({marks})", chunk).fetchall()
+				if rows:
+					con.executemany("UPDATE clause_predictions SET last_access = ? WHERE key = ?", [(now, k) for k, _ in rows])
+				for k, p in rows:
+					found[k] = json.loads(p)
+		self._remember({k: found[k] for k in missing if k in found})
+		return found
+
+	def put_many(self, items: Dict[str, Predictions]):
+		if not items:
+			return
+		self._remember(items)
+		now = time.time()
+		with sqlite3.connect(self.db_path) as con:
+			con.executemany(
+				"INSERT OR REPLACE INTO clause_predictions (key, predictions, last_access) VALUES (?, ?, ?)",
+				[(k, json.dumps(p), now) for k, p in items.items()],
+			)
+			(count,) = con.execute("SELECT COUNT(*) FROM clause_predictions").fetchone()
+			if count > self.max_rows:
+				con.execute(
+					"DELETE FROM clause_predictions WHERE key IN (SELECT key FROM clause_predictions ORDER BY last_access ASC LIMIT ?)",
+					(count - self.max_rows,),
+				)
+
+	def predict(self, texts: List[str], model_tag: str, predict_fn: Callable[[List[str]], List[Predictions]]) -> Tuple[List[Predictions], Dict[str, Any]]:
+		"""Score ``texts`` through the cache; only unseen clauses reach ``predict_fn``."""
+		keys = [clause_key(t, model_tag) for t in texts]
+		cached = self.get_many(keys)
+		todo: Dict[str, str] = {}
+		for k, t in zip(keys, texts):
+			if k not in cached and k not in todo:
+				todo[k] = t
+		fresh: Dict[str, Predictions] = {}
+		if todo:
+			preds = predict_fn(list(todo.values()))
+			fresh = dict(zip(todo.keys(), preds))
+			self.put_many(fresh)
+		hits = sum(1 for k in keys if k in cached)
+		stats = {
+			"hits": hits,
+			"misses": len(keys) - hits,
+			"computed": len(fresh),
+			"hit_rate": round(hits / len(keys), 4) if keys else 0.0,
+		}
+		return [cached[k] if k in cached else fresh[k] for k in keys], stats
+
+	def _remember(self, items: Dict[str, Predictions]):
+		with self._lock:
+			for k, p in items.items():
+				self._memory[k] = p
+				self._memory.move_to_end(k)
+			while len(self._memory) > self.memory_items:
+				self._memory.popitem(last=False)
@@ -1,12 +1,14 @@
 from __future__ import annotations
 
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 import os
 import numpy as np
 import torch
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 from captum.attr import IntegratedGradients
 
+from utils.docmodel import WordIndex
+
 
 def _token_importances_ig(model, inputs, target_idx: int) -> np.ndarray:
 	model.zero_grad()
@@ -79,14 +81,23 @@ def explain_text(model_dir: str, text: str, method: str = "ig", top_k: int = 8)
 	}
 
 
-def map_tokens_to_bboxes(token_importances: List[Dict[str, Any]], bboxes: List[Dict[str, Any]], clause_start_char: int = 0) -> List[Dict[str, Any]]:
-	# Simplistic mapping: if token char span falls within block span, attach that bbox
-	# Here bboxes are page-level block boxes; this function will replicate bbox for tokens within the clause
-	return [
-		{
+def map_tokens_to_bboxes(token_importances: List[Dict[str, Any]], bboxes: List[Dict[str, Any]], clause_start_char: int = 0, words: Optional[WordIndex] = None) -> List[Dict[str, Any]]:
+	# Token offsets are relative to the clause; with the page's word index each token
+	# gets the box of the word(s) it falls in, otherwise the clause's first block box
+	out = []
+	for t in token_importances:
+		rects = words.rects(clause_start_char + t["start"], clause_start_char + t["end"]) if words is not None and "start" in t else []
+		out.append({
 			"token": t["token"],
 			"importance": t["importance"],
-			"bbox": bboxes[0] if bboxes else None,
-		}
-		for t in token_importances
-	]
+			"bbox": rects[0] if rects else (bboxes[0] if bboxes else None),
+		})
+	return out
+
+
+def explain_clause(model_dir: str, text: str, bboxes: List[Dict[str, Any]], clause_start_char: int = 0,
+		words: Optional[WordIndex] = None, method: str = "ig", top_k: int = 8) -> Dict[str, Any]:
+	"""``explain_text`` plus ``token_boxes`` for the top tokens (see ``map_tokens_to_bboxes``)."""
+	res = explain_text(model_dir, text, method=method, top_k=top_k)
+	res["token_boxes"] = map_tokens_to_bboxes(res["token_importances"][:top_k], bboxes, clause_start_char, words)
+	return res
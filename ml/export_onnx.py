@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+import hashlib
+import json
+import os
+
+import numpy as np
+import torch
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+ONNX_FILE = "model.onnx"
+ONNX_INT8_FILE = "model.int8.onnx"
+OPSET = 17
+# Written next to the exports; ml.infer only serves an ONNX file whose check here passed
+PARITY_FILE = "onnx_parity.json"
+# Max absolute logit difference against eager torch on PARITY_TEXTS
+PARITY_ATOL = {"onnx": 1e-4, "onnx-int8": 5e-2}
+PARITY_TEXTS = [
+	"The Supplier shall indemnify and hold harmless the Customer from any losses arising from its breach.",
+	"In no event shall either party be liable for indirect or consequential damages.",
+	"Fees are payable within 30 days of invoice; late payments accrue interest at 1.5% per month.",
+	"Each party shall comply with GDPR and all applicable data protection regulations.",
+	"The service shall maintain 99.9% uptime, measured monthly, with support available 24/7.",
+	"This Agreement shall be governed by the laws of the State of New York.",
+	"Either party may terminate this Agreement upon ninety (90) days written notice.",
+	"Notices shall be sent to the addresses set out above.",
+]
+
+
+def export_onnx(model_dir: str, opset: int = OPSET) -> Dict[str, str]:
+	"""Write an optimized fp32 ONNX graph and a dynamically quantized int8 copy into ``model_dir``."""
+	import onnxruntime as ort
+	from onnxruntime.quantization import quantize_dynamic, QuantType
+
+	tokenizer = AutoTokenizer.from_pretrained(model_dir)
+	model = AutoModelForSequenceClassification.from_pretrained(model_dir)
+	model.eval()
+	sample = tokenizer(["Vendor shall indemnify the Customer.", "Fees are due in 30 days."], padding=True, return_tensors="pt")
+	input_names = list(sample.keys())
+	dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+	dynamic_axes["logits"] = {0: "batch"}
+
+	raw_path = os.path.join(model_dir, "model.raw.onnx")
+	fp32_path = os.path.join(model_dir, ONNX_FILE)
+	int8_path = os.path.join(model_dir, ONNX_INT8_FILE)
+	with torch.no_grad():
+		torch.onnx.export(
+			model,
+			(dict(sample),),
+			raw_path,
+			input_names=input_names,
+			output_names=["logits"],
+			dynamic_axes=dynamic_axes,
+			opset_version=opset,
+		)
+
+	# Let ORT fold constants / fuse attention once and persist the result
+	so = ort.SessionOptions()
+	so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+	so.optimized_model_filepath = fp32_path
+	ort.InferenceSession(raw_path, so, providers=["CPUExecutionProvider"])
+
+	# Quantize from the unfused graph; fused contrib ops are not all quantizable
+	quantize_dynamic(raw_path, int8_path, weight_type=QuantType.QInt8)
+	os.remove(raw_path)
+	paths = {"onnx": fp32_path, "onnx-int8": int8_path}
+	check_parity(model_dir, paths)
+	return paths
+
+
+def file_sha256(path: str) -> str:
+	h = hashlib.sha256()
+	with open(path, "rb") as f:
+		for chunk in iter(lambda: f.read(1 << 20), b""):
+			h.update(chunk)
+	return h.hexdigest()
+
+
+def check_parity(model_dir: str, paths: Dict[str, str], texts: Optional[List[str]] = None) -> Dict[str, Any]:
+	"""Compare each ONNX export's logits with the torch model's and record the result in PARITY_FILE."""
+	import onnxruntime as ort
+
+	texts = texts or PARITY_TEXTS
+	tokenizer = AutoTokenizer.from_pretrained(model_dir)
+	model = AutoModelForSequenceClassification.from_pretrained(model_dir)
+	model.eval()
+	with torch.no_grad():
+		ref = model(**tokenizer(texts, truncation=True, max_length=256, padding=True, return_tensors="pt")).logits.numpy()
+	enc = tokenizer(texts, truncation=True, max_length=256, padding=True, return_tensors="np")
+	record: Dict[str, Any] = {}
+	for backend, path in paths.items():
+		session = ort.InferenceSession(path, providers=["CPUExecutionProvider"])
+		feed = {i.name: np.asarray(enc[i.name], dtype=np.int64) for i in session.get_inputs()}
+		diff = float(np.max(np.abs(session.run(["logits"], feed)[0] - ref)))
+		record[backend] = {
+			"file": os.path.basename(path),
+			"sha256": file_sha256(path),
+			"max_abs_logit_diff": diff,
+			"atol": PARITY_ATOL[backend],
+			"passed": diff <= PARITY_ATOL[backend],
+			"texts": len(texts),
+		}
+	with open(os.path.join(model_dir, PARITY_FILE), "w", encoding="utf-8") as f:
+		json.dump(record, f, indent=2)
+	return record
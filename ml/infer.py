@@ -7,6 +7,8 @@ import numpy as np
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 import torch
 
+from ml.export_onnx import PARITY_FILE, file_sha256
+
 FALLBACK_KEYWORDS = {
 	"Liability": ["indemnify", "liable", "limitation", "consequential damages"],
 	"Financial": ["payment", "fee", "penalty", "interest"],
@@ -15,37 +17,72 @@ FALLBACK_KEYWORDS = {
 	"Safe": [],
 }
 
+MAX_LENGTH = 256
+DEFAULT_BATCH_SIZE = int(os.environ.get("INFER_BATCH_SIZE", "32"))
+
+# Inference backends; ONNX files are written next to labels.json by ml/export_onnx.py
+ONNX_BACKEND_FILES = {
+	"onnx": "model.onnx",
+	"onnx-int8": "model.int8.onnx",
+}
+BACKENDS = ("torch",) + tuple(ONNX_BACKEND_FILES)
+
+
+def _require_parity(model_dir: str, backend: str, onnx_path: str) -> None:
+	"""Raise unless ml/export_onnx.py recorded a passing torch parity check for this exact file."""
+	try:
+		with open(os.path.join(model_dir, PARITY_FILE), "r", encoding="utf-8") as f:
+			check = json.load(f).get(backend) or {}
+	except FileNotFoundError:
+		check = {}
+	if not check.get("passed") or check.get("sha256") != file_sha256(onnx_path):
+		raise RuntimeError(f"{backend} backend has no passing parity check against torch for {onnx_path}; re-run ml/export_onnx.py")
+
 
 class RiskClassifier:
-	def __init__(self, model_dir: str):
+	def __init__(self, model_dir: str, backend: str = "torch"):
+		if backend not in BACKENDS:
+			raise ValueError(f"Unknown backend: {backend}")
 		self.model_dir = model_dir
 		self.use_fallback = not (os.path.isdir(model_dir) and os.path.isfile(os.path.join(model_dir, "config.json")))
+		self.model = None
+		self.session = None
 		if not self.use_fallback:
 			with open(os.path.join(model_dir, "labels.json"), "r", encoding="utf-8") as f:
 				m = json.load(f)
 			self.labels = m["labels"]
 			self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
-			self.model = AutoModelForSequenceClassification.from_pretrained(model_dir)
-			self.model.eval()
+			if backend != "torch":
+				# Refuse rather than serve torch outputs under an ONNX model tag
+				onnx_path = os.path.join(model_dir, ONNX_BACKEND_FILES[backend])
+				if not os.path.isfile(onnx_path):
+					raise FileNotFoundError(f"{backend} backend requested but {onnx_path} does not exist; run ml/export_onnx.py")
+				_require_parity(model_dir, backend, onnx_path)
+				import onnxruntime as ort
+				so = ort.SessionOptions()
+				so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+				self.session = ort.InferenceSession(onnx_path, so, providers=["CPUExecutionProvider"])
+				self.session_inputs = {i.name for i in self.session.get_inputs()}
+			else:
+				self.model = AutoModelForSequenceClassification.from_pretrained(model_dir)
+				self.model.eval()
 		else:
 			self.labels = list(FALLBACK_KEYWORDS.keys())
+		self.backend = backend
 
-	@torch.no_grad()
-	def predict_clause(self, text: str) -> List[Dict[str, Any]]:
-		if self.use_fallback:
-			low = text.lower()
-			out = []
-			for label in self.labels:
-				terms = FALLBACK_KEYWORDS[label]
-				score = 0.0
-				if terms:
-					matches = sum(1 for t in terms if t in low)
-					score = min(0.95, 0.4 + 0.2 * matches) if matches else 0.0
-				out.append({"label": label, "score": float(score)})
-			return sorted(out, key=lambda x: x["score"], reverse=True)
-		inputs = self.tokenizer(text, truncation=True, max_length=256, return_tensors="pt")
-		outputs = self.model(**inputs)
-		logits = outputs.logits.squeeze(0).detach().cpu().numpy()
+	def _predict_fallback(self, text: str) -> List[Dict[str, Any]]:
+		low = text.lower()
+		out = []
+		for label in self.labels:
+			terms = FALLBACK_KEYWORDS[label]
+			score = 0.0
+			if terms:
+				matches = sum(1 for t in terms if t in low)
+				score = min(0.95, 0.4 + 0.2 * matches) if matches else 0.0
+			out.append({"label": label, "score": float(score)})
+		return sorted(out, key=lambda x: x["score"], reverse=True)
+
+	def _to_predictions(self, logits: np.ndarray) -> List[Dict[str, Any]]:
 		if logits.ndim == 0:
 			logits = np.array([logits])
 		probs = 1.0 / (1.0 + np.exp(-logits))
@@ -55,6 +92,41 @@ class RiskClassifier:
 		out.sort(key=lambda x: x["score"], reverse=True)
 		return out
 
+	@torch.no_grad()
+	def predict_clause(self, text: str) -> List[Dict[str, Any]]:
+		return self.predict_batch([text])[0]
+
+	@torch.no_grad()
+	def predict_batch(self, texts: List[str], batch_size: int = DEFAULT_BATCH_SIZE) -> List[List[Dict[str, Any]]]:
+		"""Score many clauses, returning predictions in input order.
+
+		Clauses are sorted by token length and cut into buckets of ``batch_size`` so
+		each forward pass is only padded to the longest clause in its own bucket.
+		"""
+		if self.use_fallback:
+			return [self._predict_fallback(t) for t in texts]
+		if not texts:
+			return []
+		enc = self.tokenizer(list(texts), truncation=True, max_length=MAX_LENGTH)
+		order = sorted(range(len(texts)), key=lambda i: len(enc["input_ids"][i]))
+		results: List[List[Dict[str, Any]]] = [[] for _ in texts]
+		for b in range(0, len(order), max(1, batch_size)):
+			idx = order[b:b + max(1, batch_size)]
+			batch = self.tokenizer.pad(
+				{k: [enc[k][i] for i in idx] for k in enc.keys()},
+				return_tensors=("np" if self.session is not None else "pt"),
+			)
+			logits = self._logits(batch)
+			for row, i in enumerate(idx):
+				results[i] = self._to_predictions(logits[row])
+		return results
+
+	def _logits(self, batch) -> np.ndarray:
+		if self.session is not None:
+			feed = {k: np.asarray(v, dtype=np.int64) for k, v in batch.items() if k in self.session_inputs}
+			return self.session.run(["logits"], feed)[0]
+		return self.model(**batch).logits.detach().cpu().numpy()
+
 
 def predict_clause(text: str, model_dir: str) -> List[Dict[str, Any]]:
 	return RiskClassifier(model_dir).predict_clause(text)
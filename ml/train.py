@@ -15,6 +15,8 @@ from transformers import (
 import evaluate
 from sklearn.metrics import classification_report
 
+from ml.export_onnx import export_onnx
+
 
 @dataclass
 class TrainConfig:
@@ -28,6 +30,7 @@ class TrainConfig:
 	weight_decay: float = 0.01
 	warmup_ratio: float = 0.1
 	output_dir: str = "artifacts/model_roberta"
+	export_onnx: bool = True
 
 
 def prepare_datasets(train_df: pd.DataFrame, val_df: pd.DataFrame, test_df: pd.DataFrame, labels: List[str], tokenizer, max_length: int, multi_label: bool):
@@ -119,4 +122,7 @@ def train_and_export(train_df: pd.DataFrame, val_df: pd.DataFrame, test_df: pd.D
 	with open(os.path.join(config.output_dir, "labels.json"), "w", encoding="utf-8") as f:
 		json.dump({"labels": labels, "label2id": label2id, "id2label": id2label}, f, indent=2)
 
+	if config.export_onnx:
+		export_onnx(config.output_dir)
+
 	return metrics
@@ -2,6 +2,8 @@ import os
 from datetime import datetime, timedelta
 from pathlib import Path
 
+from app_api.jobstore import JOB_STORE
+
 RETENTION_DAYS = int(os.environ.get("RETENTION_DAYS", "7"))
 STORAGE_DIR = Path("storage/ephemeral")
 
@@ -16,6 +18,8 @@ def main():
 				print(f"Deleted {p}")
 		except Exception as e:
 			print(f"Skip {p}: {e}")
+	purged = JOB_STORE.purge(RETENTION_DAYS * 86400)
+	print(f"Purged {purged} job records")
 
 if __name__ == '__main__':
 	main()
@@ -0,0 +1,29 @@
+from benchmarks.corpus import generate, make_contract, parse_mix
+from benchmarks.harness import compare
+
+
+def test_corpus_is_deterministic_and_follows_the_mix():
+	assert make_contract(3, seed=1) == make_contract(3, seed=1)
+	assert make_contract(3, seed=1) != make_contract(3, seed=2)
+	only_fees = make_contract(2, parse_mix("Financial=1"), clauses_per_page=4, sentences=(1, 1))
+	assert len(only_fees) == 2 and all(len(page) == 5 for page in only_fees)
+	assert all(any(w in text for w in ("pay", "interest", "penalty")) for page in only_fees for kind, text in page if kind == "clause")
+
+	from utils.preprocess import preprocess_file
+	data, name = generate("text_pdf", 2)
+	assert name == "text_pdf_2p.pdf" and preprocess_file(data, name)["page_count"] == 2
+	data, name = generate("docx", 2)
+	assert "1.1 " in preprocess_file(data, name)["pages"][0].text
+
+
+def test_regressions_are_flagged_beyond_threshold():
+	baseline = {"docx:10:segment": {"seconds": 1.0, "peak_mb": 100.0}, "docx:10:report": {"seconds": 1.0, "peak_mb": 100.0}}
+	results = {
+		"docx:10:segment": {"seconds": 1.2, "peak_mb": 150.0},
+		"docx:10:report": {"seconds": 1.4, "peak_mb": 100.0},
+		"docx:100:segment": {"seconds": 9.0, "peak_mb": 900.0},
+	}
+	assert compare(results, baseline, 0.25) == [
+		"docx:10:segment: peak memory 150.0 vs baseline 100.0 (+50%)",
+		"docx:10:report: time 1.4 vs baseline 1.0 (+40%)",
+	]
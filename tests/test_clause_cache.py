@@ -0,0 +1,26 @@
+from ml.clause_cache import ClauseCache
+
+
+def test_clause_cache_only_scores_unseen_clauses(tmp_path):
+	calls = []
+
+	def predict(texts):
+		calls.append(list(texts))
+		return [[{"label": "Safe", "score": float(len(t))}] for t in texts]
+
+	cache = ClauseCache(tmp_path / "clauses.db", memory_items=2)
+	texts = ["governing law", "severability", "governing law"]
+	preds, stats = cache.predict(texts, "v1", predict)
+	assert calls == [["governing law", "severability"]]
+	assert stats["hits"] == 0 and stats["computed"] == 2
+	assert preds[0] == preds[2]
+
+	# new process / cold memory tier still hits the on-disk tier
+	cold = ClauseCache(tmp_path / "clauses.db")
+	preds2, stats2 = cold.predict(texts + ["notices"], "v1", predict)
+	assert calls[-1] == ["notices"]
+	assert stats2["hits"] == 3 and stats2["hit_rate"] == 0.75
+	assert preds2[:3] == preds
+
+	_, stats3 = cold.predict(["notices"], "v2", predict)
+	assert stats3["hits"] == 0
@@ -0,0 +1,80 @@
+import pickle
+
+from utils.docmodel import ColumnarDocument, ColumnarPage, WordIndex
+from utils.segmenter import segment_pages_to_clauses
+
+
+def _doc():
+	text_page = {
+		"page_number": 1,
+		"blocks": [
+			{"text": "1. Term", "bbox": {"x": 72.0, "y": 60.5, "w": 40.25, "h": 12.0}, "char_start": 0, "char_end": 7, "block_no": 0, "type": 0},
+			{"text": "This Agreement starts today.\nIt ends in 2030.", "bbox": {"x": 72.0, "y": 80.0, "w": 300.0, "h": 24.0}, "char_start": 8, "char_end": 53, "block_no": 1, "type": 0},
+		],
+		"page_kind": "text",
+	}
+	ocr_page = {
+		"page_number": 2,
+		"blocks": [
+			{"text": "Payment", "bbox": {"x": 300, "y": 250, "w": 180, "h": 40}, "char_start": 0, "char_end": 7, "ocr_conf": 96.5},
+			{"text": "due", "bbox": {"x": 500, "y": 250, "w": 70, "h": 40}, "char_start": 8, "char_end": 11, "ocr_conf": 88.0},
+		],
+		"ocr_avg_conf": 92.25,
+		"needs_review": False,
+		"ocr_settings": {"dpi": 150, "psm": 6, "attempts": 1, "cache_hits": 0},
+		"page_kind": "scanned",
+	}
+	docx_page = {
+		"page_number": 3,
+		"blocks": [
+			{"text": "Définitions", "bbox": None, "char_start": 0, "char_end": 11, "style": "Heading 1", "num": None},
+			{"text": "Either party may terminate.", "bbox": None, "char_start": 12, "char_end": 39, "style": "Normal", "num": 4},
+		],
+	}
+	return {"type": "pdf_hybrid", "page_count": 3, "pages": [text_page, ocr_page, docx_page]}
+
+
+def test_columnar_document_round_trips_dict_and_binary():
+	legacy = _doc()
+	doc = ColumnarDocument.from_dict(legacy)
+	assert doc.to_dict() == legacy
+	assert doc["type"] == "pdf_hybrid" and doc["page_count"] == 3 and "pages" in doc
+	page = doc["pages"][1]
+	assert page["ocr_avg_conf"] == 92.25 and page.get("missing") is None
+	assert page["blocks"][0]["text"] == "Payment" and page["blocks"][0].get("ocr_conf") == 96.5
+	assert page["blocks"][1] == legacy["pages"][1]["blocks"][1]
+
+	restored = ColumnarDocument.from_bytes(doc.to_bytes())
+	assert restored.to_dict() == legacy
+	assert pickle.loads(pickle.dumps(doc)).to_dict() == legacy
+
+
+def test_segmenter_output_is_unchanged_on_columnar_pages():
+	legacy = _doc()
+	pages = [ColumnarPage.from_dict(p) for p in legacy["pages"]]
+	assert segment_pages_to_clauses(pages) == segment_pages_to_clauses(legacy["pages"])
+
+
+def test_word_index_resolves_spans_to_tight_line_boxes():
+	# "This Agreement" on line 0, "starts today." on line 1 of block 1 of _doc()'s first page
+	words = WordIndex.from_words([
+		(8, 12, 72.0, 80.0, 95.0, 92.0, 0),
+		(13, 22, 98.0, 80.0, 160.0, 92.0, 0),
+		(23, 29, 72.0, 92.0, 100.0, 104.0, 1),
+		(30, 36, 103.0, 92.0, 135.0, 104.0, 1),
+	])
+	legacy = _doc()["pages"][0]
+	page = ColumnarPage.from_dict(legacy)
+	assert page.span_boxes(8, 12) == [legacy["blocks"][1]["bbox"]]
+	page.words = words
+	assert page.span_boxes(15, 18) == [{"x": 98.0, "y": 80.0, "w": 62.0, "h": 12.0}]
+	assert page.span_boxes(10, 25) == [
+		{"x": 72.0, "y": 80.0, "w": 88.0, "h": 12.0},
+		{"x": 72.0, "y": 92.0, "w": 28.0, "h": 12.0},
+	]
+	assert page.span_boxes(12, 13) == [] and page.span_boxes(40, 50) == []
+	assert words.words_in(0, 100) == (0, 4)
+
+	doc = ColumnarDocument("pdf_text", [page])
+	for restored in (ColumnarDocument.from_bytes(doc.to_bytes()), ColumnarDocument.from_dict(doc.to_dict())):
+		assert restored.pages[0].span_boxes(10, 25) == page.span_boxes(10, 25)
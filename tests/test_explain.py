@@ -11,3 +11,15 @@ def test_explain_output_structure(tmp_path):
 	res = explain_text(model_dir, "Vendor shall not be liable for damages.", method="ig")
 	assert "token_importances" in res and isinstance(res["token_importances"], list)
 	assert "explanation_text" in res and isinstance(res["explanation_text"], str)
+
+
+def test_token_boxes_use_page_word_index():
+	from ml.explain import map_tokens_to_bboxes
+	from utils.docmodel import WordIndex
+	# Page text "Intro. Vendor shall pay", clause starts at char 7
+	words = WordIndex.from_words([(0, 6, 10, 10, 40, 20, 0), (7, 13, 50, 10, 90, 20, 0), (14, 19, 10, 30, 40, 40, 1), (20, 23, 50, 30, 70, 40, 1)])
+	tokens = [{"token": "Vendor", "start": 0, "end": 6, "importance": 1.0}, {"token": "pay", "start": 13, "end": 16, "importance": 0.5}]
+	out = map_tokens_to_bboxes(tokens, [{"x": 0, "y": 0, "w": 1, "h": 1}], clause_start_char=7, words=words)
+	assert out[0]["bbox"] == {"x": 50.0, "y": 10.0, "w": 40.0, "h": 10.0}
+	assert out[1]["bbox"] == {"x": 50.0, "y": 30.0, "w": 20.0, "h": 10.0}
+	assert map_tokens_to_bboxes(tokens, [{"x": 0, "y": 0, "w": 1, "h": 1}])[0]["bbox"] == {"x": 0, "y": 0, "w": 1, "h": 1}
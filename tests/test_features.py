@@ -1,3 +1,5 @@
+import pytest
+
 from utils.features import extract_features_for_clause
 
 
@@ -25,3 +27,34 @@ def test_keywords_and_stats():
 	assert keys.get("termination") is True
 	assert keys.get("indemnity") is True
 	assert f["length_tokens"] > 0
+
+
+def test_batch_features_match_per_clause():
+	import random
+	from utils.features import extract_features_batch
+	words = ["The", "Supplier", "shall", "not", "be", "liable", "for", "$1,250.00", "or", "12%", "interest", "by",
+		"Jan 5, 2027", "within", "30 days", "INDEMNITY", "was", "terminated", "admin@example.com", "www.example.com", " ", "  "]
+	rnd = random.Random(3)
+	clauses = [{"clause_id": f"c_{i}", "text": " ".join(rnd.choice(words) for _ in range(rnd.randint(0, 40)))} for i in range(200)]
+	expected = [extract_features_for_clause(c) for c in clauses]
+	assert extract_features_batch(clauses, batch_size=7) == expected
+	assert extract_features_batch(iter(clauses)) == expected
+	assert extract_features_batch([]) == []
+
+
+def test_profiles_build_token_fields_lazily():
+	import json
+	import pickle
+	clause = {"text": "The Supplier shall not be liable for indirect damages."}
+	full = extract_features_for_clause(clause, "full")["features"]
+	minimal = extract_features_for_clause(clause, "minimal")["features"]
+	debug = extract_features_for_clause(clause, "debug")["features"]
+	assert "tokens" not in minimal and "tokens" not in json.loads(json.dumps(minimal))
+	assert {k: v for k, v in full.items() if k not in ("tokens", "lemmas", "pos")} == dict(minimal)
+	assert {"tags", "deps"} <= set(debug) and "tags" not in full
+	restored = pickle.loads(pickle.dumps(minimal))
+	assert restored["tokens"] == full["tokens"] and restored.get("pos") == full["pos"]
+	assert minimal.get("lemmas") == full["lemmas"] and minimal["deps"] == debug["deps"]
+	assert minimal.get("missing", 1) == 1
+	with pytest.raises(ValueError):
+		extract_features_for_clause(clause, "huge")
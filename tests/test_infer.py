@@ -0,0 +1,24 @@
+import os
+import pytest
+
+from ml.infer import RiskClassifier
+
+
+def test_predict_batch_fallback_matches_per_clause(tmp_path):
+	model = RiskClassifier(str(tmp_path / "missing"))
+	assert model.use_fallback
+	texts = ["Vendor shall indemnify and is liable.", "Fees and interest on late payment.", "Notices in writing."]
+	assert model.predict_batch(texts) == [model.predict_clause(t) for t in texts]
+
+
+def test_predict_batch_preserves_order_with_buckets():
+	model_dir = "artifacts/model_roberta"
+	if not os.path.isdir(model_dir):
+		pytest.skip("model artifact not found")
+	model = RiskClassifier(model_dir)
+	texts = ["Short.", "A much longer clause about payment of fees and interest " * 5, "Medium length clause on liability."]
+	batched = model.predict_batch(texts, batch_size=2)
+	for text, preds in zip(texts, batched):
+		single = {p["label"]: p["score"] for p in model.predict_clause(text)}
+		for p in preds:
+			assert p["score"] == pytest.approx(single[p["label"]], abs=1e-4)
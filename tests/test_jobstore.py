@@ -0,0 +1,166 @@
+import asyncio
+import multiprocessing as mp
+import threading
+import time
+
+from app_api.jobstore import SQLiteJobStore
+
+
+def _child_writes(path):
+	store = SQLiteJobStore(path)
+	store.create("job_child")
+	store.set_status("job_child", "inference")
+	store.complete("job_child", {"clauses": [{"clause_id": "c_0001"}]})
+
+
+def test_jobstore_lifecycle_visible_across_processes(tmp_path):
+	path = tmp_path / "jobs.db"
+	proc = mp.get_context("spawn").Process(target=_child_writes, args=(str(path),))
+	proc.start()
+	proc.join(60)
+	assert proc.exitcode == 0
+
+	store = SQLiteJobStore(path)
+	state = store.get("job_child")
+	assert state["status"] == "completed" and state["duration_s"] is not None
+	assert [e["status"] for e in store.events("job_child")] == ["queued", "inference", "completed"]
+	assert store.get_result("job_child") == {"clauses": [{"clause_id": "c_0001"}]}
+
+	store.create("job_bad")
+	store.fail("job_bad", "boom")
+	assert store.get("job_bad")["error"] == "boom"
+	assert store.get_result("job_bad") is None
+	assert store.get("missing") is None
+
+
+def test_status_endpoint_under_load_keeps_event_loop_responsive(tmp_path, monkeypatch):
+	import httpx
+	from fastapi import FastAPI
+	from app_api import serving
+	from app_api.auth import require_auth
+
+	store = SQLiteJobStore(tmp_path / "jobs.db")
+	slow_get = store.get
+	lock = threading.Lock()
+	in_flight = [0, 0]  # current, max
+	release = threading.Event()
+
+	def get(job_id):
+		# Block like a slow disk / contended WAL until the event loop has proven it is still running
+		with lock:
+			in_flight[0] += 1
+			in_flight[1] = max(in_flight)
+		if not release.wait(5):
+			release.set()  # the loop is stuck behind this read; let the rest through so the test fails fast
+		with lock:
+			in_flight[0] -= 1
+		return slow_get(job_id)
+
+	monkeypatch.setattr(store, "get", get)
+	monkeypatch.setattr(serving, "JOB_STORE", store)
+	monkeypatch.setattr(serving, "enforce_doc_access", lambda job_id, payload: None)
+	app = FastAPI()
+	app.include_router(serving.router)
+	app.dependency_overrides[require_auth] = lambda: {"ws": "ws", "role": "Admin"}
+
+	job_ids = [f"job_{i}" for i in range(20)]
+	for j in job_ids:
+		store.create(j)
+	stop = threading.Event()
+
+	def writer():
+		i = 0
+		while not stop.is_set():
+			store.set_status(job_ids[i % len(job_ids)], "inference")
+			i += 1
+			time.sleep(0.001)
+
+	n_requests = 200
+
+	async def run():
+		ticks_while_blocked = 0
+
+		async def ticker():
+			# Only runs if the loop is free while status reads are parked in the threadpool
+			nonlocal ticks_while_blocked
+			while not release.is_set():
+				if in_flight[0] >= 2:
+					ticks_while_blocked += 1
+					if ticks_while_blocked >= 3:
+						release.set()
+				await asyncio.sleep(0)
+
+		tick = asyncio.create_task(ticker())
+		transport = httpx.ASGITransport(app=app)
+		async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+			resps = await asyncio.gather(*[client.get(f"/api/status/{job_ids[i % 20]}") for i in range(n_requests)])
+		stop.set()
+		await tick
+		return resps, ticks_while_blocked
+
+	w = threading.Thread(target=writer)
+	w.start()
+	try:
+		resps, ticks_while_blocked = asyncio.run(run())
+	finally:
+		stop.set()
+		release.set()
+		w.join()
+	assert len(resps) == n_requests and all(r.status_code == 200 for r in resps)
+	assert [r.json()["job_id"] for r in resps] == [job_ids[i % 20] for i in range(n_requests)]
+	assert all(r.json()["status"] in ("queued", "inference") for r in resps)
+	# Store reads overlap in the threadpool instead of serializing on the loop
+	assert in_flight[1] >= 2 and ticks_while_blocked >= 3
+
+
+def test_jobstore_queue_claims_are_exclusive_and_expired_leases_requeue(tmp_path):
+	store = SQLiteJobStore(tmp_path / "jobs.db")
+	for i in range(20):
+		store.enqueue(f"job_{i}", meta={"filename": f"{i}.pdf"})
+	store.create("job_inline")  # inline jobs are never handed to workers
+	assert store.queue_depth() == 20
+
+	claimed = []
+
+	def grab(worker_id):
+		while True:
+			job = store.claim(worker_id, lease_seconds=30)
+			if not job:
+				return
+			claimed.append(job["job_id"])
+
+	threads = [threading.Thread(target=grab, args=(f"w{i}",)) for i in range(4)]
+	for t in threads:
+		t.start()
+	for t in threads:
+		t.join()
+	assert sorted(claimed) == sorted(f"job_{i}" for i in range(20))
+	assert store.queue_depth() == 0
+
+	# simulate a crashed worker: its lease runs out without heartbeats
+	store.enqueue("job_crash")
+	assert store.claim("dead", lease_seconds=0.01)["job_id"] == "job_crash"
+	assert not store.heartbeat("job_crash", "someone-else", 30)
+	time.sleep(0.05)
+	assert store.requeue_expired(max_attempts=2) == 1
+	job = store.claim("alive", lease_seconds=0.01)
+	assert job["job_id"] == "job_crash" and job["attempts"] == 2
+	time.sleep(0.05)
+	store.requeue_expired(max_attempts=2)
+	assert store.get("job_crash")["status"] == "failed"
+
+
+def test_late_finish_from_an_expired_lease_is_ignored(tmp_path):
+	store = SQLiteJobStore(tmp_path / "jobs.db")
+	store.enqueue("job_slow")
+	assert store.claim("w1", lease_seconds=0.01)["job_id"] == "job_slow"
+	time.sleep(0.02)
+	store.requeue_expired(max_attempts=3)
+	assert store.claim("w2", lease_seconds=30)["job_id"] == "job_slow"
+
+	assert not store.complete("job_slow", {"from": "w1"}, "w1")
+	assert not store.fail("job_slow", "late", "w1")
+	state = store.get("job_slow")
+	assert state["status"] == "claimed" and state["worker"] == "w2" and store.get_result("job_slow") is None
+	assert store.complete("job_slow", {"from": "w2"}, "w2")
+	assert store.get_result("job_slow") == {"from": "w2"}
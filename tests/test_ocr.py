@@ -0,0 +1,66 @@
+import shutil
+
+import pytest
+
+from utils.preprocess import boxes_to_points, ocr_image, ocr_scanned_pdf
+
+pytestmark = pytest.mark.skipif(
+	not (shutil.which("pdftoppm") and shutil.which("tesseract")), reason="poppler/tesseract not installed"
+)
+
+
+def _scanned_pdf(pages: int) -> bytes:
+	import fitz
+	doc = fitz.open()
+	for n in range(1, pages + 1):
+		src = fitz.open()
+		page = src.new_page()
+		page.insert_text((72, 72), f"{n}. Termination", fontsize=14)
+		page.insert_text((72, 100), "Either party may terminate upon thirty days notice.", fontsize=12)
+		pix = page.get_pixmap(dpi=150)
+		out = doc.new_page(width=page.rect.width, height=page.rect.height)
+		out.insert_image(out.rect, stream=pix.tobytes("png"))
+	return doc.tobytes()
+
+
+def test_windowed_parallel_ocr_matches_whole_document_conversion():
+	from pdf2image import convert_from_bytes
+	pdf = _scanned_pdf(4)
+	expected = [boxes_to_points(ocr_image(img, i, psm=6), 300) for i, img in enumerate(convert_from_bytes(pdf, fmt="png", dpi=300), start=1)]
+	strip = lambda pages: [{k: v for k, v in p.items() if k != "ocr_settings"} for p in pages]
+	parallel = ocr_scanned_pdf(pdf, psm=6, workers=2, window=2)
+	assert parallel["page_count"] == 4
+	assert strip(parallel.to_dict()["pages"]) == expected
+	assert strip(ocr_scanned_pdf(pdf, psm=6, workers=1).to_dict()["pages"]) == expected
+
+
+def test_hybrid_pdf_only_ocrs_scanned_pages():
+	import fitz
+	from utils.preprocess import preprocess_file
+	doc = fitz.open()
+	doc.new_page().insert_text((72, 72), "1. Term. This Agreement starts today.")
+	doc.insert_pdf(fitz.open(stream=_scanned_pdf(1), filetype="pdf"))
+	out = preprocess_file(doc.tobytes(), "hybrid.pdf")
+	assert out["type"] == "pdf_hybrid" and out["page_count"] == 2
+	assert [p["page_kind"] for p in out["pages"]] == ["text", "scanned"]
+	assert "ocr_avg_conf" not in out["pages"][0] and "ocr_avg_conf" in out["pages"][1]
+	# OCR boxes are in PDF points like the text layer, not in raster pixels
+	width, height = doc[1].rect.width, doc[1].rect.height
+	assert all(b["bbox"]["x"] + b["bbox"]["w"] <= width and b["bbox"]["y"] + b["bbox"]["h"] <= height for b in out["pages"][1]["blocks"])
+
+
+def test_persistent_engine_matches_pytesseract_words():
+	from PIL import Image
+	import io
+	import fitz
+	from utils import ocr_engine
+	if not ocr_engine._tesserocr_ready():
+		pytest.skip("tesserocr or its tessdata not installed")
+	page = fitz.open(stream=_scanned_pdf(1), filetype="pdf")[0]
+	img = Image.open(io.BytesIO(page.get_pixmap(dpi=300).tobytes("png")))
+	words = lambda data: [t.strip() for t in data["text"] if t.strip()]
+	persistent = ocr_engine.TesserocrEngine()
+	expected = words(ocr_engine.PytesseractEngine().image_to_data(img, "eng", 6))
+	assert words(persistent.image_to_data(img, "eng", 6)) == expected
+	assert words(persistent.image_to_data(img, "eng", 6)) == expected
+	persistent.close()
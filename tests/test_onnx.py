@@ -0,0 +1,72 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("onnx")
+
+from ml.infer import RiskClassifier
+from ml.export_onnx import PARITY_ATOL, PARITY_FILE, export_onnx
+
+LABELS = ["Financial", "Compliance", "Liability", "Operational", "Safe"]
+TEXTS = [
+	"Vendor shall indemnify the Customer for all losses.",
+	"Payment of fees is due within 30 days of invoice.",
+	"The parties shall comply with GDPR.",
+	"Uptime of 99.9% applies.",
+]
+
+
+@pytest.fixture(scope="module")
+def tiny_model_dir(tmp_path_factory):
+	from tokenizers import ByteLevelBPETokenizer
+	from transformers import RobertaConfig, RobertaForSequenceClassification, RobertaTokenizerFast
+	d = tmp_path_factory.mktemp("tiny_roberta")
+	bpe = ByteLevelBPETokenizer()
+	bpe.train_from_iterator(TEXTS * 20, vocab_size=300, min_frequency=1, special_tokens=["<s>", "<pad>", "</s>", "<unk>", "<mask>"])
+	bpe.save_model(str(d))
+	tok = RobertaTokenizerFast(vocab_file=str(d / "vocab.json"), merges_file=str(d / "merges.txt"), model_max_length=256)
+	cfg = RobertaConfig(
+		vocab_size=tok.vocab_size, hidden_size=32, num_hidden_layers=2, num_attention_heads=2,
+		intermediate_size=64, max_position_embeddings=300, num_labels=len(LABELS), pad_token_id=1,
+		problem_type="multi_label_classification",
+	)
+	RobertaForSequenceClassification(cfg).save_pretrained(str(d))
+	tok.save_pretrained(str(d))
+	(d / "labels.json").write_text(json.dumps({"labels": LABELS}))
+	export_onnx(str(d))
+	return str(d)
+
+
+def _logits(model):
+	enc = model.tokenizer(TEXTS, truncation=True, max_length=256, padding=True,
+		return_tensors=("np" if model.session is not None else "pt"))
+	return np.asarray(model._logits(enc))
+
+
+@pytest.mark.parametrize("backend", ["onnx", "onnx-int8"])
+def test_onnx_logits_match_torch(tiny_model_dir, backend):
+	ref = RiskClassifier(tiny_model_dir, backend="torch")
+	alt = RiskClassifier(tiny_model_dir, backend=backend)
+	assert alt.backend == backend
+	np.testing.assert_allclose(_logits(alt), _logits(ref), atol=PARITY_ATOL[backend])
+	assert json.loads((Path(tiny_model_dir) / PARITY_FILE).read_text())[backend]["passed"]
+
+
+def test_onnx_backend_refuses_missing_or_unchecked_export(tiny_model_dir, tmp_path):
+	import shutil
+	d = tmp_path / "model"
+	shutil.copytree(tiny_model_dir, d)
+	record = json.loads((d / PARITY_FILE).read_text())
+	record["onnx-int8"]["passed"] = False
+	(d / PARITY_FILE).write_text(json.dumps(record))
+	with pytest.raises(RuntimeError, match="parity"):
+		RiskClassifier(str(d), backend="onnx-int8")
+	(d / "model.onnx").write_bytes(b"re-exported")
+	with pytest.raises(RuntimeError, match="parity"):
+		RiskClassifier(str(d), backend="onnx")
+	(d / "model.onnx").unlink()
+	with pytest.raises(FileNotFoundError):
+		RiskClassifier(str(d), backend="onnx")
@@ -0,0 +1,138 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.features import extract_features_for_clause
+from utils.pipeline import SERVING_FEATURE_PROFILE, iter_page_clauses
+from utils.segmenter import segment_pages_to_clauses
+
+
+def _pages(n):
+	pages = []
+	for p in range(1, n + 1):
+		blocks = []
+		if p % 2:
+			blocks.append({"text": f"{p}. Section {p}", "bbox": {"x":0,"y":0,"w":100,"h":10}})
+		blocks.append({"text": "The Supplier shall indemnify the Customer. Payment is due within 30 days.", "bbox": {"x":0,"y":12,"w":200,"h":10}})
+		blocks.append({"text": "Notwithstanding the foregoing, neither party may assign this Agreement.", "bbox": {"x":0,"y":24,"w":200,"h":10}})
+		pages.append({"page_number": p, "blocks": blocks})
+	return pages
+
+
+def test_parallel_pages_match_sequential():
+	pages = _pages(6)
+	expected = [extract_features_for_clause(c, SERVING_FEATURE_PROFILE) for c in segment_pages_to_clauses(pages)]
+	with ProcessPoolExecutor(max_workers=2) as pool:
+		got = [c for page in iter_page_clauses(pages, pool) for c in page]
+	assert got == expected
+	assert [c for page in iter_page_clauses(pages) for c in page] == expected
+
+
+def test_revised_upload_reuses_unchanged_pages(tmp_path, monkeypatch):
+	from types import SimpleNamespace
+	from app_api import serving
+	from app_api.jobstore import SQLiteJobStore
+	from utils.docmodel import ColumnarDocument
+
+	store = SQLiteJobStore(tmp_path / "jobs.db")
+	scored = []
+
+	def fake_predict(texts, model_tag, predict):
+		scored.extend(texts)
+		return [[{"label": "Liability", "score": 0.9 if "indemnify" in t else 0.1}] for t in texts], {"hits": 0, "misses": len(texts), "computed": len(texts)}
+
+	versions = {"v1.pdf": _pages(3)}
+	versions["v2.pdf"] = [dict(p) for p in versions["v1.pdf"]]
+	versions["v2.pdf"][1] = {**versions["v1.pdf"][1], "blocks": versions["v1.pdf"][1]["blocks"][:1] + [{"text": "Either party may terminate on notice.", "bbox": {"x": 0, "y": 24, "w": 200, "h": 10}}]}
+	monkeypatch.setattr(serving, "JOB_STORE", store)
+	monkeypatch.setattr(serving, "preprocess_file", lambda source, filename, reuse=None: ColumnarDocument.from_dict({"type": "pdf_text", "pages": versions[filename]}))
+	monkeypatch.setattr(serving.MODELS, "acquire", lambda *a: SimpleNamespace(tag="m1"))
+	monkeypatch.setattr(serving.CLAUSE_CACHE, "predict", fake_predict)
+	monkeypatch.setattr(serving, "detect_drift", lambda texts: {})
+
+	store.create("v1")
+	first = serving._run_pipeline("v1", b"", "v1.pdf")
+	store.complete("v1", first)
+	scored.clear()
+	store.create("v2")
+	second = serving._run_pipeline("v2", b"", "v2.pdf", base_job_id="v1")
+	changed = [r for r in second["clauses"] if not r["reused"]]
+	assert changed and len(scored) == len(changed)
+
+	fresh = serving._run_pipeline("v3", b"", "v2.pdf")
+	assert [{k: v for k, v in r.items() if k != "reused"} for r in second["clauses"]] == [{k: v for k, v in r.items() if k != "reused"} for r in fresh["clauses"]]
+	assert all(r["page"] == 2 for r in changed)
+	assert all(r["reused"] for r in second["clauses"] if r["page"] != 2)
+	inc = second["summary"]["incremental"]
+	assert inc["pages_reused"] == 2 and inc["pages_recomputed"] == 1
+	assert inc["clauses_reused"] + inc["clauses_recomputed"] == len(second["clauses"]) and inc["clauses_recomputed"] == len(changed)
+
+
+def test_text_pdf_results_carry_line_boxes(tmp_path, monkeypatch):
+	from types import SimpleNamespace
+	import fitz
+	from fastapi import FastAPI
+	from fastapi.testclient import TestClient
+	from app_api import serving
+	from app_api.auth import require_auth
+	from app_api.jobstore import SQLiteJobStore
+
+	doc = fitz.open()
+	page = doc.new_page()
+	clause = "The Supplier shall indemnify the Customer against all losses arising from any breach of this Agreement by the Supplier or its subcontractors."
+	page.insert_textbox(fitz.Rect(72, 100, 300, 400), clause, fontsize=11)
+
+	store = SQLiteJobStore(tmp_path / "jobs.db")
+	monkeypatch.setattr(serving, "JOB_STORE", store)
+	monkeypatch.setattr(serving, "enforce_doc_access", lambda job_id, payload: None)
+	monkeypatch.setattr(serving.MODELS, "acquire", lambda *a: SimpleNamespace(tag="m1"))
+	monkeypatch.setattr(serving.CLAUSE_CACHE, "predict", lambda texts, tag, predict: ([[{"label": "Liability", "score": 0.9}] for _ in texts], {"hits": 0, "misses": len(texts), "computed": len(texts)}))
+	monkeypatch.setattr(serving, "detect_drift", lambda texts: {})
+	store.create("pdf1")
+	store.complete("pdf1", serving._run_pipeline("pdf1", doc.tobytes(), "contract.pdf"))
+
+	app = FastAPI()
+	app.include_router(serving.router)
+	app.dependency_overrides[require_auth] = lambda: {"ws": "ws", "role": "Admin"}
+	rows = TestClient(app).get("/api/results/pdf1").json()["clauses"]
+	row = next(r for r in rows if r["text"].startswith("The Supplier shall indemnify"))
+	boxes = row["bounding_boxes"]
+	# The clause wraps over several lines inside the 228pt wide text box: one box per line
+	assert len(boxes) >= 3
+	assert all(72 <= b["x"] and b["x"] + b["w"] <= 301 and b["h"] < 20 for b in boxes)
+	assert [b["y"] for b in boxes] == sorted(b["y"] for b in boxes)
+	assert store.pages("pdf1")[0]["page"] is not None
+
+
+def test_cache_hit_job_can_be_a_revision_base(tmp_path, monkeypatch):
+	from fastapi import FastAPI
+	from fastapi.testclient import TestClient
+	from app_api import main, serving
+	from app_api.auth import require_auth
+	from app_api.jobstore import SQLiteJobStore
+
+	store = SQLiteJobStore(tmp_path / "jobs.db")
+	monkeypatch.setattr(serving, "JOB_STORE", store)
+	monkeypatch.setattr(serving, "enforce_doc_access", lambda job_id, payload: None)
+	monkeypatch.setattr(serving, "upload_sha256", lambda job_id: "sha")
+	monkeypatch.setattr(serving, "doc_workspace", lambda job_id: "ws")
+	monkeypatch.setattr(main, "STORAGE_DIR", tmp_path)
+	for job_id in ("hit", "revision"):
+		(tmp_path / f"{job_id}.bin").write_bytes(b"x")
+	record = {"page_number": 1, "fingerprint": "fp1", "source_fp": None, "page": None, "analysis": {"entries": [], "preds": []}}
+	store.create("src")
+	store.save_pages("src", [record])
+	store.complete("src", {"clauses": []})
+	store.create("purged")
+	store.complete("purged", {"clauses": []})
+	cached = {"summary": {"total_clauses": 0, "incremental": {"base_job_id": "older"}}, "clauses": [], "source_job_id": "src"}
+	monkeypatch.setattr(serving, "cache_get", lambda *key: dict(cached))
+
+	app = FastAPI()
+	app.include_router(serving.router)
+	app.dependency_overrides[require_auth] = lambda: {"ws": "ws", "role": "Admin"}
+	client = TestClient(app)
+	assert client.post("/api/analyze/hit").json()["status"] == "completed"
+	assert store.pages("hit") == [record]
+	assert "incremental" not in store.get_result("hit")["summary"]
+	assert "source_job_id" not in store.get_result("hit")
+	resp = client.post("/api/analyze/revision", params={"base_job_id": "purged"})
+	assert resp.status_code == 409
@@ -0,0 +1,22 @@
+from utils import pools
+
+
+def test_cgroup_quota_caps_available_cpus(tmp_path, monkeypatch):
+	cpu_max = tmp_path / "cpu.max"
+	monkeypatch.setattr(pools, "CGROUP_CPU_MAX", str(cpu_max))
+	monkeypatch.setattr(pools.os, "sched_getaffinity", lambda pid: set(range(32)), raising=False)
+	cpu_max.write_text("150000 100000\n")
+	assert pools.available_cpus() == 2
+	cpu_max.write_text("max 100000\n")
+	assert pools.available_cpus() == 32
+
+
+def test_per_job_workers_splits_cpus_between_jobs(monkeypatch):
+	monkeypatch.setattr(pools, "available_cpus", lambda: 8)
+	monkeypatch.delenv("PAGE_WORKERS", raising=False)
+	monkeypatch.setenv("WORKER_CONCURRENCY", "4")
+	assert pools.per_job_workers("PAGE_WORKERS") == 2
+	monkeypatch.setenv("WORKER_CONCURRENCY", "16")
+	assert pools.per_job_workers("PAGE_WORKERS") == 1
+	monkeypatch.setenv("PAGE_WORKERS", "3")
+	assert pools.per_job_workers("PAGE_WORKERS") == 3
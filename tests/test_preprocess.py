@@ -1,7 +1,7 @@
 import io
 import pytest
 
-from utils.preprocess import preprocess_file, detect_pdf_has_text
+from utils.preprocess import preprocess_file
 
 
 def test_text_pdf_minimal():
@@ -23,3 +23,159 @@ def test_docx_minimal(tmp_path):
 	out = preprocess_file(buf.getvalue(), "x.docx")
 	assert out["type"] == "docx"
 	assert out["page_count"] == 1
+
+
+def test_pages_are_routed_to_text_layer_or_ocr():
+	import fitz
+	from utils.preprocess import classify_pdf_page, extract_pdf_hybrid, extract_pdf_text_layout
+	src = fitz.open()
+	scan = src.new_page()
+	scan.insert_text((72, 72), "Exhibit A", fontsize=14)
+	png = scan.get_pixmap(dpi=100).tobytes("png")
+
+	doc = fitz.open()
+	doc.new_page().insert_text((72, 72), "1. Term. This Agreement starts today.")
+	doc.new_page().insert_image(fitz.Rect(0, 0, 595, 842), stream=png)
+	mixed = doc.new_page()
+	mixed.insert_text((72, 40), "Schedule 1")
+	mixed.insert_image(fitz.Rect(50, 60, 550, 800), stream=png)
+	pdf = fitz.open(stream=doc.tobytes(), filetype="pdf")
+	assert [classify_pdf_page(p, p.get_text("blocks")) for p in pdf] == ["text", "scanned", "mixed"]
+
+	text_only = fitz.open()
+	text_only.new_page().insert_text((72, 72), "1. Term. This Agreement starts today.")
+	text_only.new_page().insert_text((72, 72), "2. Fees. Payment is due in 30 days.")
+	data = text_only.tobytes()
+	out = extract_pdf_hybrid(data)
+	assert out["type"] == "pdf_text"
+	assert [{k: v for k, v in p.items() if k != "page_kind"} for p in out.to_dict()["pages"]] == extract_pdf_text_layout(data).to_dict()["pages"]
+
+	page = out.pages[1]
+	start = page.text.index("Payment")
+	[box] = page.span_boxes(start, start + len("Payment"))
+	word = fitz.open(stream=data, filetype="pdf")[1].search_for("Payment")[0]
+	assert abs(box["x"] - word.x0) < 1 and abs(box["x"] + box["w"] - word.x1) < 1
+	assert box["w"] < page.bbox(0)["w"]
+
+
+def test_adaptive_ocr_escalates_only_low_confidence_pages(monkeypatch):
+	from utils import preprocess
+	conf = {(1, 150): 92.0, (2, 150): 40.0, (2, 300): 71.0, (3, 150): 30.0, (3, 300): 85.0}
+	calls = []
+
+	def fake_ocr(pdf_path, page_number, language, dpi, psm):
+		calls.append((page_number, dpi, psm))
+		c = conf.get((page_number, dpi), 50.0) if psm == 6 else 60.0
+		return {"page_number": page_number, "blocks": [], "ocr_avg_conf": c, "needs_review": c < 60.0}
+
+	monkeypatch.setattr(preprocess, "_ocr_pdf_page_at", fake_ocr)
+	ladder = [(150, 6), (300, 6), (300, 3)]
+	pages = [preprocess.ocr_pdf_page(n, ladder=ladder, pdf_path="x.pdf", target=80) for n in (1, 2, 3)]
+	assert [p["ocr_settings"] for p in pages] == [
+		{"dpi": 150, "psm": 6, "attempts": 1, "cache_hits": 0},
+		{"dpi": 300, "psm": 6, "attempts": 3, "cache_hits": 0},
+		{"dpi": 300, "psm": 6, "attempts": 2, "cache_hits": 0},
+	]
+	assert [c for c in calls if c[0] == 2] == [(2, 150, 6), (2, 300, 6), (2, 300, 3)]
+
+
+def test_ocr_page_cache_skips_tesseract_for_repeated_pages(tmp_path, monkeypatch):
+	from PIL import Image
+	from utils import preprocess
+	from utils.ocr_cache import OCRPageCache, page_stats
+
+	cache = OCRPageCache(tmp_path / "ocr.db", max_bytes=2_000)
+	letterhead = Image.new("L", (40, 20), 255)
+	runs = []
+
+	def fake_ocr_image(img, page_number, language="eng", psm=3):
+		runs.append(page_number)
+		return {"page_number": page_number, "blocks": [{"text": "ACME", "bbox": {"x": 1, "y": 2, "w": 3, "h": 4}}], "ocr_avg_conf": 95.0, "needs_review": False}
+
+	monkeypatch.setattr(preprocess, "get_ocr_cache", lambda: cache)
+	monkeypatch.setattr(preprocess, "convert_from_path", lambda *a, **k: [letterhead.copy()])
+	monkeypatch.setattr(preprocess, "ocr_image", fake_ocr_image)
+	pages = [preprocess.ocr_pdf_page(n, ladder=[(150, 6)], pdf_path="x.pdf") for n in (1, 2, 3)]
+	assert runs == [1]
+	assert [p["page_number"] for p in pages] == [1, 2, 3]
+	# 150 dpi pixels -> PDF points, also for pages served from the cache
+	assert pages[2]["blocks"] == pages[0]["blocks"] == [{"text": "ACME", "bbox": {"x": 0.48, "y": 0.96, "w": 1.44, "h": 1.92}}]
+	assert page_stats(pages) == {"hits": 2, "misses": 1}
+
+	for i in range(200):
+		cache.put(f"k{i}", {"blocks": [{"text": str(i) * 50}]})
+	assert cache.total_bytes() <= 2_000
+	assert cache.get("k199") is not None and cache.get("k0") is None
+
+
+def test_ocr_engine_falls_back_to_pytesseract(monkeypatch):
+	from utils import ocr_engine
+	monkeypatch.setattr(ocr_engine, "tesserocr", None)
+	assert isinstance(ocr_engine.make_engine("auto"), ocr_engine.PytesseractEngine)
+	assert isinstance(ocr_engine.make_engine("pytesseract"), ocr_engine.PytesseractEngine)
+	with pytest.raises(RuntimeError):
+		ocr_engine.make_engine("tesserocr")
+
+
+def test_docx_stream_matches_python_docx_and_adds_tables_headers_footers():
+	pytest.importorskip("docx")
+	from docx import Document
+	from docx.oxml import parse_xml
+	from docx.oxml.ns import nsdecls
+	from utils.preprocess import _normalize_text, parse_docx_with_styles
+
+	doc = Document()
+	doc.sections[0].header.paragraphs[0].text = "ACME Confidential"
+	doc.sections[0].footer.paragraphs[0].text = "Page footer"
+	doc.add_heading("1. Definitions", level=1)
+	doc.add_paragraph("Affiliate means\tany entity.")
+	item = doc.add_paragraph("First item", style="List Number")
+	item._p.get_or_add_pPr().append(parse_xml(f'<w:numPr {nsdecls("w")}><w:ilvl w:val="0"/><w:numId w:val="3"/></w:numPr>'))
+	table = doc.add_table(rows=1, cols=2)
+	table.cell(0, 0).text = "Fee"
+	table.cell(0, 1).text = "USD 100"
+	table.cell(0, 1).add_paragraph("per month")
+	doc.add_paragraph("Closing clause.")
+	buf = io.BytesIO()
+	doc.save(buf)
+
+	blocks = [b.to_dict() for b in parse_docx_with_styles(buf.getvalue())["pages"][0]["blocks"]]
+	body = [(b["text"], b["style"], b["num"]) for b in blocks if b["part"] == "body"]
+	reference = Document(io.BytesIO(buf.getvalue()))
+	assert body == [
+		(_normalize_text(p.text), p.style.name, p._p.pPr.numPr.numId.val if p._p.pPr is not None and p._p.pPr.numPr is not None else None)
+		for p in reference.paragraphs if _normalize_text(p.text)
+	]
+	assert [(b["part"], b["text"]) for b in blocks if b["part"] != "body"] == [
+		("header", "ACME Confidential"), ("table", "Fee"), ("table", "USD 100 per month"), ("footer", "Page footer"),
+	]
+	assert [b["text"] for b in blocks].index("Fee") == [b["text"] for b in blocks].index("First item") + 1
+	assert all(b["char_start"] < b["char_end"] for b in blocks)
+
+
+def test_unchanged_scanned_pages_reuse_prior_ocr(monkeypatch):
+	import fitz
+	from utils import preprocess
+	src = fitz.open()
+	scan = src.new_page()
+	scan.insert_text((72, 72), "Exhibit A", fontsize=14)
+	png = scan.get_pixmap(dpi=100).tobytes("png")
+	ocr_calls = []
+
+	def fake_iter_ocr_pages(source, page_numbers=None, **kw):
+		ocr_calls.append(list(page_numbers))
+		for n in page_numbers:
+			yield {"page_number": n, "blocks": [{"text": "Exhibit", "bbox": {"x": 1, "y": 2, "w": 3, "h": 4}, "char_start": 0, "char_end": 7}], "ocr_settings": {"dpi": 150, "psm": 6, "attempts": 1, "cache_hits": 0}}
+
+	def build(first_text):
+		doc = fitz.open()
+		doc.new_page().insert_text((72, 72), first_text)
+		doc.new_page().insert_image(fitz.Rect(0, 0, 595, 842), stream=png)
+		return doc.tobytes()
+
+	monkeypatch.setattr(preprocess, "iter_ocr_pages", fake_iter_ocr_pages)
+	v1 = preprocess.extract_pdf_hybrid(build("1. Term. One year."))
+	prior = {p["source_fp"]: p for p in v1.pages if "source_fp" in p}
+	v2 = preprocess.extract_pdf_hybrid(build("1. Term. Two years."), reuse=prior)
+	assert ocr_calls == [[2]] and v2["type"] == "pdf_hybrid"
+	assert v2.pages[1]["ocr_reused"] and v2.pages[1].text == v1.pages[1].text
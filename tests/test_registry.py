@@ -0,0 +1,37 @@
+import threading
+
+from app_api.registry import ModelRegistry
+from ml.infer import RiskClassifier
+
+
+def _counting_loader(calls):
+	def _load(model_dir, backend):
+		calls.append(model_dir)
+		return RiskClassifier(model_dir, backend)
+	return _load
+
+
+def test_registry_loads_once_across_threads(tmp_path):
+	calls = []
+	reg = ModelRegistry(loader=_counting_loader(calls), check_interval=60)
+	seen = []
+	threads = [threading.Thread(target=lambda: seen.append(reg.get(str(tmp_path), "v1"))) for _ in range(8)]
+	for t in threads:
+		t.start()
+	for t in threads:
+		t.join()
+	assert len(calls) == 1
+	assert all(m is seen[0] for m in seen)
+
+
+def test_registry_hot_swaps_on_artifact_change_and_evicts(tmp_path):
+	calls = []
+	reg = ModelRegistry(loader=_counting_loader(calls), check_interval=0, max_models=1)
+	first = reg.get(str(tmp_path), "v1")
+	assert reg.get(str(tmp_path), "v1") is first
+	(tmp_path / "labels.json").write_text("{}")
+	second = reg.get(str(tmp_path), "v1")
+	assert second is not first
+	reg.get(str(tmp_path), "v2")
+	assert len(reg.loaded()) == 1
+	assert len(calls) == 3
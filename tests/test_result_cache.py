@@ -0,0 +1,26 @@
+from app_api import result_cache
+
+
+def _use_tmp_db(tmp_path, monkeypatch, max_bytes=10 ** 9):
+	monkeypatch.setattr(result_cache, "DB_PATH", tmp_path / "meta.db")
+	monkeypatch.setattr(result_cache, "RESULT_CACHE_MAX_BYTES", max_bytes)
+	result_cache.db_init()
+
+
+def test_result_cache_roundtrip_is_workspace_scoped(tmp_path, monkeypatch):
+	_use_tmp_db(tmp_path, monkeypatch)
+	out = {"job_id": "job_a", "document_name": "a.pdf", "summary": {"total_clauses": 1}, "clauses": [{"clause_id": "c_0001"}]}
+	result_cache.cache_put("abc", "v1", "cfg", "ws1", out)
+	hit = result_cache.cache_get("abc", "v1", "cfg", "ws1")
+	assert hit == {"summary": {"total_clauses": 1}, "clauses": [{"clause_id": "c_0001"}], "source_job_id": "job_a"}
+	assert result_cache.cache_get("abc", "v1", "cfg", "ws2") is None
+	assert result_cache.cache_get("abc", "v2", "cfg", "ws1") is None
+
+
+def test_result_cache_evicts_least_recently_used(tmp_path, monkeypatch):
+	_use_tmp_db(tmp_path, monkeypatch, max_bytes=100)
+	big = {"clauses": [{"text": f"clause {i} " * 20} for i in range(3)]}
+	result_cache.cache_put("old", "v1", "cfg", "ws", big)
+	result_cache.cache_put("new", "v1", "cfg", "ws", big)
+	assert result_cache.cache_get("old", "v1", "cfg", "ws") is None
+	assert result_cache.cache_get("new", "v1", "cfg", "ws") is not None
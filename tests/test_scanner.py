@@ -0,0 +1,48 @@
+import random
+
+from utils.features import _placeholderize
+from utils.pii import detect_pii, redact
+from utils.scanner import PATTERNS, scan
+
+FRAGMENTS = ["$", "€", "£", "$1,000", "$12", "12/05/2020", "1/2/33/44/55", "Jan 5, 2020", "March 12 2021", "30 days",
+	"12 %", "5%", "a@b.com", "admin@example.org", "www.x.com", "https://e.com/p", "123-45-6789", "+1 555 123 4567",
+	"555-123-4567", "12345", "2020", "1", "22", " ", "  ", "-", "/", ",", ".", "abc", "x", "9", "\n", "Sept", "quarter", "%",
+	"ſept 5, 2020", "١٢٣٤", "x.y@z.io1a@b.cc", "HTTP://A", "+"]
+
+
+def _reference_placeholderize(text):
+	text = PATTERNS["money"].sub(" [MONEY] ", text)
+	text = PATTERNS["date"].sub(" [DATE] ", text)
+	text = PATTERNS["number"].sub(" [NUM] ", text)
+	return " ".join(text.split())
+
+
+def _reference_redact(text, mask="█"):
+	red = PATTERNS["email"].sub(mask * 8, text)
+	red = PATTERNS["ssn"].sub(mask * 11, red)
+	return PATTERNS["phone"].sub(mask * 8, red)
+
+
+def test_scanner_matches_sequential_regexes():
+	rnd = random.Random(5)
+	for _ in range(5000):
+		text = "".join(rnd.choice(FRAGMENTS) for _ in range(rnd.randint(0, 12)))
+		spans = scan(text)
+		for kind, pattern in PATTERNS.items():
+			assert spans.spans[kind] == [m.span() for m in pattern.finditer(text)], (kind, text)
+		assert _placeholderize(text) == _reference_placeholderize(text), text
+		assert redact(text) == _reference_redact(text), text
+		assert redact(text, "*") == _reference_redact(text, "*"), text
+		assert redact(text, "X") == _reference_redact(text, "X"), text
+		pii = detect_pii(text, spans)
+		assert pii["emails"] == PATTERNS["email"].findall(text) and pii["phones"] == PATTERNS["phone"].findall(text)
+
+
+def test_scanner_handles_replacement_boundaries():
+	# Masking the email leaves a word boundary in front of the SSN that the raw text lacks
+	text = "mail a@b.com123-45-6789 or 1/2/33/44 now"
+	spans = scan(text)
+	assert [(s.kind, text[s.start:s.end]) for s in spans.typed_spans()] == [("email", "a@b.com"), ("number", "6789"), ("date", "1/2/33")]
+	assert spans.texts("ssn") == []
+	assert redact(text) == "mail " + "█" * 19 + " or 1/2/33/44 now" == _reference_redact(text)
+	assert _placeholderize(text) == _reference_placeholderize(text)
@@ -0,0 +1,38 @@
+import threading
+
+from app_api.scheduler import InferenceScheduler
+
+
+class _EchoModel:
+	def __init__(self):
+		self.batches = []
+
+	def predict_batch(self, texts):
+		self.batches.append(list(texts))
+		return [[{"label": t, "score": 1.0}] for t in texts]
+
+
+def test_scheduler_coalesces_jobs_and_returns_own_slices():
+	model = _EchoModel()
+	sched = InferenceScheduler(lambda: model, max_batch_size=8, max_wait_ms=200)
+	jobs = {f"job{j}": [f"job{j}-c{i}" for i in range(3)] for j in range(3)}
+	out = {}
+	threads = [threading.Thread(target=lambda j=j, t=t: out.__setitem__(j, sched.predict(t))) for j, t in jobs.items()]
+	for t in threads:
+		t.start()
+	for t in threads:
+		t.join()
+	for j, texts in jobs.items():
+		assert [p[0]["label"] for p in out[j]] == texts
+	assert max(len(b) for b in model.batches) > 3
+	assert all(len(b) <= 8 for b in model.batches)
+
+
+def test_scheduler_propagates_model_errors():
+	class _Broken:
+		def predict_batch(self, texts):
+			raise RuntimeError("boom")
+
+	sched = InferenceScheduler(lambda: _Broken(), max_batch_size=4, max_wait_ms=1)
+	fut = sched.submit(["a", "b"])
+	assert isinstance(fut.exception(timeout=5), RuntimeError)
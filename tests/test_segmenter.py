@@ -20,3 +20,88 @@ def test_segment_basic_headings_and_merge():
 	for c in clauses:
 		assert "clause_id" in c and "text" in c and "page" in c
 		assert isinstance(c.get("bounding_boxes", []), list)
+
+
+def _reference_segment_page(page):
+	"""The original quadratic segment_page: per-pattern heading tests, a scan of every
+	heading for each sentence and of every block for each clause."""
+	from utils import segmenter as sg
+
+	def is_heading(line):
+		return any(p.search(line.strip()) for p in sg.HEADING_PATTERNS)
+
+	offset_map, texts, pos = [], [], 0
+	for b in page["blocks"]:
+		offset_map.append((pos, pos + len(b["text"]), b.get("bbox")))
+		texts.append(b["text"])
+		pos += len(b["text"]) + 1
+	full_text = "\n".join(texts)
+	headings = {(s, e): line.strip() for line, s, e in sg._split_lines_keep_offsets(full_text) if is_heading(line)}
+	merged, buf = [], None
+	for text, s, e in sg._spacy_sentences(full_text):
+		if any(hs <= s < he for hs, he in headings):
+			if buf:
+				merged.append(buf)
+				buf = None
+			merged.append((text, s, e))
+		elif len(text.strip()) < 80:
+			buf = (text, s, e) if not buf else (buf[0] + " " + text, buf[1], e)
+		else:
+			if buf:
+				merged.append(buf)
+				buf = None
+			merged.append((text, s, e))
+	if buf:
+		merged.append(buf)
+
+	entries, leading, section, seen, idx = [], 0, None, False, 0
+	for text, start, end in merged:
+		if any(hs <= start < he for hs, he in headings):
+			section, seen = text.strip(), True
+			continue
+		bboxes = [bb for s, e, bb in offset_map if not (e <= start or s >= end) and bb]
+		idx += 1
+		chunks = sg._chunk_long(text)
+		if len(chunks) == 1:
+			entries.append((idx, None, text.strip(), start, end, bboxes, section))
+		else:
+			entries += [(idx, n, c.strip(), start, end, bboxes, section) for n, c in enumerate(chunks, start=1)]
+		if not seen:
+			leading = len(entries)
+	return sg.PageSegments(int(page.get("page_number", 1)), entries, leading, section if seen else None)
+
+
+def test_segment_page_matches_reference_on_random_pages():
+	import random
+	from utils.docmodel import ColumnarPage
+	from utils.segmenter import segment_page
+
+	words = "the party shall not be liable for any indirect damages payment fees due within days vendor customer agreement".split()
+	heads = ["1. Confidentiality", "2.3) Payment Terms", "Section 4. Liability", "iv. Termination", "Schedule A",
+		"Governing Law", "- bullet item", "• item two", "ARTICLE II. Misc", "  12- indented", "DEFINITIONS"]
+	rnd = random.Random(20240)
+	for _ in range(400):
+		blocks = []
+		for i in range(rnd.randint(0, 25)):
+			if rnd.random() < 0.25:
+				text = rnd.choice(heads)
+			else:
+				text = " ".join(rnd.choice(words) + ("." if rnd.random() < 0.12 else "") for _ in range(rnd.randint(0, 70)))
+				if rnd.random() < 0.1:
+					text += "\n" + rnd.choice(heads) + "\n" + rnd.choice(words).capitalize() + "."
+			blocks.append({"text": text, "bbox": {"x": i, "y": 2 * i, "w": 10, "h": 5} if rnd.random() < 0.85 else None})
+		if rnd.random() < 0.05:
+			blocks.append({"text": " ".join(rnd.choice(words) for _ in range(1300)), "bbox": None})
+		page = {"page_number": rnd.randint(1, 9), "blocks": blocks}
+		expected = _reference_segment_page(page)
+		assert segment_page(page) == expected
+		assert segment_page(ColumnarPage.from_dict(page)) == expected
+
+
+def test_merge_short_can_be_turned_off():
+	pages = [{"page_number": 1, "blocks": [{"text": "Fees are due monthly. Taxes are extra. Late fees apply.", "bbox": {"x": 0, "y": 0, "w": 200, "h": 10}}]}]
+	merged = segment_pages_to_clauses(pages)
+	separate = segment_pages_to_clauses(pages, merge_short=False)
+	assert [c["text"] for c in merged] == ["Fees are due monthly. Taxes are extra. Late fees apply."]
+	assert [c["text"] for c in separate] == ["Fees are due monthly.", "Taxes are extra.", "Late fees apply."]
+	assert all(c["bounding_boxes"] for c in separate)
@@ -0,0 +1,57 @@
+import os
+import stat
+
+import pytest
+from cryptography.fernet import Fernet, InvalidToken
+
+from app_api.storage_crypto import DecryptingReader, EncryptingWriter, derive_key, iter_decrypt, open_plaintext
+
+FERNET_KEY = Fernet.generate_key()
+KEY = derive_key(FERNET_KEY)
+
+
+def _encrypt(path, data, chunk_size=1000, step=337):
+	with EncryptingWriter(path, KEY, chunk_size=chunk_size) as w:
+		for i in range(0, len(data), step):
+			w.write(data[i:i + step])
+	return path
+
+
+def test_chunked_round_trip_and_legacy_fernet(tmp_path):
+	data = os.urandom(5000)  # an exact multiple of the chunk size
+	enc = _encrypt(tmp_path / "a.bin", data)
+	assert data not in enc.read_bytes()
+	assert b"".join(iter_decrypt(enc, KEY)) == data
+	assert DecryptingReader(enc, KEY).read() == data
+	assert b"".join(iter_decrypt(_encrypt(tmp_path / "e.bin", b""), KEY)) == b""
+
+	legacy = tmp_path / "legacy.bin"
+	legacy.write_bytes(Fernet(FERNET_KEY).encrypt(data))
+	assert b"".join(iter_decrypt(legacy, KEY, Fernet(FERNET_KEY))) == data
+
+	with open_plaintext(enc, KEY, suffix=".pdf") as plain:
+		assert plain.read_bytes() == data
+		assert stat.S_IMODE(plain.stat().st_mode) == 0o600
+		assert stat.S_IMODE(plain.parent.stat().st_mode) == 0o700
+	assert not plain.exists() and not plain.parent.exists()
+
+
+@pytest.mark.parametrize("tamper", ["truncate_chunk", "drop_last", "append", "flip", "wrong_key"])
+def test_chunked_container_rejects_tampering(tmp_path, tamper):
+	enc = _encrypt(tmp_path / "a.bin", os.urandom(3500))
+	raw = bytearray(enc.read_bytes())
+	key = KEY
+	chunk = 4 + 1000 + 16
+	if tamper == "truncate_chunk":
+		raw = raw[:-10]
+	elif tamper == "drop_last":
+		raw = raw[:len(raw) - (4 + 500 + 16)]
+	elif tamper == "append":
+		raw += raw[-chunk:]
+	elif tamper == "flip":
+		raw[40] ^= 1
+	else:
+		key = derive_key(Fernet.generate_key())
+	enc.write_bytes(bytes(raw))
+	with pytest.raises(InvalidToken):
+		b"".join(iter_decrypt(enc, key))
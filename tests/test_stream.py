@@ -0,0 +1,57 @@
+import json
+import threading
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app_api import serving
+from app_api.auth import require_auth
+from app_api.jobstore import SQLiteJobStore
+
+
+def _client(tmp_path, monkeypatch):
+	store = SQLiteJobStore(tmp_path / "jobs.db")
+	monkeypatch.setattr(serving, "JOB_STORE", store)
+	monkeypatch.setattr(serving, "enforce_doc_access", lambda job_id, payload: None)
+	monkeypatch.setattr(serving, "STREAM_POLL_SECONDS", 0.01)
+	app = FastAPI()
+	app.include_router(serving.router)
+	app.dependency_overrides[require_auth] = lambda: {"ws": "ws", "role": "Admin"}
+	return TestClient(app), store
+
+
+def _rows(start, n):
+	return [{"clause_id": f"c_{i:04d}", "severity": "Low"} for i in range(start, start + n)]
+
+
+def test_stream_emits_clauses_progressively_and_resumes(tmp_path, monkeypatch):
+	client, store = _client(tmp_path, monkeypatch)
+	store.create("job_s")
+	store.set_status("job_s", "inference")
+	store.append_clauses("job_s", 0, _rows(0, 2))
+	# Second page scored before the first finishes: the stream must wait for the gap
+	store.append_clauses("job_s", 4, _rows(4, 1))
+
+	def finish():
+		time.sleep(0.2)
+		store.append_clauses("job_s", 2, _rows(2, 2))
+		store.complete("job_s", {"clauses": _rows(0, 5)})
+
+	threading.Thread(target=finish).start()
+	with client.stream("GET", "/api/stream/job_s") as resp:
+		assert resp.headers["content-type"].startswith("application/x-ndjson")
+		lines = [json.loads(line) for line in resp.iter_lines() if line]
+	clauses = [l for l in lines if l["event"] == "clause"]
+	assert [c["seq"] for c in clauses] == [0, 1, 2, 3, 4]
+	assert [c["data"]["clause_id"] for c in clauses] == [f"c_{i:04d}" for i in range(5)]
+	assert [l["data"]["status"] for l in lines if l["event"] == "stage"] == ["queued", "inference", "completed"]
+	assert lines[-1] == {"event": "done", "seq": None, "data": {"status": "completed", "error": None, "clauses": 5}}
+
+	resp = client.get("/api/stream/job_s", params={"after": 2})
+	assert [json.loads(l)["seq"] for l in resp.text.splitlines() if json.loads(l)["event"] == "clause"] == [3, 4]
+
+	resp = client.get("/api/stream/job_s", headers={"Accept": "text/event-stream", "Last-Event-ID": "3"})
+	assert resp.headers["content-type"].startswith("text/event-stream")
+	assert "id: 4\nevent: clause\n" in resp.text and "id: 3\n" not in resp.text
+	assert client.get("/api/stream/missing").status_code == 404
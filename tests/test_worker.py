@@ -0,0 +1,108 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app_api.jobstore import SQLiteJobStore
+from app_api.worker import Worker
+
+
+def test_worker_claims_runs_and_heartbeats(tmp_path):
+	store = SQLiteJobStore(tmp_path / "jobs.db")
+	for i in range(5):
+		store.enqueue(f"job_{i}", meta={"filename": f"{i}.pdf"})
+
+	def runner(job_id, meta, worker_id):
+		store.set_status(job_id, "inference")
+		time.sleep(0.05)
+		if job_id == "job_4":
+			raise ValueError("bad document")
+		store.complete(job_id, {"document_name": meta["filename"]}, worker_id)
+
+	worker = Worker(store, worker_id="w1", concurrency=2, lease_seconds=5,
+		executor_factory=lambda n: ThreadPoolExecutor(max_workers=n), runner=runner)
+	deadline = time.time() + 10
+	while (worker.tick() or store.queue_depth()) and time.time() < deadline:
+		assert len(worker.running) <= 2
+		time.sleep(0.01)
+	for i in range(4):
+		assert store.get_result(f"job_{i}") == {"document_name": f"{i}.pdf"}
+	assert store.get("job_4")["status"] == "failed"
+	assert store.get("job_4")["error"] == "bad document"
+
+
+def test_worker_survives_failing_ticks_and_broken_pool(tmp_path):
+	from concurrent.futures.process import BrokenProcessPool
+	import sqlite3
+
+	store = SQLiteJobStore(tmp_path / "jobs.db")
+	store.enqueue("job_0", meta={})
+
+	class BrokenExecutor:
+		def submit(self, *a, **kw):
+			raise BrokenProcessPool("worker died")
+
+		def shutdown(self, **kw):
+			pass
+
+	executors = [BrokenExecutor(), ThreadPoolExecutor(max_workers=1)]
+	worker = Worker(store, worker_id="w1", concurrency=1, lease_seconds=5,
+		executor_factory=lambda n: executors.pop(0), runner=lambda job_id, meta, worker_id: store.complete(job_id, {"ok": True}, worker_id))
+	# The claimed job goes back to the queue and the pool is replaced
+	assert worker.poll(0.01, 1) == 0.01
+	assert not worker.running and store.queue_depth() == 1
+
+	tick = worker.tick
+	failures = iter([sqlite3.OperationalError("database is locked")] * 3)
+
+	def flaky_tick():
+		exc = next(failures, None)
+		if exc:
+			raise exc
+		return tick()
+
+	worker.tick = flaky_tick
+	assert [worker.poll(0.01, 0.03) for _ in range(3)] == [0.01, 0.02, 0.03]
+	deadline = time.time() + 5
+	while store.get("job_0")["status"] != "completed" and time.time() < deadline:
+		assert worker.poll(0.01, 0.03) == 0.01
+		time.sleep(0.01)
+	assert store.get_result("job_0") == {"ok": True}
+
+
+def test_job_that_keeps_breaking_the_pool_fails_after_max_attempts(tmp_path):
+	from concurrent.futures import Future
+	from concurrent.futures.process import BrokenProcessPool
+
+	store = SQLiteJobStore(tmp_path / "jobs.db")
+	store.enqueue("poison", meta={})
+	pools = []
+
+	class DyingExecutor:
+		def submit(self, *a, **kw):
+			fut = Future()
+			fut.set_exception(BrokenProcessPool("killed"))
+			return fut
+
+		def shutdown(self, **kw):
+			pass
+
+	def factory(n):
+		pools.append(DyingExecutor())
+		return pools[-1]
+
+	worker = Worker(store, worker_id="w1", concurrency=1, lease_seconds=5, max_attempts=3,
+		executor_factory=factory, runner=lambda job_id, meta, worker_id: None)
+	for _ in range(20):
+		worker.tick()
+	state = store.get("poison")
+	assert state["status"] == "failed" and state["attempts"] == 3
+	assert "3 attempts" in state["error"]
+	# one pool per attempt plus the initial one; no more restarts once the job failed
+	assert len(pools) == 4 and not worker.running
+
+	# A queued job that is already out of attempts is never handed out again
+	store.enqueue("spent", meta={})
+	for _ in range(3):
+		store.claim("w2", lease_seconds=5)
+		store.release("spent", "w2", max_attempts=10)
+	assert store.claim("w2", lease_seconds=5, max_attempts=3) is None
+	assert store.get("spent")["status"] == "queued"
@@ -63,6 +63,7 @@ def classify_clauses(clauses: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
 			"clause_id": cl["clause_id"],
 			"page": cl["page"],
 			"text": cl["text"],
+			"bounding_boxes": cl.get("bounding_boxes", []),
 			"predictions": [{"category": best_category, "confidence": round(best_conf, 3)}] if best_category != "Safe" else [],
 			"severity_score": round(severity_score, 3),
 			"severity": severity,
@@ -0,0 +1,391 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+import json
+import struct
+
+import numpy as np
+
+# Columnar form of preprocess output. Each page keeps one text buffer (block texts
+# joined with "\n", the same layout segment_page builds) plus NumPy columns for block
+# offsets, boxes and per-source fields. Views give the old dict access on demand.
+
+MAGIC = b"CDOC"
+FORMAT_VERSION = 2  # 2 adds the per-page word index
+NONE_INT = -(2 ** 31)
+CORE_KEYS = ("text", "bbox", "char_start", "char_end")
+# Known per-block fields; anything else is kept as a plain Python list
+COLUMN_KINDS = {"block_no": "int", "type": "int", "num": "int", "ocr_conf": "float", "style": "str", "part": "str"}
+BOX_KEYS = ("x", "y", "w", "h")
+
+
+def _encode_column(kind: str, values: List[Any], strings: List[str]):
+	if kind == "int":
+		# python-docx exposes numId as an element; keep its integer value
+		return np.array([NONE_INT if v is None else int(getattr(v, "val", v)) for v in values], dtype=np.int32)
+	if kind == "float":
+		return np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+	if kind == "str":
+		index: Dict[str, int] = {s: i for i, s in enumerate(strings)}
+		out = np.empty(len(values), dtype=np.int32)
+		for i, v in enumerate(values):
+			if v is None:
+				out[i] = -1
+				continue
+			if v not in index:
+				index[v] = len(strings)
+				strings.append(v)
+			out[i] = index[v]
+		return out
+	return list(values)
+
+
+def _decode_value(kind: str, column, i: int, strings: List[str]):
+	v = column[i]
+	if kind == "int":
+		return None if v == NONE_INT else int(v)
+	if kind == "float":
+		return None if np.isnan(v) else float(v)
+	if kind == "str":
+		return None if v < 0 else strings[v]
+	return v
+
+
+class WordIndex:
+	"""Word boxes of one page sorted by character offset into the page text.
+
+	Words never overlap, so both ``starts`` and ``ends`` are sorted and a character
+	span resolves to its words with two binary searches. ``lines`` groups words that
+	share a text line so a span comes back as one tight rectangle per line.
+	"""
+
+	__slots__ = ("starts", "ends", "boxes", "lines")
+
+	def __init__(self, starts: np.ndarray, ends: np.ndarray, boxes: np.ndarray, lines: np.ndarray):
+		self.starts = starts
+		self.ends = ends
+		self.boxes = boxes
+		self.lines = lines
+
+	@classmethod
+	def from_words(cls, words: Sequence[Tuple[int, int, float, float, float, float, int]]) -> "WordIndex":
+		"""Build from (char_start, char_end, x0, y0, x1, y1, line id) in text order."""
+		arr = np.array(words, dtype=np.float64).reshape(-1, 7)
+		boxes = np.stack([arr[:, 2], arr[:, 3], arr[:, 4] - arr[:, 2], arr[:, 5] - arr[:, 3]], axis=1)
+		return cls(arr[:, 0].astype(np.int32), arr[:, 1].astype(np.int32), boxes, arr[:, 6].astype(np.int32))
+
+	@classmethod
+	def from_dict(cls, d: Dict[str, Any]) -> "WordIndex":
+		return cls(np.asarray(d["starts"], dtype=np.int32), np.asarray(d["ends"], dtype=np.int32),
+			np.asarray(d["boxes"], dtype=np.float64).reshape(-1, len(BOX_KEYS)), np.asarray(d["lines"], dtype=np.int32))
+
+	def to_dict(self) -> Dict[str, Any]:
+		return {"starts": self.starts.tolist(), "ends": self.ends.tolist(), "boxes": self.boxes.tolist(), "lines": self.lines.tolist()}
+
+	def __len__(self) -> int:
+		return len(self.starts)
+
+	def words_in(self, start: int, end: int) -> Tuple[int, int]:
+		"""Index range [i, j) of words overlapping the character span [start, end)."""
+		i = int(np.searchsorted(self.ends, start, side="right"))
+		j = int(np.searchsorted(self.starts, end, side="left"))
+		return i, max(i, j)
+
+	def rects(self, start: int, end: int) -> List[Dict[str, Any]]:
+		"""Tight boxes covering [start, end): the union of its words on each line."""
+		i, j = self.words_in(start, end)
+		out: List[Dict[str, Any]] = []
+		k = i
+		while k < j:
+			line = self.lines[k]
+			m = k + 1
+			while m < j and self.lines[m] == line:
+				m += 1
+			b = self.boxes[k:m]
+			x0, y0 = float(b[:, 0].min()), float(b[:, 1].min())
+			x1, y1 = float((b[:, 0] + b[:, 2]).max()), float((b[:, 1] + b[:, 3]).max())
+			out.append({"x": x0, "y": y0, "w": x1 - x0, "h": y1 - y0})
+			k = m
+		return out
+
+
+class BlockView:
+	"""Read-only, dict-compatible view of one block of a ColumnarPage."""
+
+	__slots__ = ("page", "index")
+
+	def __init__(self, page: "ColumnarPage", index: int):
+		self.page = page
+		self.index = index
+
+	def __getitem__(self, key: str):
+		page, i = self.page, self.index
+		if key == "text":
+			return page.text[page.starts[i]:page.ends[i]]
+		if key == "bbox":
+			return page.bbox(i)
+		if key == "char_start":
+			return int(page.starts[i])
+		if key == "char_end":
+			return int(page.ends[i])
+		if key in page.columns:
+			return _decode_value(COLUMN_KINDS.get(key, "obj"), page.columns[key], i, page.strings)
+		raise KeyError(key)
+
+	def get(self, key: str, default=None):
+		try:
+			return self[key]
+		except KeyError:
+			return default
+
+	def keys(self) -> Tuple[str, ...]:
+		return CORE_KEYS + tuple(self.page.columns)
+
+	def items(self):
+		return [(k, self[k]) for k in self.keys()]
+
+	def __contains__(self, key) -> bool:
+		return key in CORE_KEYS or key in self.page.columns
+
+	def __iter__(self) -> Iterator[str]:
+		return iter(self.keys())
+
+	def to_dict(self) -> Dict[str, Any]:
+		return dict(self.items())
+
+	def __eq__(self, other) -> bool:
+		if isinstance(other, BlockView):
+			other = other.to_dict()
+		return self.to_dict() == other
+
+	def __repr__(self) -> str:
+		return f"BlockView({self.to_dict()!r})"
+
+
+class ColumnarPage:
+	"""One page as a text buffer plus struct-of-arrays block columns."""
+
+	__slots__ = ("page_number", "text", "starts", "ends", "boxes", "has_box", "columns", "strings", "extra", "words")
+
+	def __init__(self, page_number: int, text: str, starts: np.ndarray, ends: np.ndarray,
+			boxes: Optional[np.ndarray] = None, has_box: Optional[np.ndarray] = None,
+			columns: Optional[Dict[str, Any]] = None, strings: Optional[List[str]] = None,
+			extra: Optional[Dict[str, Any]] = None, words: Optional[WordIndex] = None):
+		self.page_number = page_number
+		self.text = text
+		self.starts = starts
+		self.ends = ends
+		self.boxes = boxes
+		self.has_box = has_box
+		self.columns = columns or {}
+		self.strings = strings or []
+		self.extra = extra or {}
+		self.words = words
+
+	@classmethod
+	def from_dict(cls, page: Dict[str, Any]) -> "ColumnarPage":
+		blocks = page.get("blocks", [])
+		n = len(blocks)
+		texts = [b.get("text", "") for b in blocks]
+		lens = np.fromiter((len(t) for t in texts), dtype=np.int32, count=n)
+		starts = np.zeros(n, dtype=np.int32)
+		if n:
+			starts[1:] = np.cumsum(lens[:-1] + 1)
+		bbs = [b.get("bbox") for b in blocks]
+		boxes = has_box = None
+		if any(bb is not None for bb in bbs):
+			integral = all(isinstance(bb[k], int) for bb in bbs if bb is not None for k in BOX_KEYS)
+			boxes = np.array(
+				[[bb[k] for k in BOX_KEYS] if bb is not None else [0, 0, 0, 0] for bb in bbs],
+				dtype=np.int32 if integral else np.float64,
+			)
+			has_box = np.array([bb is not None for bb in bbs], dtype=bool)
+		fields: Dict[str, None] = {}
+		for b in blocks:
+			for k in b:
+				if k not in CORE_KEYS:
+					fields[k] = None
+		strings: List[str] = []
+		columns = {f: _encode_column(COLUMN_KINDS.get(f, "obj"), [b.get(f) for b in blocks], strings) for f in fields}
+		extra = {k: v for k, v in page.items() if k not in ("page_number", "blocks", "words")}
+		words = page.get("words")
+		if words is not None and not isinstance(words, WordIndex):
+			words = WordIndex.from_dict(words)
+		return cls(int(page.get("page_number", 1)), "\n".join(texts), starts, starts + lens,
+			boxes, has_box, columns, strings, extra, words)
+
+	def __len__(self) -> int:
+		return len(self.starts)
+
+	def bbox(self, i: int) -> Optional[Dict[str, Any]]:
+		if self.boxes is None or not self.has_box[i]:
+			return None
+		return dict(zip(BOX_KEYS, self.boxes[i].tolist()))
+
+	def bboxes(self) -> List[Optional[Dict[str, Any]]]:
+		if self.boxes is None:
+			return [None] * len(self)
+		return [dict(zip(BOX_KEYS, row)) if ok else None for row, ok in zip(self.boxes.tolist(), self.has_box.tolist())]
+
+	def span_boxes(self, start: int, end: int) -> List[Dict[str, Any]]:
+		"""Boxes for a character span of ``text``: tight per-line word boxes when the page
+		has a word index, otherwise the boxes of the blocks it overlaps."""
+		if self.words is not None and len(self.words):
+			return self.words.rects(start, end)
+		i = int(np.searchsorted(self.ends, start, side="right"))
+		j = int(np.searchsorted(self.starts, end, side="left"))
+		return [bb for bb in (self.bbox(k) for k in range(i, j)) if bb]
+
+	@property
+	def blocks(self) -> List[BlockView]:
+		return [BlockView(self, i) for i in range(len(self))]
+
+	def __getitem__(self, key: str):
+		if key == "page_number":
+			return self.page_number
+		if key == "blocks":
+			return self.blocks
+		if key == "words" and self.words is not None:
+			return self.words
+		return self.extra[key]
+
+	def get(self, key: str, default=None):
+		try:
+			return self[key]
+		except KeyError:
+			return default
+
+	def keys(self) -> Tuple[str, ...]:
+		return ("page_number", "blocks") + (("words",) if self.words is not None else ()) + tuple(self.extra)
+
+	def items(self):
+		return [(k, self[k]) for k in self.keys()]
+
+	def __contains__(self, key) -> bool:
+		return key in self.keys()
+
+	def __iter__(self) -> Iterator[str]:
+		return iter(self.keys())
+
+	def to_dict(self) -> Dict[str, Any]:
+		out = {"page_number": self.page_number, "blocks": [b.to_dict() for b in self.blocks]}
+		if self.words is not None:
+			out["words"] = self.words.to_dict()
+		out.update(self.extra)
+		return out
+
+
+class ColumnarDocument:
+	"""Dict-compatible container of ColumnarPage with a compact binary encoding."""
+
+	__slots__ = ("type", "pages")
+
+	def __init__(self, doc_type: str, pages: List[ColumnarPage]):
+		self.type = doc_type
+		self.pages = pages
+
+	@classmethod
+	def from_dict(cls, doc: Dict[str, Any]) -> "ColumnarDocument":
+		pages = [p if isinstance(p, ColumnarPage) else ColumnarPage.from_dict(p) for p in doc.get("pages", [])]
+		return cls(doc["type"], pages)
+
+	def __getitem__(self, key: str):
+		if key == "type":
+			return self.type
+		if key == "page_count":
+			return len(self.pages)
+		if key == "pages":
+			return self.pages
+		raise KeyError(key)
+
+	def get(self, key: str, default=None):
+		try:
+			return self[key]
+		except KeyError:
+			return default
+
+	def keys(self) -> Tuple[str, ...]:
+		return ("type", "page_count", "pages")
+
+	def __contains__(self, key) -> bool:
+		return key in self.keys()
+
+	def to_dict(self) -> Dict[str, Any]:
+		return {"type": self.type, "page_count": len(self.pages), "pages": [p.to_dict() for p in self.pages]}
+
+	def to_bytes(self) -> bytes:
+		"""MAGIC, version, JSON header length and header, then each page's buffers in order."""
+		header: Dict[str, Any] = {"type": self.type, "pages": []}
+		chunks: List[bytes] = []
+		for p in self.pages:
+			text = p.text.encode("utf-8")
+			meta = {
+				"page_number": p.page_number,
+				"n": len(p),
+				"text_bytes": len(text),
+				"box_dtype": None if p.boxes is None else p.boxes.dtype.str,
+				"fields": list(p.columns),
+				"columns": [],
+				"objects": {},
+				"strings": p.strings,
+				"extra": p.extra,
+				"words": None if p.words is None else len(p.words),
+			}
+			chunks += [text, p.starts.astype("<i4").tobytes(), p.ends.astype("<i4").tobytes()]
+			if p.boxes is not None:
+				chunks += [p.boxes.tobytes(), p.has_box.astype(np.uint8).tobytes()]
+			for name, col in p.columns.items():
+				if isinstance(col, np.ndarray):
+					meta["columns"].append([name, col.dtype.str])
+					chunks.append(col.tobytes())
+				else:
+					meta["objects"][name] = col
+			if p.words is not None:
+				w = p.words
+				chunks += [w.starts.astype("<i4").tobytes(), w.ends.astype("<i4").tobytes(),
+					w.boxes.astype("<f8").tobytes(), w.lines.astype("<i4").tobytes()]
+			header["pages"].append(meta)
+		head = json.dumps(header, ensure_ascii=False).encode("utf-8")
+		return MAGIC + struct.pack("<BI", FORMAT_VERSION, len(head)) + head + b"".join(chunks)
+
+	@classmethod
+	def from_bytes(cls, data: bytes) -> "ColumnarDocument":
+		if data[:4] != MAGIC:
+			raise ValueError("Not a columnar document")
+		version, head_len = struct.unpack_from("<BI", data, 4)
+		if version not in (1, FORMAT_VERSION):
+			raise ValueError(f"Unsupported columnar document version {version}")
+		pos = 4 + struct.calcsize("<BI")
+		header = json.loads(data[pos:pos + head_len].decode("utf-8"))
+		pos += head_len
+		buf = memoryview(data)
+
+		def take(dtype: str, count: int, width: int = 1) -> np.ndarray:
+			nonlocal pos
+			dt = np.dtype(dtype)
+			arr = np.frombuffer(buf, dtype=dt, count=count * width, offset=pos).copy()
+			pos += dt.itemsize * count * width
+			return arr.reshape(count, width) if width > 1 else arr
+
+		pages = []
+		for meta in header["pages"]:
+			n = meta["n"]
+			text = bytes(buf[pos:pos + meta["text_bytes"]]).decode("utf-8")
+			pos += meta["text_bytes"]
+			starts, ends = take("<i4", n).astype(np.int32), take("<i4", n).astype(np.int32)
+			boxes = has_box = None
+			if meta["box_dtype"] is not None:
+				boxes = take(meta["box_dtype"], n, len(BOX_KEYS))
+				has_box = take("u1", n).astype(bool)
+			decoded: Dict[str, Any] = dict(meta["objects"])
+			for name, dtype in meta["columns"]:
+				decoded[name] = take(dtype, n)
+			columns = {name: decoded[name] for name in meta["fields"]}
+			words = None
+			if meta.get("words") is not None:
+				nw = meta["words"]
+				words = WordIndex(take("<i4", nw).astype(np.int32), take("<i4", nw).astype(np.int32),
+					take("<f8", nw, len(BOX_KEYS)), take("<i4", nw).astype(np.int32))
+			pages.append(ColumnarPage(meta["page_number"], text, starts, ends, boxes, has_box,
+				columns, meta["strings"], meta["extra"], words))
+		return cls(header["type"], pages)
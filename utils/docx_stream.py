@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+import io
+import os
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+
+# Streaming reader for .docx: walks the XML parts with iterparse and drops each
+# paragraph/table as soon as it has been emitted, so memory stays bounded by the
+# largest single paragraph rather than the whole document object model.
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+R = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+DOCUMENT_PART = "word/document.xml"
+STYLES_PART = "word/styles.xml"
+RELS_PART = "word/_rels/document.xml.rels"
+
+P, T, R_RUN, TC, TBL, BODY = W + "p", W + "t", W + "r", W + "tc", W + "tbl", W + "body"
+P_STYLE, NUM_ID = W + "pStyle", W + "numId"
+# Run children that python-docx renders as whitespace; _normalize_text collapses them
+BREAKS = {W + "tab", W + "br", W + "cr", W + "ptab"}
+
+# styles.xml keeps lower-case names for built-ins; python-docx reports the UI names
+_UI_NAMES = {"caption": "Caption", "footer": "Footer", "header": "Header",
+	**{f"heading {i}": f"Heading {i}" for i in range(1, 10)}}
+
+Source = Union[bytes, str, os.PathLike]
+
+
+def _open_zip(source: Source) -> zipfile.ZipFile:
+	if isinstance(source, (bytes, bytearray)):
+		return zipfile.ZipFile(io.BytesIO(source))
+	return zipfile.ZipFile(os.fspath(source))
+
+
+def read_styles(zf: zipfile.ZipFile) -> Tuple[Dict[str, str], Optional[str]]:
+	"""Paragraph styleId -> display name, plus the default paragraph style name."""
+	if STYLES_PART not in zf.namelist():
+		return {}, None
+	names: Dict[str, str] = {}
+	default = None
+	with zf.open(STYLES_PART) as f:
+		for _, el in ET.iterparse(f):
+			if el.tag != W + "style":
+				continue
+			if el.get(W + "type") == "paragraph":
+				name_el = el.find(W + "name")
+				name = name_el.get(W + "val") if name_el is not None else el.get(W + "styleId")
+				name = _UI_NAMES.get(name, name)
+				names[el.get(W + "styleId")] = name
+				if el.get(W + "default") in ("1", "true", "on"):
+					default = name
+			el.clear()
+	return names, default
+
+
+def _header_footer_parts(zf: zipfile.ZipFile) -> Tuple[List[str], List[str]]:
+	headers: List[str] = []
+	footers: List[str] = []
+	if RELS_PART not in zf.namelist():
+		return headers, footers
+	with zf.open(RELS_PART) as f:
+		for rel in ET.parse(f).getroot().iter(REL + "Relationship"):
+			kind = rel.get("Type", "").rsplit("/", 1)[-1]
+			if kind in ("header", "footer"):
+				part = posixpath.normpath(posixpath.join("word", rel.get("Target", "")))
+				if part in zf.namelist():
+					(headers if kind == "header" else footers).append(part)
+	return sorted(set(headers)), sorted(set(footers))
+
+
+def _iter_part(f, part: str, styles: Dict[str, str], default_style: Optional[str]) -> Iterator[Dict[str, Any]]:
+	"""Yield {text, style, num, part} for every paragraph and table cell of one XML part."""
+	paras: List[Dict[str, Any]] = []   # open paragraphs (text boxes nest inside runs)
+	cells: List[List[Dict[str, Any]]] = []  # open table cells, innermost last
+	in_run = 0
+	skip = 0  # inside mc:Fallback, which repeats the mc:Choice content
+	depth = 0
+	body = None
+	for event, el in ET.iterparse(f, events=("start", "end")):
+		tag = el.tag
+		if event == "start":
+			depth += 1
+			if tag == MC_FALLBACK:
+				skip += 1
+			elif skip:
+				continue
+			elif tag == P:
+				paras.append({"chunks": [], "style": None, "num": None})
+			elif tag == R_RUN:
+				in_run += 1
+			elif tag == TC:
+				cells.append([])
+			elif tag == BODY:
+				body = el
+			continue
+
+		depth -= 1
+		if tag == MC_FALLBACK:
+			skip -= 1
+			el.clear()
+			continue
+		if skip:
+			continue
+		if tag == T and in_run and paras:
+			paras[-1]["chunks"].append(el.text or "")
+		elif tag in BREAKS and in_run and paras:
+			paras[-1]["chunks"].append(" ")
+		elif tag == R_RUN:
+			in_run -= 1
+		elif tag == P_STYLE and paras:
+			paras[-1]["style"] = el.get(W + "val")
+		elif tag == NUM_ID and paras:
+			val = el.get(W + "val")
+			paras[-1]["num"] = int(val) if val and val.lstrip("-").isdigit() else None
+		elif tag == P and paras:
+			p = paras.pop()
+			block = {
+				"text": "".join(p["chunks"]),
+				"style": styles.get(p["style"], default_style) if p["style"] else default_style,
+				"num": p["num"],
+			}
+			if cells:
+				cells[-1].append(block)
+			else:
+				block["part"] = part
+				yield block
+			el.clear()
+		elif tag == TC and cells:
+			cell = cells.pop()
+			texts = [b["text"] for b in cell if b["text"].strip()]
+			first = next((b for b in cell if b["text"].strip()), cell[0] if cell else None)
+			if first is not None:
+				yield {
+					"text": " ".join(texts),
+					"style": first["style"],
+					"num": next((b["num"] for b in cell if b["num"] is not None), None),
+					"part": "table" if part == "body" else part,
+				}
+			el.clear()
+		elif tag == TBL:
+			el.clear()
+		# Drop finished top-level body children so the tree never grows
+		if body is not None and depth == 2:
+			body.clear()
+
+
+def iter_docx_blocks(source: Source) -> Iterator[Dict[str, Any]]:
+	"""Blocks of a .docx in reading order: headers, body paragraphs and table cells, footers.
+
+	Each block has raw ``text``, the paragraph ``style`` name, the numbering ``num``
+	(numId) and ``part`` ("header", "body", "table" or "footer").
+	"""
+	with _open_zip(source) as zf:
+		styles, default_style = read_styles(zf)
+		headers, footers = _header_footer_parts(zf)
+		parts = [(h, "header") for h in headers] + [(DOCUMENT_PART, "body")] + [(ft, "footer") for ft in footers]
+		for name, kind in parts:
+			with zf.open(name) as f:
+				yield from _iter_part(f, kind, styles, default_style)
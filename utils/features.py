@@ -1,9 +1,12 @@
 from __future__ import annotations
 
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, List, Optional
+import os
 import re
 import unicodedata
 
+from utils.scanner import Scan, scan
+
 try:
 	import spacy
 	try:
@@ -15,13 +18,32 @@ try:
 except Exception:
 	NLP = None
 
-RE_NUM = re.compile(r"\b\d{4,}\b")
-RE_MONEY = re.compile(r"\b(?:\$|€|£)\s?\d{1,3}(?:[\,\.]\d{3})*(?:\.\d+)?\b", re.I)
-RE_PERCENT = re.compile(r"\b\d{1,3}\s?%\b")
-RE_DATE = re.compile(r"\b(?:\d{1,2}[\-/]\d{1,2}[\-/]\d{2,4}|(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\s+\d{1,2},?\s+\d{2,4})\b", re.I)
-RE_DURATION = re.compile(r"\b\d+\s+(?:day|days|month|months|year|years|quarter|quarters)\b", re.I)
-RE_EMAIL = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
-RE_URL = re.compile(r"https?://\S+|www\.\S+", re.I)
+# Pipeline components the features read: tag_/pos_, lemma_ and dep_. Everything else
+# (NER in en_core_web_sm) is skipped when featurizing.
+FEATURE_PIPES = ("tok2vec", "tagger", "morphologizer", "attribute_ruler", "lemmatizer", "parser")
+UNUSED_PIPES = [p for p in NLP.pipe_names if p not in FEATURE_PIPES] if NLP else []
+FEATURE_BATCH_SIZE = int(os.environ.get("FEATURE_BATCH_SIZE", "64"))
+# >1 forks spaCy worker processes inside nlp.pipe; pages are already parallel in the API
+FEATURE_N_PROCESS = int(os.environ.get("FEATURE_N_PROCESS", "1"))
+
+# Token-level lists (one entry per non-space token), keyed by feature name
+TOKEN_FIELDS = {
+	"tokens": lambda t: t.text,
+	"lemmas": lambda t: t.lemma_ if t.lemma_ else t.text.lower(),
+	"pos": lambda t: t.pos_,
+	"tags": lambda t: t.tag_,
+	"deps": lambda t: t.dep_,
+}
+# Token fields each profile builds eagerly; the others are parsed on first access.
+# minimal: serving (inference and reports read only scalar features)
+# full: training export, the historical feature dict
+# debug: full plus fine-grained tags and dependency labels
+FEATURE_PROFILES = {
+	"minimal": (),
+	"full": ("tokens", "lemmas", "pos"),
+	"debug": ("tokens", "lemmas", "pos", "tags", "deps"),
+}
+FEATURE_PROFILE = os.environ.get("FEATURE_PROFILE", "full")
 
 KEYWORDS = [
 	"indemnify", "indemnity", "limitation", "penalty", "interest", "termination",
@@ -38,10 +60,11 @@ def _normalize(text: str) -> str:
 	return text
 
 
-def _placeholderize(text: str) -> str:
-	text = RE_MONEY.sub(" [MONEY] ", text)
-	text = RE_DATE.sub(" [DATE] ", text)
-	text = RE_NUM.sub(" [NUM] ", text)
+PLACEHOLDERS = (("money", " [MONEY] "), ("date", " [DATE] "), ("number", " [NUM] "))
+
+
+def _placeholderize(text: str, spans: Optional[Scan] = None) -> str:
+	text = (spans or scan(text)).replace(PLACEHOLDERS)
 	return " ".join(text.split())
 
 
@@ -57,23 +80,60 @@ def _readability_flesch(text: str) -> float:
 	return round(206.835 - 1.015 * (num_words / sentences) - 84.6 * (syllables / num_words), 2)
 
 
-def extract_features_for_clause(clause: Dict[str, Any]) -> Dict[str, Any]:
+def _token_fields(doc, names: Iterable[str]) -> Dict[str, List[str]]:
+	if doc is None:
+		return {n: [] for n in names}
+	toks = [t for t in doc if not t.is_space]
+	return {n: [TOKEN_FIELDS[n](t) for t in toks] for n in names}
+
+
+class ClauseFeatures(dict):
+	"""Feature dict whose token fields missing from the profile are parsed from the text on first access.
+
+	Lazy fields are filled in by ``features["tokens"]`` or ``features.get("tokens")``;
+	until then they are absent from ``keys()``, ``in`` and JSON dumps.
+	"""
+
+	def __init__(self, data: Dict[str, Any], text: str):
+		super().__init__(data)
+		self._text = text
+
+	def __missing__(self, key):
+		if key not in TOKEN_FIELDS:
+			raise KeyError(key)
+		doc = NLP(self._text, disable=UNUSED_PIPES) if NLP else None
+		self.update(_token_fields(doc, [n for n in TOKEN_FIELDS if n not in self]))
+		return self[key]
+
+	def get(self, key, default=None):
+		try:
+			return self[key]
+		except KeyError:
+			return default
+
+
+def _profile_fields(profile: Optional[str]):
+	profile = profile or FEATURE_PROFILE
+	if profile not in FEATURE_PROFILES:
+		raise ValueError(f"Unknown feature profile: {profile}")
+	return FEATURE_PROFILES[profile]
+
+
+def _clause_features(clause: Dict[str, Any], orig: str, doc, eager=FEATURE_PROFILES["full"]) -> Dict[str, Any]:
+	"""Feature dict for one clause; ``doc`` is spaCy's parse of ``orig`` (None without spaCy)."""
 	original_text = clause.get("text", "")
-	orig = _normalize(original_text)
-	normalized = _placeholderize(orig)
+	spans = scan(orig)
+	normalized = _placeholderize(orig, spans)
 
 	features: Dict[str, Any] = {}
-	features["has_money"] = bool(RE_MONEY.search(orig))
-	features["has_percent"] = bool(RE_PERCENT.search(orig))
-	features["has_date"] = bool(RE_DATE.search(orig))
-	features["has_duration"] = bool(RE_DURATION.search(orig))
-	features["has_email"] = bool(RE_EMAIL.search(orig))
-	features["has_url"] = bool(RE_URL.search(orig))
+	features["has_money"] = spans.has("money")
+	features["has_percent"] = spans.has("percent")
+	features["has_date"] = spans.has("date")
+	features["has_duration"] = spans.has("duration")
+	features["has_email"] = spans.has("email")
+	features["has_url"] = spans.has("url")
 
 	# spaCy-based
-	tokens = []
-	lemmas = []
-	pos_tags = []
 	modals = False
 	negation_present = False
 	passive_voice = False
@@ -81,8 +141,7 @@ def extract_features_for_clause(clause: Dict[str, Any]) -> Dict[str, Any]:
 	avg_token_len = 0.0
 	length_tokens = 0
 
-	if NLP:
-		doc = NLP(orig)
+	if doc is not None:
 		length_tokens = len([t for t in doc if not t.is_space])
 		if length_tokens:
 			avg_token_len = sum(len(t.text) for t in doc if not t.is_space) / length_tokens
@@ -91,16 +150,13 @@ def extract_features_for_clause(clause: Dict[str, Any]) -> Dict[str, Any]:
 		for t in doc:
 			if t.is_space:
 				continue
-			tokens.append(t.text)
-			lemmas.append(t.lemma_ if t.lemma_ else t.text.lower())
-			pos_tags.append(t.pos_)
 			if t.lemma_.lower() in MODALS or t.text.lower() in MODALS:
 				modals = True
 			if t.dep_.lower() == "neg" or t.text.lower() in NEGATIONS:
 				negation_present = True
 		# Passive voice heuristic: presence of auxpass + VERB in past participle
 		# In blank models dep_ is unavailable; fallback to regex
-		if NLP and any(getattr(t, "tag_", "") == "VBN" for t in doc) and any(getattr(t, "dep_", "") == "auxpass" for t in doc):
+		if any(getattr(t, "tag_", "") == "VBN" for t in doc) and any(getattr(t, "dep_", "") == "auxpass" for t in doc):
 			passive_voice = True
 		elif re.search(r"\b(be|is|are|was|were|been|being)\b\s+\w+ed\b", orig, re.I):
 			passive_voice = True
@@ -125,14 +181,39 @@ def extract_features_for_clause(clause: Dict[str, Any]) -> Dict[str, Any]:
 		"has_negation": negation_present,
 		"passive_voice": passive_voice,
 		"keywords": keyword_flags,
-		"tokens": tokens,
-		"lemmas": lemmas,
-		"pos": pos_tags,
 	})
+	features.update(_token_fields(doc, eager))
 
 	return {
 		**clause,
 		"original_text": original_text,
 		"normalized_text": normalized,
-		"features": features,
+		"features": ClauseFeatures(features, orig),
 	}
+
+
+def extract_features_for_clause(clause: Dict[str, Any], profile: Optional[str] = None) -> Dict[str, Any]:
+	"""``profile`` names an entry of FEATURE_PROFILES (default FEATURE_PROFILE)."""
+	eager = _profile_fields(profile)
+	orig = _normalize(clause.get("text", ""))
+	return _clause_features(clause, orig, NLP(orig, disable=UNUSED_PIPES) if NLP else None, eager)
+
+
+def extract_features_batch(clauses: Iterable[Dict[str, Any]], batch_size: Optional[int] = None,
+		n_process: Optional[int] = None, profile: Optional[str] = None) -> List[Dict[str, Any]]:
+	"""``extract_features_for_clause`` for many clauses, parsed together with ``nlp.pipe``.
+
+	Output is identical to the per-clause function, in input order.
+	"""
+	eager = _profile_fields(profile)
+	clauses = list(clauses)
+	origs = [_normalize(c.get("text", "")) for c in clauses]
+	if not NLP:
+		return [_clause_features(c, o, None, eager) for c, o in zip(clauses, origs)]
+	docs = NLP.pipe(
+		origs,
+		batch_size=batch_size or FEATURE_BATCH_SIZE,
+		n_process=n_process or FEATURE_N_PROCESS,
+		disable=UNUSED_PIPES,
+	)
+	return [_clause_features(c, o, d, eager) for c, o, d in zip(clauses, origs, docs)]
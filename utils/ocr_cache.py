@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from pathlib import Path
+
+OCR_CACHE_DB = Path(os.environ.get("OCR_CACHE_DB", "storage/ocr_cache.db"))
+# 0 disables the cache
+OCR_CACHE_MAX_BYTES = int(os.environ.get("OCR_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+
+def page_key(img, language: str, psm: int, dpi: int, engine: str) -> str:
+	"""Hash of the rendered pixels plus everything that changes the OCR output."""
+	h = hashlib.sha256(f"{img.mode}:{img.size}:{language}:{psm}:{dpi}:{engine}".encode("utf-8"))
+	h.update(img.tobytes())
+	return h.hexdigest()
+
+
+class OCRPageCache:
+	"""Size-capped LRU of OCR page output in a SQLite file shared by OCR worker processes."""
+
+	def __init__(self, db_path: Path = OCR_CACHE_DB, max_bytes: int = OCR_CACHE_MAX_BYTES):
+		self.db_path = Path(db_path)
+		self.max_bytes = max_bytes
+		self.db_path.parent.mkdir(parents=True, exist_ok=True)
+		with sqlite3.connect(self.db_path) as con:
+			con.execute("PRAGMA journal_mode=WAL")
+			con.execute(
+				"""
+				CREATE TABLE IF NOT EXISTS ocr_pages (
+					key TEXT PRIMARY KEY,
+					payload BLOB NOT NULL,
+					size_bytes INTEGER NOT NULL,
+					last_access REAL NOT NULL
+				)
+				"""
+			)
+			con.execute("CREATE INDEX IF NOT EXISTS idx_ocr_pages_access ON ocr_pages (last_access)")
+
+	def get(self, key: str) -> Optional[Dict[str, Any]]:
+		with sqlite3.connect(self.db_path, timeout=30) as con:
+			row = con.execute("SELECT payload FROM ocr_pages WHERE key = ?", (key,)).fetchone()
+			if not row:
+				return None
+			con.execute("UPDATE ocr_pages SET last_access = ? WHERE key = ?", (time.time(), key))
+		return json.loads(zlib.decompress(row[0]).decode("utf-8"))
+
+	def put(self, key: str, page: Dict[str, Any]):
+		payload = zlib.compress(json.dumps(page, ensure_ascii=False).encode("utf-8"))
+		with sqlite3.connect(self.db_path, timeout=30) as con:
+			con.execute(
+				"INSERT OR REPLACE INTO ocr_pages (key, payload, size_bytes, last_access) VALUES (?, ?, ?, ?)",
+				(key, payload, len(payload), time.time()),
+			)
+			self._evict(con)
+
+	def total_bytes(self) -> int:
+		with sqlite3.connect(self.db_path, timeout=30) as con:
+			(total,) = con.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM ocr_pages").fetchone()
+		return total
+
+	def _evict(self, con: sqlite3.Connection):
+		(total,) = con.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM ocr_pages").fetchone()
+		if total <= self.max_bytes:
+			return
+		for key, size in con.execute("SELECT key, size_bytes FROM ocr_pages ORDER BY last_access ASC").fetchall():
+			if total <= self.max_bytes:
+				break
+			con.execute("DELETE FROM ocr_pages WHERE key = ?", (key,))
+			total -= size
+
+
+def page_stats(pages) -> Dict[str, int]:
+	"""Cache hits/misses over the OCR attempts recorded in ``ocr_settings``."""
+	hits = misses = 0
+	for p in pages:
+		settings = p.get("ocr_settings")
+		if settings:
+			hits += settings.get("cache_hits", 0)
+			misses += settings["attempts"] - settings.get("cache_hits", 0)
+	return {"hits": hits, "misses": misses}
+
+
+_OCR_CACHE: Optional[OCRPageCache] = None
+
+
+def get_ocr_cache() -> Optional[OCRPageCache]:
+	"""Process-wide cache, created on first use; None when disabled."""
+	global _OCR_CACHE
+	if OCR_CACHE_MAX_BYTES <= 0:
+		return None
+	if _OCR_CACHE is None:
+		_OCR_CACHE = OCRPageCache()
+	return _OCR_CACHE
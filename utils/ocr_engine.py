@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+from abc import ABC, abstractmethod
+import os
+import threading
+
+import pytesseract
+from pytesseract import Output
+
+try:
+	import tesserocr
+except ImportError:  # optional: falls back to the pytesseract subprocess
+	tesserocr = None
+
+# auto | tesserocr | pytesseract
+OCR_ENGINE = os.environ.get("OCR_ENGINE", "auto")
+# tessdata directory for tesserocr; its bundled default is used when unset
+TESSDATA_PREFIX = os.environ.get("TESSDATA_PREFIX")
+
+WORD_KEYS = ("text", "left", "top", "width", "height", "conf")
+
+
+class OCREngine(ABC):
+	"""Word-level OCR returning the ``image_to_data`` columns used by utils.preprocess."""
+
+	name = "base"
+
+	@property
+	@abstractmethod
+	def version(self) -> str:
+		...
+
+	@abstractmethod
+	def image_to_data(self, img, language: str = "eng", psm: int = 3) -> Dict[str, List[Any]]:
+		...
+
+
+class PytesseractEngine(OCREngine):
+	"""One ``tesseract`` subprocess per call; needs only the CLI binary."""
+
+	name = "pytesseract"
+
+	@property
+	def version(self) -> str:
+		try:
+			return f"{self.name}:{pytesseract.get_tesseract_version()}"
+		except Exception:
+			return f"{self.name}:unknown"
+
+	def image_to_data(self, img, language: str = "eng", psm: int = 3) -> Dict[str, List[Any]]:
+		data = pytesseract.image_to_data(img, lang=language, config=f"--psm {psm}", output_type=Output.DICT)
+		return {k: data[k] for k in WORD_KEYS}
+
+
+class TesserocrEngine(OCREngine):
+	"""Long-lived libtesseract handle per language; images are passed from memory."""
+
+	name = "tesserocr"
+
+	def __init__(self, path: Optional[str] = TESSDATA_PREFIX):
+		self.path = path
+		self._apis: Dict[str, Any] = {}
+		self._lock = threading.Lock()
+
+	@property
+	def version(self) -> str:
+		return f"{self.name}:{tesserocr.tesseract_version().split()[1]}"
+
+	def _api(self, language: str):
+		api = self._apis.get(language)
+		if api is None:
+			kwargs = {"path": self.path} if self.path else {}
+			api = tesserocr.PyTessBaseAPI(lang=language, **kwargs)
+			self._apis[language] = api
+		return api
+
+	def image_to_data(self, img, language: str = "eng", psm: int = 3) -> Dict[str, List[Any]]:
+		data: Dict[str, List[Any]] = {k: [] for k in WORD_KEYS}
+		level = tesserocr.RIL.WORD
+		# A handle is not thread-safe; the inline executor may share this process
+		with self._lock:
+			api = self._api(language)
+			api.SetPageSegMode(psm)
+			api.SetImage(img)
+			api.Recognize()
+			it = api.GetIterator()
+			if it is not None:
+				for word in tesserocr.iterate_level(it, level):
+					box = word.BoundingBox(level)
+					if box is None:
+						continue
+					x0, y0, x1, y1 = box
+					data["text"].append(word.GetUTF8Text(level) or "")
+					data["left"].append(x0)
+					data["top"].append(y0)
+					data["width"].append(x1 - x0)
+					data["height"].append(y1 - y0)
+					data["conf"].append(word.Confidence(level))
+			api.Clear()
+		return data
+
+	def close(self):
+		with self._lock:
+			for api in self._apis.values():
+				api.End()
+			self._apis.clear()
+
+
+_ENGINE: Optional[OCREngine] = None
+_ENGINE_PID: Optional[int] = None
+
+
+def _tesserocr_ready() -> bool:
+	if tesserocr is None:
+		return False
+	_, languages = tesserocr.get_languages(TESSDATA_PREFIX) if TESSDATA_PREFIX else tesserocr.get_languages()
+	return bool(languages)
+
+
+def make_engine(name: str = OCR_ENGINE) -> OCREngine:
+	if name == "pytesseract" or (name == "auto" and not _tesserocr_ready()):
+		return PytesseractEngine()
+	if tesserocr is None:
+		raise RuntimeError("OCR_ENGINE=tesserocr but tesserocr is not installed")
+	return TesserocrEngine()
+
+
+def get_engine() -> OCREngine:
+	"""Per-process engine; a forked OCR worker builds its own instead of sharing the parent's handle."""
+	global _ENGINE, _ENGINE_PID
+	if _ENGINE is None or _ENGINE_PID != os.getpid():
+		_ENGINE = make_engine()
+		_ENGINE_PID = os.getpid()
+	return _ENGINE
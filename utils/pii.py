@@ -1,8 +1,10 @@
 from __future__ import annotations
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import re
 
+from utils.scanner import RE_EMAIL, RE_PHONE, RE_SSN, Scan, scan
+
 try:
 	import spacy
 	try:
@@ -12,19 +14,13 @@ try:
 except Exception:
 	NLP = None
 
-RE_EMAIL = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
-RE_SSN = re.compile(r"\b\d{3}-\d{2}-\d{4}\b")
-RE_PHONE = re.compile(r"\b\+?\d[\d\-\s]{7,}\d\b")
+# Masks Scan.replace handles exactly; anything else takes the sequential regex path
+SAFE_MASK = re.compile(r"[^\w\s+\-]+")
 
 
-def detect_pii(text: str) -> Dict[str, Any]:
-	found = {"emails": [], "ssn": [], "phones": [], "persons": [], "orgs": []}
-	for m in RE_EMAIL.finditer(text or ""):
-		found["emails"].append(m.group())
-	for m in RE_SSN.finditer(text or ""):
-		found["ssn"].append(m.group())
-	for m in RE_PHONE.finditer(text or ""):
-		found["phones"].append(m.group())
+def detect_pii(text: str, spans: Optional[Scan] = None) -> Dict[str, Any]:
+	spans = spans or scan(text)
+	found = {"emails": spans.texts("email"), "ssn": spans.texts("ssn"), "phones": spans.texts("phone"), "persons": [], "orgs": []}
 	if NLP:
 		doc = NLP(text or "")
 		for ent in getattr(doc, "ents", []):
@@ -35,8 +31,9 @@ def detect_pii(text: str) -> Dict[str, Any]:
 	return found
 
 
-def redact(text: str, mask: str = "█") -> str:
-	red = RE_EMAIL.sub(mask*8, text)
-	red = RE_SSN.sub(mask*11, red)
-	red = RE_PHONE.sub(mask*8, red)
-	return red
+def redact(text: str, mask: str = "█", spans: Optional[Scan] = None) -> str:
+	if not SAFE_MASK.fullmatch(mask):
+		red = RE_EMAIL.sub(mask*8, text)
+		red = RE_SSN.sub(mask*11, red)
+		return RE_PHONE.sub(mask*8, red)
+	return (spans or scan(text)).replace((("email", mask*8), ("ssn", mask*11), ("phone", mask*8)))
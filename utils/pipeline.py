@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from concurrent.futures import Executor
+import hashlib
+import json
+import os
+
+from utils.docmodel import ColumnarPage
+from utils.segmenter import PageSegments, segment_page, stitch_page
+from utils.features import extract_features_batch
+
+FEATURE_KEYS = ("original_text", "normalized_text", "features")
+# Serving reads only scalar features; token lists stay lazy (see utils.features.FEATURE_PROFILES)
+SERVING_FEATURE_PROFILE = os.environ.get("SERVING_FEATURE_PROFILE", "minimal")
+
+
+def analyze_page(page: Dict[str, Any]) -> Tuple[PageSegments, List[Dict[str, Any]]]:
+	"""Segment one page and featurize its clauses; safe to run in a pool process."""
+	seg = segment_page(page)
+	# One nlp.pipe pass per page; the page pool supplies the process parallelism
+	augs = extract_features_batch(({"text": entry[2]} for entry in seg.entries), n_process=1,
+		profile=SERVING_FEATURE_PROFILE)
+	return seg, [{k: aug[k] for k in FEATURE_KEYS} for aug in augs]
+
+
+def page_fingerprint(page: Dict[str, Any]) -> str:
+	"""Hash of everything segmentation and features read from a page: text and boxes."""
+	h = hashlib.sha256()
+	if isinstance(page, ColumnarPage):
+		h.update(page.text.encode("utf-8"))
+		h.update(page.starts.tobytes())
+		if page.boxes is not None:
+			h.update(page.boxes.tobytes())
+			h.update(page.has_box.tobytes())
+		if page.words is not None:
+			h.update(page.words.starts.tobytes())
+			h.update(page.words.boxes.tobytes())
+			h.update(page.words.lines.tobytes())
+	else:
+		blocks = [(b.get("text", ""), b.get("bbox")) for b in page.get("blocks", [])]
+		h.update(json.dumps(blocks, sort_keys=True).encode("utf-8"))
+	return h.hexdigest()
+
+
+def analysis_to_dict(seg: PageSegments, feats: List[Dict[str, Any]]) -> Dict[str, Any]:
+	"""JSON form of ``analyze_page`` output, stored so later versions can reuse it."""
+	return {"entries": [list(e) for e in seg.entries], "leading": seg.leading, "last_section": seg.last_section, "features": feats}
+
+
+def analysis_from_dict(d: Dict[str, Any], page_number: int) -> Tuple[PageSegments, List[Dict[str, Any]]]:
+	seg = PageSegments(page_number, [tuple(e) for e in d["entries"]], d["leading"], d["last_section"])
+	return seg, d["features"]
+
+
+def iter_analyzed_pages(pages: Iterable[Dict[str, Any]], executor: Optional[Executor] = None,
+		reuse: Optional[Dict[int, Tuple[PageSegments, List[Dict[str, Any]]]]] = None) -> Iterator[Tuple[PageSegments, List[Dict[str, Any]], List[Dict[str, Any]]]]:
+	"""Yield ``(segments, features, clauses)`` per page in document order.
+
+	``reuse`` maps a page's index to an analysis computed earlier (e.g. for the same
+	page of a prior document version); only the other pages are analyzed.
+	"""
+	pages = list(pages)
+	reuse = reuse or {}
+	todo = [p for i, p in enumerate(pages) if i not in reuse]
+	results = executor.map(analyze_page, todo) if executor is not None else map(analyze_page, todo)
+	clause_idx = 0
+	current_section: Optional[str] = None
+	for i in range(len(pages)):
+		seg, feats = reuse[i] if i in reuse else next(results)
+		clauses, clause_idx, current_section = stitch_page(seg, clause_idx, current_section)
+		yield seg, feats, [{**c, **f} for c, f in zip(clauses, feats)]
+
+
+def iter_page_clauses(pages: Iterable[Dict[str, Any]], executor: Optional[Executor] = None) -> Iterator[List[Dict[str, Any]]]:
+	"""Yield featurized clauses page by page in document order.
+
+	Pages are segmented and featurized independently (in ``executor`` when given) and
+	stitched here in order, so clause ids and ``parent_section_title`` match
+	``segment_document`` followed by ``extract_features_for_clause`` with the
+	SERVING_FEATURE_PROFILE profile.
+	"""
+	for _, _, clauses in iter_analyzed_pages(pages, executor):
+		yield clauses
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from typing import Optional
+import math
+import multiprocessing
+import os
+
+# cgroup v2 exposes "<quota> <period>" in one file; v1 splits them
+CGROUP_CPU_MAX = "/sys/fs/cgroup/cpu.max"
+CGROUP_V1_QUOTA = "/sys/fs/cgroup/cpu/cpu.cfs_quota_us"
+CGROUP_V1_PERIOD = "/sys/fs/cgroup/cpu/cpu.cfs_period_us"
+
+
+def process_context():
+	"""Start method for process pools.
+
+	The API and worker processes run threads (schedulers, executors, torch), and a
+	plain fork copies whatever locks those threads hold, which can deadlock the
+	children. forkserver (spawn where unavailable) starts children from a clean
+	single-threaded process instead.
+	"""
+	method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+	return multiprocessing.get_context(method)
+
+
+def _read(path: str) -> Optional[str]:
+	try:
+		with open(path) as f:
+			return f.read().strip()
+	except OSError:
+		return None
+
+
+def _cgroup_cpus() -> Optional[int]:
+	quota = period = None
+	cpu_max = _read(CGROUP_CPU_MAX)
+	if cpu_max:
+		q, _, p = cpu_max.partition(" ")
+		if q != "max":
+			quota, period = q, p
+	else:
+		quota, period = _read(CGROUP_V1_QUOTA), _read(CGROUP_V1_PERIOD)
+	try:
+		quota_f, period_f = float(quota), float(period)
+	except (TypeError, ValueError):
+		return None
+	if quota_f <= 0 or period_f <= 0:
+		return None
+	return max(1, math.ceil(quota_f / period_f))
+
+
+def available_cpus() -> int:
+	"""CPUs this process may actually use: its affinity mask capped by the container's CPU quota.
+
+	``os.cpu_count()`` reports the host's cores, which in a pod with a 2-CPU limit
+	can be dozens.
+	"""
+	try:
+		cpus = len(os.sched_getaffinity(0))
+	except AttributeError:
+		cpus = os.cpu_count() or 1
+	quota = _cgroup_cpus()
+	return max(1, min(cpus, quota) if quota else cpus)
+
+
+def per_job_workers(env_name: str) -> int:
+	"""Size of a pool opened by each job: ``env_name`` if set, else the job's share of the CPUs.
+
+	Queue workers run WORKER_CONCURRENCY jobs side by side, each opening its own
+	pools, so the CPUs are split between them rather than handed to every job.
+	"""
+	if os.environ.get(env_name):
+		return int(os.environ[env_name])
+	jobs = int(os.environ.get("WORKER_CONCURRENCY") or 1)
+	return max(1, available_cpus() // max(1, jobs))
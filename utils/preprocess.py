@@ -1,15 +1,47 @@
 from __future__ import annotations
 
-from typing import List, Dict, Any, Tuple
-import io
+from typing import List, Dict, Any, Iterator, Optional, Tuple, Union
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import os
+import tempfile
 import unicodedata
 
 import fitz  # PyMuPDF
-import pdfplumber
-from pdf2image import convert_from_bytes
-import pytesseract
-from pytesseract import Output
-from docx import Document
+from pdf2image import convert_from_path
+
+from utils.docmodel import ColumnarDocument, ColumnarPage, WordIndex
+from utils.docx_stream import iter_docx_blocks
+from utils.ocr_cache import get_ocr_cache, page_key
+from utils.ocr_engine import get_engine
+from utils.pools import per_job_workers, process_context
+
+OCR_DPI = 300
+
+
+# Raw bytes, or a path to a (decrypted) file on local disk
+Source = Union[bytes, str, os.PathLike]
+
+
+def _open_pdf(source: Source) -> fitz.Document:
+	if isinstance(source, (bytes, bytearray)):
+		return fitz.open(stream=source, filetype="pdf")
+	return fitz.open(os.fspath(source), filetype="pdf")
+
+
+def _parse_ladder(spec: str) -> List[Tuple[int, int]]:
+	return [tuple(int(x) for x in step.split(":")) for step in spec.split(",") if step.strip()]
+
+
+# (dpi, psm) steps tried per page, cheapest first, until the page reaches OCR_CONF_TARGET
+OCR_LADDER = _parse_ladder(os.environ.get("OCR_LADDER", "150:6,300:6,300:3"))
+OCR_CONF_TARGET = float(os.environ.get("OCR_CONF_TARGET", "80"))
+# Processes recognizing pages in parallel, and how many pages may be in flight at once
+OCR_WORKERS = per_job_workers("OCR_WORKERS")
+OCR_WINDOW = int(os.environ.get("OCR_WINDOW") or 2 * OCR_WORKERS)
+# A page with a text layer is still OCR'd when images cover more than this fraction of it
+MIXED_IMAGE_COVERAGE = float(os.environ.get("MIXED_IMAGE_COVERAGE", "0.5"))
 
 
 def _normalize_text(s: str) -> str:
@@ -35,104 +67,297 @@ def _join_hyphenated(lines: List[str]) -> List[str]:
 	return joined
 
 
-def detect_pdf_has_text(pdf_bytes: bytes) -> bool:
-	try:
-		with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
-			for page in pdf.pages:
-				if (page.extract_text() or "").strip():
-					return True
-	except Exception:
-		pass
-	try:
-		doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-		for page in doc:
-			blocks = page.get_text("blocks") or []
-			if any((b[4] or "").strip() for b in blocks):
-				return True
-	finally:
-		try:
-			doc.close()
-		except Exception:
-			pass
-	return False
+def _text_layout_blocks(blocks: List[tuple]) -> List[Dict[str, Any]]:
+	blocks_out: List[Dict[str, Any]] = []
+	char_offset = 0
+	for b in blocks:
+		x0, y0, x1, y1, text, block_no, block_type = b[0], b[1], b[2], b[3], b[4], b[5], (b[6] if len(b) > 6 else 0)
+		if not (text or "").strip():
+			continue
+		norm = _normalize_text(text)
+		lines = _join_hyphenated(norm.splitlines())
+		norm = "\n".join(lines)
+		length = len(norm)
+		blocks_out.append({
+			"text": norm,
+			"bbox": {"x": x0, "y": y0, "w": x1 - x0, "h": y1 - y0},
+			"char_start": char_offset,
+			"char_end": char_offset + length,
+			"block_no": block_no,
+			"type": block_type,
+		})
+		char_offset += length + 1
+	return blocks_out
+
 
+def _word_index(blocks_out: List[Dict[str, Any]], words: List[tuple]) -> WordIndex:
+	"""Place PyMuPDF words (x0, y0, x1, y1, word, block_no, line_no, word_no) at their
+	character offsets in the page text built from ``blocks_out``."""
+	by_block: Dict[int, List[tuple]] = {}
+	for w in words:
+		by_block.setdefault(w[5], []).append(w)
+	entries: List[Tuple[int, int, float, float, float, float, int]] = []
+	line_ids: Dict[Tuple[int, int], int] = {}
+	for b in blocks_out:
+		text, base = b["text"], b["char_start"]
+		pos = 0
+		for x0, y0, x1, y1, word, block_no, line_no, _ in by_block.get(b["block_no"], []):
+			word = unicodedata.normalize("NFC", word)
+			while pos < len(text) and text[pos].isspace():
+				pos += 1
+			if text.startswith(word, pos):
+				start, length = pos, len(word)
+			elif word.endswith("-") and text.startswith(word[:-1], pos):
+				# Line-end hyphen removed by _join_hyphenated
+				start, length = pos, len(word) - 1
+			else:
+				start = text.find(word, pos)
+				if start < 0:
+					continue
+				length = len(word)
+			pos = start + length
+			line = line_ids.setdefault((block_no, line_no), len(line_ids))
+			entries.append((base + start, base + pos, x0, y0, x1, y1, line))
+	return WordIndex.from_words(entries)
 
-def extract_pdf_text_layout(pdf_bytes: bytes) -> Dict[str, Any]:
-	doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-	pages_out: List[Dict[str, Any]] = []
+
+def _text_layout_page(page_number: int, page, textpage, blocks: List[tuple], **extra) -> ColumnarPage:
+	"""Blocks and word boxes of a text-layer page; both read the same ``textpage``."""
+	blocks_out = _text_layout_blocks(blocks)
+	out = ColumnarPage.from_dict({"page_number": page_number, "blocks": blocks_out, **extra})
+	out.words = _word_index(blocks_out, page.get_text("words", textpage=textpage) or [])
+	return out
+
+
+def extract_pdf_text_layout(source: Source) -> ColumnarDocument:
+	doc = _open_pdf(source)
+	pages_out: List[ColumnarPage] = []
 	for i, page in enumerate(doc, start=1):
-		blocks_out: List[Dict[str, Any]] = []
-		blocks = page.get_text("blocks") or []
-		char_offset = 0
-		for b in blocks:
-			x0, y0, x1, y1, text, block_no, block_type = b[0], b[1], b[2], b[3], b[4], b[5], (b[6] if len(b) > 6 else 0)
-			if not (text or "").strip():
-				continue
-			norm = _normalize_text(text)
-			lines = _join_hyphenated(norm.splitlines())
-			norm = "\n".join(lines)
-			length = len(norm)
-			blocks_out.append({
-				"text": norm,
-				"bbox": {"x": x0, "y": y0, "w": x1 - x0, "h": y1 - y0},
-				"char_start": char_offset,
-				"char_end": char_offset + length,
-				"block_no": block_no,
-				"type": block_type,
-			})
-			char_offset += length + 1
-		pages_out.append({
-			"page_number": i,
-			"blocks": blocks_out,
-		})
+		textpage = page.get_textpage()
+		pages_out.append(_text_layout_page(i, page, textpage, page.get_text("blocks", textpage=textpage) or []))
 	doc.close()
-	return {"type": "pdf_text", "page_count": len(pages_out), "pages": pages_out}
-
-
-def ocr_scanned_pdf(pdf_bytes: bytes, language: str = "eng", psm: int = 3) -> Dict[str, Any]:
-	images = convert_from_bytes(pdf_bytes, fmt="png", dpi=300)
-	pages_out: List[Dict[str, Any]] = []
-	for i, img in enumerate(images, start=1):
-		conf_accum = 0.0
-		conf_count = 0
-		data = pytesseract.image_to_data(img, lang=language, config=f"--psm {psm}", output_type=Output.DICT)
-		blocks_out: List[Dict[str, Any]] = []
-		char_offset = 0
-		for j in range(len(data["text"])):
-			text = (data["text"][j] or "").strip()
-			if not text:
+	return ColumnarDocument("pdf_text", pages_out)
+
+
+def classify_pdf_page(page, blocks: List[tuple]) -> str:
+	"""Return "text", "scanned" (no text layer) or "mixed" (text layer plus large images)."""
+	if not any((b[4] or "").strip() for b in blocks if (b[6] if len(b) > 6 else 0) == 0):
+		return "scanned"
+	area = abs(page.rect)
+	covered = 0.0
+	for info in page.get_image_info():
+		covered += abs(fitz.Rect(info["bbox"]) & page.rect)
+	return "mixed" if area and covered / area > MIXED_IMAGE_COVERAGE else "text"
+
+
+def pdf_page_fingerprint(doc: fitz.Document, page) -> str:
+	"""Hash of what a page draws (geometry, content streams, embedded images), cheap to
+	compute before OCR so unchanged scans in a revised upload can be recognized."""
+	h = hashlib.sha256(f"{tuple(page.rect)}:{page.rotation}".encode("utf-8"))
+	h.update(page.read_contents())
+	for img in page.get_images(full=True):
+		h.update(doc.xref_stream_raw(img[0]) or b"")
+	return h.hexdigest()
+
+
+def extract_pdf_hybrid(source: Source, reuse: Optional[Dict[str, ColumnarPage]] = None) -> ColumnarDocument:
+	"""Read the text layer where it covers the page and OCR only scanned/mixed pages.
+
+	Pages are classified in a single PyMuPDF pass; OCR'd pages keep the OCR block
+	shape (bboxes rescaled to PDF points) and are merged back in page order. OCR'd pages
+	record their ``source_fp``; a page whose fingerprint is in ``reuse`` (OCR output
+	of an earlier version of the document) is taken from there instead of OCR'd.
+	"""
+	pages_out: Dict[int, Any] = {}
+	ocr_pages: List[int] = []
+	image_pages = 0
+	with _open_pdf(source) as doc:
+		for i, page in enumerate(doc, start=1):
+			textpage = page.get_textpage()
+			blocks = page.get_text("blocks", textpage=textpage) or []
+			kind = classify_pdf_page(page, blocks)
+			if kind == "text":
+				pages_out[i] = _text_layout_page(i, page, textpage, blocks, page_kind=kind)
 				continue
-			x, y, w, h = data["left"][j], data["top"][j], data["width"][j], data["height"][j]
-			conf = float(data.get("conf", [0])[j] or 0)
-			conf_accum += max(conf, 0)
-			conf_count += 1
-			norm = _normalize_text(text)
-			length = len(norm)
-			blocks_out.append({
-				"text": norm,
-				"bbox": {"x": x, "y": y, "w": w, "h": h},
-				"char_start": char_offset,
-				"char_end": char_offset + length,
-				"ocr_conf": conf,
-			})
-			char_offset += length + 1
-		avg_conf = (conf_accum / conf_count) if conf_count else 0.0
-		pages_out.append({
-			"page_number": i,
-			"blocks": blocks_out,
-			"ocr_avg_conf": avg_conf,
-			"needs_review": avg_conf < 60.0,
+			image_pages += 1
+			fp = pdf_page_fingerprint(doc, page)
+			prior = (reuse or {}).get(fp)
+			if prior is not None:
+				extra = {k: v for k, v in prior.extra.items() if k != "ocr_settings"}
+				pages_out[i] = ColumnarPage(i, prior.text, prior.starts, prior.ends, prior.boxes, prior.has_box,
+					prior.columns, prior.strings, {**extra, "page_kind": kind, "source_fp": fp, "ocr_reused": True}, prior.words)
+			else:
+				pages_out[i] = {"page_kind": kind, "source_fp": fp}
+				ocr_pages.append(i)
+	if ocr_pages:
+		# Each page climbs OCR_LADDER on its own; clean scans stop at the cheapest step
+		for page in iter_ocr_pages(source, page_numbers=ocr_pages):
+			page.update(pages_out[page["page_number"]])
+			pages_out[page["page_number"]] = ColumnarPage.from_dict(page)
+	if not image_pages:
+		doc_type = "pdf_text"
+	elif image_pages == len(pages_out):
+		doc_type = "pdf_scanned"
+	else:
+		doc_type = "pdf_hybrid"
+	return ColumnarDocument(doc_type, [pages_out[i] for i in sorted(pages_out)])
+
+
+def ocr_image(img, page_number: int, language: str = "eng", psm: int = 3) -> Dict[str, Any]:
+	conf_accum = 0.0
+	conf_count = 0
+	data = get_engine().image_to_data(img, language, psm)
+	blocks_out: List[Dict[str, Any]] = []
+	char_offset = 0
+	for j in range(len(data["text"])):
+		text = (data["text"][j] or "").strip()
+		if not text:
+			continue
+		x, y, w, h = data["left"][j], data["top"][j], data["width"][j], data["height"][j]
+		conf = float(data.get("conf", [0])[j] or 0)
+		conf_accum += max(conf, 0)
+		conf_count += 1
+		norm = _normalize_text(text)
+		length = len(norm)
+		blocks_out.append({
+			"text": norm,
+			"bbox": {"x": x, "y": y, "w": w, "h": h},
+			"char_start": char_offset,
+			"char_end": char_offset + length,
+			"ocr_conf": conf,
 		})
-	return {"type": "pdf_scanned", "page_count": len(pages_out), "pages": pages_out}
+		char_offset += length + 1
+	avg_conf = (conf_accum / conf_count) if conf_count else 0.0
+	return {
+		"page_number": page_number,
+		"blocks": blocks_out,
+		"ocr_avg_conf": avg_conf,
+		"needs_review": avg_conf < 60.0,
+	}
+
+
+_OCR_PDF_PATH: Optional[str] = None
+
+
+def _init_ocr_worker(pdf_path: str) -> None:
+	global _OCR_PDF_PATH
+	_OCR_PDF_PATH = pdf_path
+	# One tesseract thread per process; the pool provides the parallelism
+	os.environ.setdefault("OMP_THREAD_LIMIT", "1")
 
 
-def parse_docx_with_styles(docx_bytes: bytes) -> Dict[str, Any]:
-	doc = Document(io.BytesIO(docx_bytes))
-	pages_out: List[Dict[str, Any]] = []
+def _ocr_pdf_page_at(pdf_path: str, page_number: int, language: str, dpi: int, psm: int) -> Dict[str, Any]:
+	cache = get_ocr_cache()
+	images = convert_from_path(pdf_path, fmt="png", dpi=dpi, first_page=page_number, last_page=page_number)
+	try:
+		key = page_key(images[0], language, psm, dpi, get_engine().version) if cache else None
+		cached = cache.get(key) if cache else None
+		if cached is not None:
+			# Repeated letterhead/signature pages skip Tesseract entirely
+			page = {**cached, "page_number": page_number, "ocr_cache_hit": True}
+		else:
+			page = ocr_image(images[0], page_number, language, psm)
+			if cache:
+				cache.put(key, {k: v for k, v in page.items() if k != "page_number"})
+	finally:
+		for img in images:
+			img.close()
+	return boxes_to_points(page, dpi)
+
+
+def boxes_to_points(page: Dict[str, Any], dpi: int) -> Dict[str, Any]:
+	"""Rescale an OCR'd page's block boxes from ``dpi`` pixels to PDF points, in place.
+
+	Text-layer pages are already in points, so every page of a hybrid document shares
+	the units utils.viewer draws in.
+	"""
+	scale = 72.0 / dpi
+	for b in page["blocks"]:
+		b["bbox"] = {k: round(v * scale, 2) for k, v in b["bbox"].items()}
+	return page
+
+
+def ocr_pdf_page(page_number: int, language: str = "eng", ladder: Optional[List[Tuple[int, int]]] = None, pdf_path: Optional[str] = None, target: Optional[float] = None) -> Dict[str, Any]:
+	"""Rasterize and recognize a single page, escalating through ``ladder`` until ``target`` confidence.
+
+	Only this page's image is held in memory. The most confident attempt is kept
+	and its settings are recorded under ``ocr_settings``.
+	"""
+	ladder = ladder or OCR_LADDER
+	target = OCR_CONF_TARGET if target is None else target
+	best: Optional[Dict[str, Any]] = None
+	error: Optional[Exception] = None
+	attempts = 0
+	hits = 0
+	for dpi, psm in ladder:
+		attempts += 1
+		try:
+			page = _ocr_pdf_page_at(pdf_path or _OCR_PDF_PATH, page_number, language, dpi, psm)
+		except Exception as e:
+			error = e
+			continue
+		hits += 1 if page.pop("ocr_cache_hit", False) else 0
+		page["ocr_settings"] = {"dpi": dpi, "psm": psm}
+		if best is None or page["ocr_avg_conf"] > best["ocr_avg_conf"]:
+			best = page
+		if page["ocr_avg_conf"] >= target:
+			break
+	if best is None:
+		raise error
+	best["ocr_settings"]["attempts"] = attempts
+	best["ocr_settings"]["cache_hits"] = hits
+	return best
+
+
+def iter_ocr_pages(source: Source, language: str = "eng", psm: Optional[int] = None, workers: Optional[int] = None, window: Optional[int] = None, page_numbers: Optional[List[int]] = None, ladder: Optional[List[Tuple[int, int]]] = None) -> Iterator[Dict[str, Any]]:
+	"""Yield OCR'd pages in order, with at most ``window`` pages in flight across ``workers`` processes.
+
+	``page_numbers`` (1-based) restricts OCR to those pages; all pages by default.
+	A fixed ``psm`` recognizes once at OCR_DPI; otherwise each page climbs ``ladder``.
+	"""
+	if ladder is None:
+		ladder = [(OCR_DPI, psm)] if psm is not None else OCR_LADDER
+	workers = OCR_WORKERS if workers is None else workers
+	window = max(1, OCR_WINDOW if window is None else window)
+	if page_numbers is None:
+		with _open_pdf(source) as doc:
+			page_numbers = list(range(1, doc.page_count + 1))
+	page_count = len(page_numbers)
+	# Workers read the PDF from disk instead of each receiving a copy of the bytes
+	with tempfile.TemporaryDirectory() as tmp:
+		if isinstance(source, (bytes, bytearray)):
+			pdf_path = os.path.join(tmp, "scan.pdf")
+			with open(pdf_path, "wb") as f:
+				f.write(source)
+		else:
+			pdf_path = os.fspath(source)
+		if workers <= 1 or page_count < 2:
+			for n in page_numbers:
+				yield ocr_pdf_page(n, language, ladder, pdf_path)
+			return
+		# Runs inside threaded API/worker processes and page-pool children: never fork from them
+		with ProcessPoolExecutor(max_workers=min(workers, page_count), mp_context=process_context(), initializer=_init_ocr_worker, initargs=(pdf_path,)) as pool:
+			pending: deque = deque()
+			todo = iter(page_numbers)
+			remaining = page_count
+			while remaining or pending:
+				while remaining and len(pending) < window:
+					pending.append(pool.submit(ocr_pdf_page, next(todo), language, ladder))
+					remaining -= 1
+				yield pending.popleft().result()
+
+
+def ocr_scanned_pdf(source: Source, language: str = "eng", psm: Optional[int] = None, workers: Optional[int] = None, window: Optional[int] = None) -> ColumnarDocument:
+	pages_out = [ColumnarPage.from_dict(p) for p in iter_ocr_pages(source, language, psm, workers, window)]
+	return ColumnarDocument("pdf_scanned", pages_out)
+
+
+def parse_docx_with_styles(source: Source) -> ColumnarDocument:
+	"""Stream headers, body paragraphs, table cells and footers into one page."""
 	blocks_out: List[Dict[str, Any]] = []
 	char_offset = 0
-	for p in doc.paragraphs:
-		text = _normalize_text(p.text or "")
+	for block in iter_docx_blocks(source):
+		text = _normalize_text(block["text"])
 		if not text:
 			continue
 		length = len(text)
@@ -141,26 +366,22 @@ def parse_docx_with_styles(docx_bytes: bytes) -> Dict[str, Any]:
 			"bbox": None,
 			"char_start": char_offset,
 			"char_end": char_offset + length,
-			"style": getattr(p.style, 'name', None),
-			"num": getattr(p._p.pPr.numPr, 'numId', None) if hasattr(p._p, 'pPr') and getattr(p._p.pPr, 'numPr', None) else None,
+			"style": block["style"],
+			"num": block["num"],
+			"part": block["part"],
 		})
 		char_offset += length + 1
-	pages_out.append({"page_number": 1, "blocks": blocks_out})
-	return {"type": "docx", "page_count": 1, "pages": pages_out}
+	return ColumnarDocument("docx", [ColumnarPage.from_dict({"page_number": 1, "blocks": blocks_out})])
 
 
-def preprocess_file(file_bytes: bytes, filename: str) -> Dict[str, Any]:
+def preprocess_file(source: Source, filename: str, reuse: Optional[Dict[str, ColumnarPage]] = None) -> ColumnarDocument:
+	"""Parse an upload given as bytes or as a local path; ``filename`` picks the parser.
+
+	``reuse`` maps ``source_fp`` to OCR'd pages of a prior version (PDF only).
+	"""
 	if filename.lower().endswith(".pdf"):
-		has_text = detect_pdf_has_text(file_bytes)
-		if has_text:
-			return extract_pdf_text_layout(file_bytes)
-		else:
-			# try both PSM 6 then 3 for layout text
-			try:
-				return ocr_scanned_pdf(file_bytes, psm=6)
-			except Exception:
-				return ocr_scanned_pdf(file_bytes, psm=3)
+		return extract_pdf_hybrid(source, reuse)
 	elif filename.lower().endswith(".docx"):
-		return parse_docx_with_styles(file_bytes)
+		return parse_docx_with_styles(source)
 	else:
 		raise ValueError("Unsupported file type")
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from functools import lru_cache
+import re
+
+RE_NUM = re.compile(r"\b\d{4,}\b")
+RE_MONEY = re.compile(r"\b(?:\$|€|£)\s?\d{1,3}(?:[\,\.]\d{3})*(?:\.\d+)?\b", re.I)
+RE_PERCENT = re.compile(r"\b\d{1,3}\s?%\b")
+RE_DATE = re.compile(r"\b(?:\d{1,2}[\-/]\d{1,2}[\-/]\d{2,4}|(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\s+\d{1,2},?\s+\d{2,4})\b", re.I)
+RE_DURATION = re.compile(r"\b\d+\s+(?:day|days|month|months|year|years|quarter|quarters)\b", re.I)
+RE_EMAIL = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+RE_URL = re.compile(r"https?://\S+|www\.\S+", re.I)
+RE_SSN = re.compile(r"\b\d{3}-\d{2}-\d{4}\b")
+RE_PHONE = re.compile(r"\b\+?\d[\d\-\s]{7,}\d\b")
+
+PATTERNS: Dict[str, "re.Pattern[str]"] = {
+	"money": RE_MONEY,
+	"date": RE_DATE,
+	"percent": RE_PERCENT,
+	"duration": RE_DURATION,
+	"email": RE_EMAIL,
+	"url": RE_URL,
+	"ssn": RE_SSN,
+	"phone": RE_PHONE,
+	"number": RE_NUM,
+}
+KINDS = tuple(PATTERNS)
+
+# Every character a match of each kind can start with, grouped so the prefilter tests
+# one cheap class per position before trying the patterns that can start there
+START_GROUPS = (
+	(r"\d", ("date", "percent", "duration", "ssn", "phone", "number", "email")),
+	(r"[$€£]", ("money",)),
+	(r"\+", ("phone", "email")),
+	(r"(?i:[a-z])", ("date", "url", "email")),
+	(r"[._%-]", ("email",)),
+)
+# An email can only start where the local part starts, or right where the previous one ended
+_EMAIL_START = r"(?<![A-Za-z0-9._%+-])"
+
+
+def _lookahead(kind: str) -> str:
+	p = PATTERNS[kind]
+	# Trailing word boundaries are dropped so the candidates also cover text where a
+	# later substitution changes the next character (see Scan.staged)
+	body = p.pattern[:-2] if p.pattern.endswith(r"\b") else p.pattern
+	body = f"(?i:{body})" if p.flags & re.I else body
+	return f"{_EMAIL_START}(?={body})" if kind == "email" else f"(?={body})"
+
+
+PREFILTER = re.compile("|".join(
+	f"(?={cls})(?:{'|'.join(_lookahead(k) for k in kinds)})" for cls, kinds in START_GROUPS
+))
+_GROUP_RES = [(re.compile(cls), kinds) for cls, kinds in START_GROUPS]
+# Stand-in for replaced spans in Scan.staged: a non-word character none of the patterns can match
+_FILL = "\x00"
+
+
+@lru_cache(maxsize=4096)
+def _kinds_at(char: str) -> Tuple[str, ...]:
+	kinds = {k for cls, ks in _GROUP_RES if cls.match(char) for k in ks}
+	return tuple(k for k in KINDS if k in kinds)
+
+
+class Span(NamedTuple):
+	kind: str
+	start: int
+	end: int
+
+
+class Scan:
+	"""Typed spans of one text, as ``PATTERNS[kind].finditer(text)`` would report them.
+
+	The text is read once by PREFILTER, which stops at every position where some kind
+	can match; only the kinds that can start with that character are then tried there.
+	"""
+
+	__slots__ = ("text", "candidates", "spans")
+
+	def __init__(self, text: str):
+		self.text = text
+		self.candidates = [m.start() for m in PREFILTER.finditer(text)]
+		self.spans: Dict[str, List[Tuple[int, int]]] = _find(text, self.candidates, KINDS)
+
+	def has(self, kind: str) -> bool:
+		return bool(self.spans[kind])
+
+	def texts(self, kind: str) -> List[str]:
+		return [self.text[s:e] for s, e in self.spans[kind]]
+
+	def typed_spans(self) -> List[Span]:
+		"""All spans of every kind ordered by position; spans of different kinds may overlap."""
+		spans = [Span(k, s, e) for k, ss in self.spans.items() for s, e in ss]
+		return sorted(spans, key=lambda sp: (sp.start, sp.end))
+
+	def staged(self, kinds: Sequence[str]) -> Dict[str, List[Tuple[int, int]]]:
+		"""Spans of ``kinds`` when each kind is searched after the previous ones were replaced.
+
+		Replaced spans are read as a run of _FILL characters. That behaves like the real
+		replacement text as long as it begins and ends with a non-word character and no
+		later pattern can match into it (true for the placeholders in utils.features
+		and for the masks utils.pii.redact accepts).
+		"""
+		out: Dict[str, List[Tuple[int, int]]] = {}
+		blocked: List[Tuple[int, int]] = []
+		for kind in kinds:
+			if not blocked:
+				spans = self.spans[kind]
+			else:
+				# A replaced span can put a word boundary in front of the next character
+				candidates = sorted(set(self.candidates).union(e for _, e in blocked if e < len(self.text)))
+				spans = _find(_fill(self.text, blocked), candidates, (kind,))[kind]
+			out[kind] = spans
+			if spans:
+				blocked = sorted(blocked + spans)
+		return out
+
+	def replace(self, subs: Sequence[Tuple[str, str]]) -> str:
+		"""``text`` after ``PATTERNS[kind].sub(repl, ...)`` for each (kind, repl) in order.
+
+		Exact when every ``repl`` satisfies the condition in ``staged``.
+		"""
+		staged = self.staged([k for k, _ in subs])
+		repl = dict(subs)
+		spans = sorted((s, e, repl[k]) for k, ss in staged.items() for s, e in ss)
+		if not spans:
+			return self.text
+		parts = []
+		pos = 0
+		for s, e, r in spans:
+			parts.append(self.text[pos:s])
+			parts.append(r)
+			pos = e
+		parts.append(self.text[pos:])
+		return "".join(parts)
+
+
+def _find(text: str, candidates: List[int], kinds: Sequence[str]) -> Dict[str, List[Tuple[int, int]]]:
+	out: Dict[str, List[Tuple[int, int]]] = {k: [] for k in kinds}
+	ends = dict.fromkeys(kinds, 0)
+	for pos in candidates:
+		for kind in _kinds_at(text[pos]):
+			if kind not in ends or pos < ends[kind]:
+				continue
+			pattern = PATTERNS[kind]
+			m = pattern.match(text, pos)
+			while m:
+				out[kind].append(m.span())
+				ends[kind] = m.end()
+				# Emails are only candidates at local-part starts; the next one may begin mid-run
+				m = pattern.match(text, m.end()) if kind == "email" else None
+	return out
+
+
+def _fill(text: str, spans: List[Tuple[int, int]]) -> str:
+	parts = []
+	pos = 0
+	for s, e in spans:
+		parts.append(text[pos:s])
+		parts.append(_FILL * (e - s))
+		pos = e
+	parts.append(text[pos:])
+	return "".join(parts)
+
+
+def scan(text: Optional[str]) -> Scan:
+	return Scan(text or "")
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, NamedTuple, Optional, Tuple
+from bisect import bisect_left, bisect_right
 import re
 
+from utils.docmodel import ColumnarPage
+
 try:
 	import spacy
 	NLP = spacy.blank("en")
@@ -18,14 +21,30 @@ HEADING_PATTERNS = [
 	re.compile(r"^(confidentiality|termination|liability|payment|indemnity|governing law|definitions)\b", re.I),
 	re.compile(r"^[\-\*\u2022]\s+"),  # bullets
 ]
+# All of the above as one alternation, so each line is tested in a single regex call
+HEADING_RE = re.compile("|".join(f"(?:{p.pattern})" for p in HEADING_PATTERNS), re.I)
 
 
 def _is_heading(line: str) -> bool:
-	line = line.strip()
-	for pat in HEADING_PATTERNS:
-		if pat.search(line):
-			return True
-	return False
+	return HEADING_RE.match(line.strip()) is not None
+
+
+class _Intervals:
+	"""Disjoint [start, end) intervals sorted by start; point lookups by bisection."""
+
+	__slots__ = ("starts", "ends")
+
+	def __init__(self, intervals):
+		self.starts = [s for s, _ in intervals]
+		self.ends = [e for _, e in intervals]
+
+	def contains(self, pos: int) -> bool:
+		i = bisect_right(self.starts, pos) - 1
+		return i >= 0 and pos < self.ends[i]
+
+	def overlapping(self, start: int, end: int) -> range:
+		"""Indexes of intervals that intersect [start, end)."""
+		return range(bisect_right(self.ends, start), bisect_left(self.starts, end))
 
 
 def _split_lines_keep_offsets(text: str) -> List[Tuple[str, int, int]]:
@@ -50,39 +69,37 @@ def _spacy_sentences(text: str) -> List[Tuple[str, int, int]]:
 	return [(sent.text, sent.start_char, sent.end_char) for sent in doc.sents]
 
 
-def _merge_short(sentences: List[Tuple[str, int, int]], headings_map: Dict[int, str]) -> List[Tuple[str, int, int]]:
+def _merge_short(sentences: List[Tuple[str, int, int]], headings: _Intervals) -> List[Tuple[str, int, int]]:
 	merged: List[Tuple[str, int, int]] = []
-	buf: Optional[Tuple[str, int, int]] = None
+	# Pending run of short sentences: texts, start of the first, end of the last
+	buf: List[str] = []
+	buf_start = buf_end = 0
+
+	def flush():
+		if buf:
+			merged.append((" ".join(buf), buf_start, buf_end))
+			buf.clear()
+
 	for text, s, e in sentences:
-		length = len(text.strip())
-		is_heading_here = any(s >= hs and s < he for hs, he in headings_map.keys())
-		if is_heading_here:
-			if buf:
-				merged.append(buf)
-				buf = None
+		if headings.contains(s):
+			flush()
 			merged.append((text, s, e))
 			continue
-		if length < 80:
+		if len(text.strip()) < 80:
 			if not buf:
-				buf = (text, s, e)
-			else:
-				buf = (buf[0] + " " + text, buf[1], e)
+				buf_start = s
+			buf.append(text)
+			buf_end = e
 			continue
-		if buf:
-			merged.append(buf)
-			buf = None
+		flush()
 		merged.append((text, s, e))
-	if buf:
-		merged.append(buf)
+	flush()
 	return merged
 
 
-def _collect_headings(text: str) -> Dict[Tuple[int, int], str]:
-	headings: Dict[Tuple[int, int], str] = {}
-	for line, s, e in _split_lines_keep_offsets(text):
-		if _is_heading(line):
-			headings[(s, e)] = line.strip()
-	return headings
+def _collect_headings(text: str) -> _Intervals:
+	"""Heading lines of ``text`` as sorted (start, end) line intervals."""
+	return _Intervals([(s, e) for line, s, e in _split_lines_keep_offsets(text) if _is_heading(line)])
 
 
 def _chunk_long(text: str, max_tokens: int = 512, overlap: int = 50) -> List[str]:
@@ -103,66 +120,120 @@ def _chunk_long(text: str, max_tokens: int = 512, overlap: int = 50) -> List[str
 	return parts
 
 
-def segment_pages_to_clauses(pages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-	clauses: List[Dict[str, Any]] = []
-	clause_idx = 0
-	current_section: Optional[str] = None
-	for page in pages:
-		page_num = int(page.get("page_number", 1))
+class PageSegments(NamedTuple):
+	"""Clauses of one page before document-wide numbering.
+
+	Each entry is (local clause no, part no or None, text, start_char, end_char, bboxes,
+	section). Entries before the page's first heading carry section None and take the
+	section that is current when the page is stitched, so pages can be segmented
+	independently and in parallel.
+	"""
+	page_number: int
+	entries: List[Tuple[int, Optional[int], str, int, int, List[Dict[str, Any]], Optional[str]]]
+	leading: int
+	last_section: Optional[str]
+
+
+def segment_page(page: Dict[str, Any], merge_short: bool = True) -> PageSegments:
+	page_num = int(page.get("page_number", 1))
+	block_spans: Optional[_Intervals] = None
+	block_boxes: List[Optional[Dict[str, Any]]] = []
+	if isinstance(page, ColumnarPage):
+		# Already one newline-joined buffer with block offsets
+		full_text = page.text
+	else:
 		# If using preprocess output, join block texts with newlines and keep bboxes map
 		blocks = page.get("blocks", [])
-		offset_map: List[Tuple[int, int, Dict[str, Any]]] = []
+		spans = []
 		text_accum = []
 		pos = 0
 		for b in blocks:
 			bt = b.get("text", "")
-			start = pos
 			text_accum.append(bt)
+			spans.append((pos, pos + len(bt)))
+			block_boxes.append(b.get("bbox"))
 			pos += len(bt) + 1
-			offset_map.append((start, start + len(bt), b.get("bbox")))
 		full_text = "\n".join(text_accum)
+		block_spans = _Intervals(spans)
+
+	headings = _collect_headings(full_text)
+	sents = _spacy_sentences(full_text)
+	# merge_short joins runs of short sentences into one clause
+	merged = _merge_short(sents, headings) if merge_short else sents
 
-		headings = _collect_headings(full_text)
-		sents = _spacy_sentences(full_text)
-		merged = _merge_short(sents, headings)
-
-		for text, start_char, end_char in merged:
-			line_is_heading = any(start_char >= hs and start_char < he for hs, he in headings.keys())
-			if line_is_heading:
-				current_section = text.strip()
-				continue
-			# collect bboxes intersecting this span
-			bboxes = []
-			for s, e, bb in offset_map:
-				if e <= start_char or s >= end_char:
-					continue
-				if bb:
-					bboxes.append(bb)
-			clause_idx += 1
-			clause_id = f"c_{clause_idx:04d}"
-			chunks = _chunk_long(text)
-			if len(chunks) == 1:
-				clauses.append({
-					"clause_id": clause_id,
-					"text": text.strip(),
-					"start_char": start_char,
-					"end_char": end_char,
-					"page": page_num,
-					"bounding_boxes": bboxes,
-					"parent_section_title": current_section,
-				})
-			else:
-				for part_idx, chunk_text in enumerate(chunks, start=1):
-					clauses.append({
-						"clause_id": f"{clause_id}_part{part_idx}",
-						"parent_clause_id": clause_id,
-						"text": chunk_text.strip(),
-						"start_char": start_char,
-						"end_char": end_char,
-						"page": page_num,
-						"bounding_boxes": bboxes,
-						"parent_section_title": current_section,
-					})
+	entries = []
+	leading = 0
+	current_section: Optional[str] = None
+	seen_heading = False
+	local_idx = 0
+	for text, start_char, end_char in merged:
+		if headings.contains(start_char):
+			current_section = text.strip()
+			seen_heading = True
+			continue
+		if block_spans is None:
+			# Tight per-line word boxes when the page has a word index, found by bisection
+			bboxes = page.span_boxes(start_char, end_char)
+		else:
+			# Blocks are laid out in order, so the ones intersecting this span are contiguous
+			bboxes = [bb for bb in (block_boxes[i] for i in block_spans.overlapping(start_char, end_char)) if bb]
+		local_idx += 1
+		chunks = _chunk_long(text)
+		if len(chunks) == 1:
+			entries.append((local_idx, None, text.strip(), start_char, end_char, bboxes, current_section))
+		else:
+			for part_idx, chunk_text in enumerate(chunks, start=1):
+				entries.append((local_idx, part_idx, chunk_text.strip(), start_char, end_char, bboxes, current_section))
+		if not seen_heading:
+			leading = len(entries)
+	return PageSegments(page_num, entries, leading, current_section if seen_heading else None)
+
+
+def stitch_page(seg: PageSegments, clause_offset: int, current_section: Optional[str]) -> Tuple[List[Dict[str, Any]], int, Optional[str]]:
+	"""Number one page's clauses after ``clause_offset`` clauses and resolve inherited sections.
+
+	Returns (clauses, new clause offset, section current after this page).
+	"""
+	clauses: List[Dict[str, Any]] = []
+	last_idx = 0
+	for n, (local_idx, part_idx, text, start_char, end_char, bboxes, section) in enumerate(seg.entries):
+		if n < seg.leading:
+			section = current_section
+		last_idx = local_idx
+		clause_id = f"c_{clause_offset + local_idx:04d}"
+		if part_idx is None:
+			clauses.append({
+				"clause_id": clause_id,
+				"text": text,
+				"start_char": start_char,
+				"end_char": end_char,
+				"page": seg.page_number,
+				"bounding_boxes": bboxes,
+				"parent_section_title": section,
+			})
+		else:
+			clauses.append({
+				"clause_id": f"{clause_id}_part{part_idx}",
+				"parent_clause_id": clause_id,
+				"text": text,
+				"start_char": start_char,
+				"end_char": end_char,
+				"page": seg.page_number,
+				"bounding_boxes": bboxes,
+				"parent_section_title": section,
+			})
+	if seg.last_section is not None:
+		current_section = seg.last_section
+	return clauses, clause_offset + last_idx, current_section
+
+
+def segment_pages_to_clauses(pages: List[Dict[str, Any]], merge_short: bool = True) -> List[Dict[str, Any]]:
+	clauses: List[Dict[str, Any]] = []
+	clause_idx = 0
+	current_section: Optional[str] = None
+	for page in pages:
+		page_clauses, clause_idx, current_section = stitch_page(segment_page(page, merge_short), clause_idx, current_section)
+		clauses.extend(page_clauses)
 	return clauses
 
 
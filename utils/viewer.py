@@ -45,15 +45,16 @@ def build_page_html(img_bytes: bytes, img_w: int, img_h: int, page_size_pts: Tup
 	data_uri = _to_data_uri(img_bytes)
 	layers = []
 	for h in highlights:
-		bbox = h.get("bbox") or {}
 		cat = h.get("category", "Safe")
 		opacity = max(0.15, min(0.9, float(h.get("intensity", 0.4))))
-		px_bbox = _scale_bbox_to_pixels(bbox, page_size_pts, (img_w, img_h))
-		layers.append(
-			f'<div title="{cat}" style="position:absolute; left:{px_bbox["x"]}px; top:{px_bbox["y"]}px; '
-			f'width:{px_bbox["w"]}px; height:{px_bbox["h"]}px; '
-			f'background:{CATEGORY_COLORS.get(cat, "#888888")}; opacity:{opacity};"></div>'
-		)
+		# "bboxes" holds one tight box per line (see ColumnarPage.span_boxes)
+		for bbox in h.get("bboxes") or [h.get("bbox") or {}]:
+			px_bbox = _scale_bbox_to_pixels(bbox, page_size_pts, (img_w, img_h))
+			layers.append(
+				f'<div title="{cat}" style="position:absolute; left:{px_bbox["x"]}px; top:{px_bbox["y"]}px; '
+				f'width:{px_bbox["w"]}px; height:{px_bbox["h"]}px; '
+				f'background:{CATEGORY_COLORS.get(cat, "#888888")}; opacity:{opacity};"></div>'
+			)
 	legend = ''.join([f'<span style="display:inline-block;width:12px;height:12px;background:{COLOR};margin-right:6px;"></span>{name}&nbsp;&nbsp;'
 					  for name, COLOR in CATEGORY_COLORS.items()])
 	html = f'''